@@ -11,118 +11,2430 @@ GitHub: https://github.com/0x-Decrypt/alexa-silencer
 import os
 import sys
 import time
+
+# Taken before the remaining imports so --profile-startup can report them
+_MODULE_IMPORT_STARTED = time.perf_counter()
+_MODULES_BEFORE_IMPORT = set(sys.modules)
+
+import heapq
+import math
+import bisect
+import itertools
+import json
 import logging
 import platform
-import subprocess
 import threading
 from pathlib import Path
-import pygame
-import tempfile
 import signal
+from concurrent.futures import Future
+
+# pygame, subprocess, shutil and argparse are imported on first use so that
+# importing this module (and starting the daemon) stays cheap
+
+def render_silence(duration, sample_rate, size=-16, channels=1, dither=0):
+    """Render raw PCM silence in the given mixer format.
+
+    size follows pygame.mixer conventions: negative for signed samples,
+    positive for unsigned (whose silence is the midpoint, not zero) and 32
+    for float samples.
+
+    dither adds noise of up to that many least significant bits (1 LSB of
+    16-bit audio is -90 dBFS), so stacks that drop all-zero streams still
+    see audio. The noise uses a fixed seed, so a format always renders the
+    same bytes.
+    """
+    frames = int(duration * sample_rate)
+    sample_width = abs(size) // 8
+
+    if size == 8:
+        sample = b"\x80"
+    elif size == 16:
+        sample = (0x8000).to_bytes(2, "little")
+    else:
+        sample = bytes(sample_width)
+
+    if not dither:
+        return sample * (frames * channels)
+
+    import array
+    import random
+    noise = random.Random(0)
+    count = frames * channels
+    if size == 32:
+        samples = array.array("f", (noise.randint(-dither, dither) / 32768
+                                    for _ in range(count)))
+    else:
+        typecode = {8: "B", -8: "b", 16: "H", -16: "h"}[size]
+        midpoint = {8: 0x80, 16: 0x8000}.get(size, 0)
+        samples = array.array(typecode, (midpoint + noise.randint(-dither, dither)
+                                         for _ in range(count)))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+class Playback:
+    """Handle for a burst in flight, returned by AudioBackend.play()"""
+
+    def __init__(self, length):
+        self.length = length  # nominal burst duration in seconds
+
+    def get_busy(self):
+        """Return True while the burst is still being played"""
+        return False
+
+    def error(self):
+        """Return an exception if the finished burst failed to play, else None"""
+        return None
+
+    def stop(self):
+        """Abort the burst"""
+
+
+class AudioBackend:
+    """Interface for the audio output used to emit silent bursts.
+
+    Backends are opened once with the stream format, then play() is called
+    for every keepalive and must return a Playback without blocking.
+    """
+
+    name = None
+    supports_sinks = False  # True if play() can target a named output sink
+    options = ("dither",)  # constructor keywords taken from the configuration
+    dither = 0  # LSBs of noise added to each burst
+
+    @classmethod
+    def available(cls):
+        """Return True if the backend can be used on this system"""
+        return True
+
+    def open(self, sample_rate, channels):
+        """Prepare the output device; raise on failure"""
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def play(self, duration, sink=None):
+        """Start a burst of duration seconds of silence and return a Playback.
+
+        sink names the output device; None means the system default.
+        """
+        raise NotImplementedError
+
+    def check(self):
+        """Return False if the output device has been lost or has changed"""
+        return True
+
+    def close(self):
+        """Release the output device"""
+
+
+class PygamePlayback(Playback):
+    def __init__(self, channel, sound):
+        super().__init__(sound.get_length())
+        self.channel = channel
+        self.sound = sound
+
+    def get_busy(self):
+        # Only our channel matters; other sounds may still be playing
+        return self.channel.get_busy() and self.channel.get_sound() is self.sound
+
+    def stop(self):
+        self.channel.stop()
+
+
+class PygameBackend(AudioBackend):
+    """SDL mixer output through pygame"""
+
+    name = "pygame"
+    options = ("buffer", "dither")
+
+    def __init__(self, buffer=512, dither=0):
+        self.buffer = buffer
+        self.dither = dither
+        self.pygame = None
+        self._silence_cache = {}  # (mixer format, duration) -> pygame.mixer.Sound
+
+    @classmethod
+    def available(cls):
+        from importlib.util import find_spec
+        return find_spec("pygame") is not None
+
+    def open(self, sample_rate, channels):
+        super().open(sample_rate, channels)
+        # Importing pygame pulls in SDL, so only do it once it is needed
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import pygame
+        self.pygame = pygame
+        
+        # Initialize pygame mixer with minimal settings
+        pygame.mixer.pre_init(frequency=sample_rate, size=-16,
+                              channels=channels, buffer=self.buffer)
+        pygame.mixer.init()
+
+        # Sounds are bound to the mixer they were created on
+        self._silence_cache.clear()
+        self._devices = self.output_devices()
+
+    def output_devices(self):
+        """Return the SDL output device names, or None if SDL cannot list them"""
+        try:
+            from pygame._sdl2 import audio as sdl2_audio
+            return tuple(sdl2_audio.get_audio_device_names(False))
+        except Exception:
+            return None
+
+    def check(self):
+        if self.pygame is None or self.pygame.mixer.get_init() is None:
+            return False
+        # SDL stays on the device it opened; a changed device list means the
+        # sink we are playing into may have gone away
+        return self._devices is None or self.output_devices() == self._devices
+
+    def get_silent_sound(self, duration):
+        """Return the silent Sound for the current mixer format, rendering it once"""
+        mixer_format = self.pygame.mixer.get_init()
+        if mixer_format is None:
+            raise RuntimeError("pygame mixer is not initialized")
+
+        sound = self._silence_cache.get((mixer_format, duration))
+        if sound is None:
+            frequency, size, channels = mixer_format
+            silent_audio = render_silence(duration, frequency, size, channels,
+                                          self.dither)
+            sound = self.pygame.mixer.Sound(buffer=silent_audio)
+            if not self.dither:
+                sound.set_volume(0.0)  # Ensure volume is at 0
+            # (dither is already inaudible; muting it would elide it again)
+            self._silence_cache[(mixer_format, duration)] = sound
+
+        return sound
+
+    def play(self, duration, sink=None):
+        sound = self.get_silent_sound(duration)
+        channel = sound.play()
+        if channel is None:
+            raise RuntimeError("no free mixer channel")
+        return PygamePlayback(channel, sound)
+
+    def close(self):
+        self._silence_cache.clear()
+        if self.pygame is not None:
+            self.pygame.mixer.quit()
+
+
+class ProcessPlayback(Playback):
+    def __init__(self, process, length):
+        super().__init__(length)
+        self.process = process
+
+    def get_busy(self):
+        return self.process.poll() is None
+
+    def error(self):
+        # An unknown sink or a missing sound server makes the player exit non-zero
+        status = self.process.poll()
+        if status:
+            return RuntimeError(f"audio player exited with status {status}")
+        return None
+
+    def stop(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class PipeBackend(AudioBackend):
+    """Raw PCM written to a short-lived pacat/aplay process.
+
+    Needs no Python dependencies and keeps SDL out of the daemon; each burst
+    spawns the player, which exits once the few hundred bytes are drained.
+    """
+
+    name = "pipe"
+    supports_sinks = True
+
+    # Preferred first: pacat talks to PulseAudio/PipeWire directly
+    PLAYERS = {
+        "pacat": ["pacat", "--playback", "--raw", "--format=s16le",
+                  "--rate={rate}", "--channels={channels}"],
+        "aplay": ["aplay", "-q", "-t", "raw", "-f", "S16_LE",
+                  "-r", "{rate}", "-c", "{channels}", "-"],
+    }
+    SINK_OPTIONS = {
+        "pacat": ["--device={sink}"],
+        "aplay": ["-D", "{sink}"],
+    }
+
+    def __init__(self, player=None, dither=0):
+        self.player = player
+        self.dither = dither
+
+    @classmethod
+    def find_player(cls):
+        """Return the first player command found on PATH, or None"""
+        import shutil
+        for player in cls.PLAYERS:
+            if shutil.which(player):
+                return player
+        return None
+
+    @classmethod
+    def available(cls):
+        return cls.find_player() is not None
+
+    def open(self, sample_rate, channels):
+        import shutil
+        super().open(sample_rate, channels)
+        self.player = self.player or self.find_player()
+        if self.player not in self.PLAYERS or not shutil.which(self.player):
+            raise RuntimeError(f"audio player not found: {self.player}")
+
+        self.command = [part.format(rate=sample_rate, channels=channels)
+                        for part in self.PLAYERS[self.player]]
+        self._silence = {}
+
+    def play(self, duration, sink=None):
+        silent_audio = self._silence.get(duration)
+        if silent_audio is None:
+            silent_audio = render_silence(duration, self.sample_rate, -16,
+                                          self.channels, self.dither)
+            self._silence[duration] = silent_audio
+
+        command = self.command
+        if sink is not None:
+            command = command + [option.format(sink=sink)
+                                 for option in self.SINK_OPTIONS[self.player]]
+
+        import subprocess
+        process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        try:
+            process.stdin.write(silent_audio)
+            process.stdin.close()
+        except OSError:
+            process.kill()
+            process.wait()
+            raise
+        return ProcessPlayback(process, duration)
+
+
+class NullBackend(AudioBackend):
+    """Discards bursts, or appends them to a file sink; used for tests and benchmarks"""
+
+    name = "null"
+    supports_sinks = True
+    options = ("sink_path", "dither")
+
+    def __init__(self, sink_path=None, dither=0):
+        self.sink_path = sink_path
+        self.dither = dither
+        self.bursts = 0
+        self.bytes_written = 0
+        self.bursts_by_sink = {}
+
+    def play(self, duration, sink=None):
+        silent_audio = render_silence(duration, self.sample_rate, -16,
+                                      self.channels, self.dither)
+        if self.sink_path is not None:
+            with open(self.sink_path, "ab") as sink:
+                sink.write(silent_audio)
+        self.bursts += 1
+        self.bytes_written += len(silent_audio)
+        self.bursts_by_sink[sink] = self.bursts_by_sink.get(sink, 0) + 1
+        return Playback(duration)
+
+
+AUDIO_BACKENDS = {
+    PipeBackend.name: PipeBackend,
+    PygameBackend.name: PygameBackend,
+    NullBackend.name: NullBackend,
+}
+
+# Lightest first; the null backend is never picked automatically
+AUTO_BACKEND_ORDER = (PipeBackend.name, PygameBackend.name)
+
+
+def create_audio_backend(name="auto", **options):
+    """Instantiate an audio backend by name, or the first available one for "auto".
+
+    Options a backend does not take (such as buffer for pipe) are ignored.
+    """
+    def build(backend_class):
+        return backend_class(**{key: value for key, value in options.items()
+                                if key in backend_class.options})
+
+    if name == "auto":
+        for candidate in AUTO_BACKEND_ORDER:
+            if AUDIO_BACKENDS[candidate].available():
+                return build(AUDIO_BACKENDS[candidate])
+        raise RuntimeError("No audio backend available "
+                           "(install pygame, pulseaudio-utils or alsa-utils)")
+
+    backend_class = AUDIO_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown audio backend: {name}")
+    if not backend_class.available():
+        raise RuntimeError(f"Audio backend {name} is not available")
+    return build(backend_class)
+
+
+class Clock:
+    """Boot-time source used by the scheduler (replaced by a fake clock in tests).
+
+    now() keeps counting while the machine is suspended (CLOCK_BOOTTIME on
+    Linux), so deadlines that passed during a suspend are due on resume.
+    Sleep timeouts only count time awake, so a resume in the middle of a
+    long sleep is noticed when that sleep ends, unless something wakes the
+    scheduler (see ResumeWatcher). Setting resume_poll caps every wait at
+    that many seconds to notice it without one, at the cost of waking up
+    between deadlines.
+    """
+
+    def __init__(self, resume_poll=None):
+        self.resume_poll = resume_poll
+
+    def now(self):
+        """Return seconds since boot, including time spent suspended"""
+        if hasattr(time, "CLOCK_BOOTTIME"):
+            return time.clock_gettime(time.CLOCK_BOOTTIME)
+        return time.monotonic()
+
+    def suspended(self):
+        """Total seconds spent suspended so far (a wall clock step also shows here
+        where there is no boot clock)"""
+        if hasattr(time, "CLOCK_BOOTTIME"):
+            return time.clock_gettime(time.CLOCK_BOOTTIME) - time.monotonic()
+        return time.time() - time.monotonic()
+
+    def _timeout(self, timeout):
+        if self.resume_poll is None:
+            return timeout
+        return self.resume_poll if timeout is None else min(timeout, self.resume_poll)
+
+    def wait(self, event, timeout):
+        """Block until the event is set or the timeout (None = forever) expires"""
+        return event.wait(self._timeout(timeout))
+
+    async def wait_async(self, event, timeout):
+        """Await an asyncio.Event with the same semantics as wait()"""
+        import asyncio
+        try:
+            await asyncio.wait_for(event.wait(), self._timeout(timeout))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class Wakeup:
+    """Event-like wakeup for the scheduler whose set() takes no lock.
+
+    threading.Event.set() takes a non-reentrant lock that the main thread
+    holds inside wait() and clear(), so a signal handler calling it there
+    deadlocks. Here set() only assigns a flag and writes a byte to a
+    socket pair that wait() selects on, which is safe from signal handlers
+    and other threads alike.
+    """
+
+    def __init__(self):
+        import socket
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+        self._set = False
+
+    def is_set(self):
+        return self._set
+
+    def set(self):
+        self._set = True
+        try:
+            self._writer.send(b"\0")
+        except OSError:
+            pass  # buffer full: a wakeup is already pending
+
+    def clear(self):
+        self._set = False
+        try:
+            while self._reader.recv(4096):
+                pass
+        except OSError:
+            pass  # drained
+
+    def wait(self, timeout=None):
+        """Block until set() or the timeout (None = forever); return whether set"""
+        if not self._set:
+            import select
+            select.select([self._reader], [], [], timeout)
+        return self._set
+
+
+class ScheduledJob:
+    """A one-shot or periodic callback registered with the Scheduler"""
+
+    def __init__(self, deadline, callback, interval=None, name=None):
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval
+        self.name = name or getattr(callback, "__name__", "job")
+        self.cancelled = False
+        self.runs = 0
+
+
+class Scheduler:
+    """Event-driven timer heap that sleeps until the next deadline.
+
+    The run loop blocks on a single Wakeup with a timeout equal to the
+    time left until the earliest job, so nothing wakes up between deadlines
+    (unless the clock caps waits, see Clock.resume_poll). Scheduling,
+    cancelling or stopping from another thread sets the wakeup to
+    re-evaluate the heap immediately. Scheduling takes the heap lock, so
+    a signal handler may only call stop() or wake().
+
+    Periodic jobs stay on the grid of their first deadline, so lateness
+    never accumulates. A job that wakes up more than one interval late
+    runs once for all the slots it missed. When the clock reports that the
+    machine was suspended, resume_listeners are called with the time spent
+    asleep.
+    """
+
+    late_after = 1.0  # seconds past its deadline before a run counts as late
+    resume_after = 5.0  # suspend gap that counts as a resume
+
+    def __init__(self, clock=None):
+        self.clock = clock or Clock()
+        self.logger = logging.getLogger(__name__)
+        self.wakeups = 0
+        self.late = 0  # runs that started more than late_after past their deadline
+        self.missed = 0  # periodic slots coalesced into a later run
+        self.resumes = 0
+        self.resume_listeners = []
+        self._suspended = self._suspended_total()
+        self._heap = []
+        self._lock = threading.Lock()
+        self._wakeup = Wakeup()
+        self._sequence = itertools.count()
+        self._stopped = False
+        self._loop = None  # set while run_async() is driving the heap
+        self._async_wakeup = None
+
+    def call_later(self, delay, callback, name=None):
+        """Run callback once after delay seconds"""
+        job = ScheduledJob(self.clock.now() + delay, callback, name=name)
+        self._push(job)
+        return job
+
+    def call_every(self, interval, callback, first_delay=0, name=None):
+        """Run callback every interval seconds, first after first_delay"""
+        job = ScheduledJob(self.clock.now() + first_delay, callback,
+                           interval=interval, name=name)
+        self._push(job)
+        return job
+
+    def cancel(self, job):
+        """Cancel a scheduled job (it is dropped lazily from the heap)"""
+        job.cancelled = True
+        self._wake()
+
+    def reschedule(self, job, delay):
+        """Move a job's next run to delay seconds from now; returns the replacement job"""
+        self.cancel(job)
+        if job.interval is None:
+            return self.call_later(delay, job.callback, name=job.name)
+        return self.call_every(job.interval, job.callback, first_delay=delay,
+                               name=job.name)
+
+    def catch_up(self, job):
+        """Run a periodic job now and restart its period from here; returns the
+        replacement job. Deadlines it already passed count as one late run."""
+        overdue = self.clock.now() - job.deadline
+        if overdue > self.late_after:
+            self.late += 1
+        if overdue >= job.interval:
+            self.missed += int(overdue // job.interval)
+        return self.reschedule(job, 0)
+
+    def submit(self, callback):
+        """Run callback on the scheduler thread as soon as possible.
+
+        Returns a Future for its result; use it to touch daemon state from
+        other threads.
+        """
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(callback())
+            except Exception as e:
+                future.set_exception(e)
+
+        self.call_later(0, run, name=getattr(callback, "__name__", "submitted"))
+        return future
+
+    def wake(self):
+        """Re-evaluate the heap and the suspend clock now; safe from other threads
+        and signal handlers"""
+        self._wake()
+
+    def stop(self):
+        """Stop the run loop; safe to call from other threads and signal handlers
+        (it only sets a flag and writes to the Wakeup socket)"""
+        self._stopped = True
+        self._wake()
+
+    def reset(self):
+        """Let run() be called again after stop()"""
+        self._stopped = False
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def _push(self, job):
+        with self._lock:
+            heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+        self._wake()
+
+    def _wake(self):
+        self._wakeup.set()
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._async_wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def _pop_due(self, now):
+        """Pop every job whose deadline has passed and return the next timeout"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                job = heapq.heappop(self._heap)[2]
+                if not job.cancelled:
+                    due.append(job)
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            timeout = self._heap[0][0] - now if self._heap else None
+        return due, timeout
+
+    def _suspended_total(self):
+        suspended = getattr(self.clock, "suspended", None)
+        return suspended() if suspended is not None else 0.0
+
+    def _check_resume(self):
+        """Call resume_listeners if the machine was suspended since the last check"""
+        total = self._suspended_total()
+        gap = total - self._suspended
+        self._suspended = total
+        if gap < self.resume_after:
+            return
+        self.resumes += 1
+        self.logger.info(f"Resumed after {gap:.0f}s suspended")
+        for listener in list(self.resume_listeners):
+            try:
+                listener(gap)
+            except Exception as e:
+                self.logger.error(f"Resume listener failed: {e}")
+
+    def _run_job(self, job):
+        job.runs += 1
+        late = self.clock.now() - job.deadline
+        if late > self.late_after:
+            self.late += 1
+        try:
+            job.callback()
+        except Exception as e:
+            self.logger.error(f"Scheduled job {job.name} failed: {e}")
+
+        if job.interval is not None and not job.cancelled:
+            # Next slot on the original grid; slots already passed are coalesced
+            missed = int(late // job.interval) if late >= job.interval else 0
+            self.missed += missed
+            job.deadline += (missed + 1) * job.interval
+            self._push(job)
+
+    def run(self, until=None):
+        """Run due jobs and sleep until the next deadline until stop() is called.
+
+        If until is a Future, return as soon as it completes instead.
+        """
+        if until is not None:
+            until.add_done_callback(lambda _: self._wake())
+        
+        while not self._stopped and not (until is not None and until.done()):
+            # Clear before inspecting the heap so a concurrent push is never lost
+            self._wakeup.clear()
+            self._check_resume()
+            due, timeout = self._pop_due(self.clock.now())
+
+            if due:
+                for job in due:
+                    if self._stopped:
+                        break
+                    self._run_job(job)
+                continue
+
+            self.clock.wait(self._wakeup, timeout)
+            self.wakeups += 1
+
+    async def run_async(self, until=None):
+        """Coroutine version of run() for an asyncio event loop.
+
+        Jobs run on the loop thread; other coroutines get the loop between
+        jobs and while the heap sleeps. Other threads wake it the same way
+        they wake run().
+        """
+        import asyncio
+        self._async_wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if until is not None:
+            until.add_done_callback(lambda _: self._wake())
+
+        try:
+            while not self._stopped and not (until is not None and until.done()):
+                self._async_wakeup.clear()
+                self._wakeup.clear()
+                self._check_resume()
+                due, timeout = self._pop_due(self.clock.now())
+
+                if due:
+                    for job in due:
+                        if self._stopped:
+                            break
+                        self._run_job(job)
+                    await asyncio.sleep(0)
+                    continue
+
+                await self.clock.wait_async(self._async_wakeup, timeout)
+                self.wakeups += 1
+        finally:
+            self._loop = None
+
+
+class AdaptiveInterval:
+    """Learns the longest safe keepalive interval for one device.
+
+    Every interval that passes without a disconnect stretches the next one
+    by growth; a disconnect records how long the device actually stayed
+    idle and drops the interval to that timeout less the safety margin.
+    The interval never probes past a learned timeout and always stays
+    within [floor, ceiling].
+
+    Only a disconnect at or beyond the last interval that survived can be
+    an idle timeout; one sooner than that (the device switched off or out
+    of range) is not learned from.
+    """
+
+    def __init__(self, interval, floor=60, ceiling=1200, margin=0.2, growth=1.25):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.margin = margin
+        self.growth = growth
+        self.idle_timeout = None  # shortest idle time that ended in a disconnect
+        self.disconnects = 0
+        self.interval = self._clamp(interval)
+
+    def _clamp(self, interval):
+        if self.idle_timeout is not None:
+            interval = min(interval, self.idle_timeout * (1 - self.margin))
+        return max(self.floor, min(self.ceiling, interval))
+
+    def record_survived(self, idle_time):
+        """The device stayed connected for idle_time seconds; return True if the interval changed"""
+        if idle_time < self.interval:
+            return False  # an early keepalive says nothing about the limit
+        interval = self._clamp(self.interval * self.growth)
+        changed = interval != self.interval
+        self.interval = interval
+        return changed
+
+    def is_idle_timeout(self, idle_time):
+        return idle_time >= self.interval / self.growth
+
+    def record_disconnect(self, idle_time):
+        """The device dropped after idle_time seconds without a keepalive;
+        return False if that was too soon to be an idle timeout"""
+        if not self.is_idle_timeout(idle_time):
+            return False
+        self.disconnects += 1
+        if self.idle_timeout is None or idle_time < self.idle_timeout:
+            self.idle_timeout = idle_time
+        self.interval = self._clamp(self.interval)
+        return True
+
+    def to_dict(self):
+        return {
+            "interval": self.interval,
+            "idle_timeout": self.idle_timeout,
+            "disconnects": self.disconnects,
+        }
+
+    def load(self, state):
+        """Restore what was learned in a previous run"""
+        self.idle_timeout = state.get("idle_timeout")
+        self.disconnects = state.get("disconnects", 0)
+        self.interval = self._clamp(state.get("interval", self.interval))
+
+
+class KeepaliveTarget:
+    """An output sink kept awake by the daemon, with its own interval and counters"""
+
+    def __init__(self, sink=None, interval=300, name=None):
+        self.sink = sink  # None plays to the system default output
+        self.interval = interval
+        self.name = name or sink or "default"
+        self.successes = 0
+        self.failures = 0
+        self.suppressed = 0  # ticks skipped because audio was already flowing
+        self.last_played = None  # wall-clock time of the last successful burst
+        self.last_played_at = None  # scheduler clock time of that burst
+        self.last_error = None
+        self.disconnects = 0
+        self.adaptive = None  # AdaptiveInterval when the interval is learned
+        self.job = None
+        self.configured = True  # False if only registered clients asked for it
+        self.clients = {}  # shared-daemon client -> interval it asked for
+        self.own_interval = None  # interval without clients, while clients may lower it
+        self.connected = None  # True/False once a connection watcher tracks the device
+
+    @classmethod
+    def parse(cls, spec, default_interval):
+        """Parse a "SINK[@INTERVAL]" command line target"""
+        sink, separator, interval = spec.rpartition("@")
+        if not separator:
+            sink, interval = spec, ""
+        if not sink:
+            raise ValueError(f"Invalid target: {spec}")
+        try:
+            interval = float(interval) if interval else default_interval
+        except ValueError:
+            interval = 0
+        if interval <= 0:
+            raise ValueError(f"Invalid interval in target: {spec}")
+        return cls(sink, interval)
+
+    def spec(self):
+        """Return the command line form of this target"""
+        return f"{self.sink}@{self.interval:g}"
+
+    def record(self, future, started):
+        """Update the counters from a finished playback Future started at clock time started"""
+        error = future.exception()
+        if error is None:
+            self.successes += 1
+            self.last_played = time.time()
+            self.last_played_at = started
+            self.last_error = None
+        else:
+            self.failures += 1
+            self.last_error = str(error)
+
+    def stats(self):
+        """Return the counters as a dict"""
+        return {
+            "name": self.name,
+            "sink": self.sink,
+            "interval": self.interval,
+            "successes": self.successes,
+            "failures": self.failures,
+            "suppressed": self.suppressed,
+            "last_played": self.last_played,
+            "last_error": self.last_error,
+            "disconnects": self.disconnects,
+            "idle_timeout": self.adaptive.idle_timeout if self.adaptive else None,
+            "clients": sorted(self.clients),
+            "connected": self.connected,
+        }
+
+
+class PulseActivityProbe:
+    """Activity probe reporting a sink as active while PulseAudio/PipeWire shows it RUNNING"""
+
+    @classmethod
+    def available(cls):
+        import shutil
+        return shutil.which("pactl") is not None
+
+    def _pactl(self, *arguments):
+        import subprocess
+        result = subprocess.run(["pactl", *arguments], capture_output=True,
+                                text=True, timeout=5)
+        return result.stdout
+
+    def __call__(self, sink):
+        if sink is None:
+            sink = self._pactl("get-default-sink").strip()
+        # Lines are: index, name, driver, sample spec, state
+        for line in self._pactl("list", "short", "sinks").splitlines():
+            fields = line.split("\t")
+            if len(fields) >= 5 and fields[1] == sink:
+                return fields[4].strip() == "RUNNING"
+        return False
+
+
+class ActivityMonitor:
+    """Tracks recent audio activity per sink so keepalives only go to idle links.
+
+    probe(sink) returns True while other audio is flowing to the sink; it
+    is asked at each tick. Embedding code can also push activity with
+    note_activity().
+    """
+
+    def __init__(self, clock, probe=None):
+        self.clock = clock
+        self.probe = probe
+        self.logger = logging.getLogger(__name__)
+        self.last_active = {}  # sink -> clock time of last observed activity
+        self.suppressed = 0
+        self.emitted = 0
+
+    def note_activity(self, sink, at=None):
+        """Record that audio was flowing to sink at clock time at (default: now)"""
+        at = self.clock.now() if at is None else at
+        self.last_active[sink] = max(at, self.last_active.get(sink, at))
+
+    def last_activity(self, sink):
+        """Probe the sink and return the clock time it was last seen active, or None"""
+        if self.probe is not None:
+            try:
+                if self.probe(sink):
+                    self.note_activity(sink)
+            except Exception as e:
+                self.logger.debug(f"Activity probe failed for {sink or 'default'}: {e}")
+        return self.last_active.get(sink)
+
+
+A2DP_SINK_UUID = "0000110b-0000-1000-8000-00805f9b34fb"
+
+
+def parse_dbus_monitor(lines):
+    """Yield (object path, connected) for each Connected change in dbus-monitor output"""
+    path = None
+    name = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("signal "):
+            path, name = None, None
+            for field in line.split():
+                if field.startswith("path="):
+                    path = field[len("path="):].rstrip(";")
+        elif line.startswith('string "'):
+            name = line[len('string "'):-1]
+        elif name == "Connected" and line.startswith("variant") and "boolean" in line:
+            yield path, line.endswith("true")
+            name = None
+
+
+def parse_prepare_for_sleep(lines):
+    """Yield True (going to sleep) or False (resumed) for each logind PrepareForSleep"""
+    sleep_signal = False
+    for line in lines:
+        line = line.strip()
+        if line.startswith("signal "):
+            sleep_signal = "member=PrepareForSleep" in line
+        elif sleep_signal and line.startswith("boolean"):
+            yield line.endswith("true")
+            sleep_signal = False
+
+
+class DbusMonitorSource:
+    """Signals from the system bus, read with dbus-monitor.
+
+    listen(callback, lost) calls callback(*event) from a reader thread for
+    every event that events() finds in the output of dbus-monitor on
+    MATCH, until close(), and lost() if dbus-monitor exits before that
+    (denied by the bus policy, or the bus restarted). listen() returns
+    once dbus-monitor is on the bus (its first line of output), so a
+    snapshot taken after it misses no change.
+    """
+
+    MATCH = ""
+    describe = "signals"  # what is no longer seen if dbus-monitor exits
+    lost_level = logging.ERROR  # how loudly to report that
+    ready_timeout = 2.0  # seconds to wait for dbus-monitor to join the bus
 
-class AlexaSilencer:
     def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.process = None
+        self.thread = None
+        self.closing = False
+
+    @classmethod
+    def available(cls):
+        import shutil
+        return sys.platform.startswith("linux") and shutil.which("dbus-monitor") is not None
+
+    def events(self, lines):
+        raise NotImplementedError
+
+    def listen(self, callback, lost=None):
+        import subprocess
+        self.closing = False
+        process = self.process = subprocess.Popen(
+            ["dbus-monitor", "--system", self.MATCH], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True)
+        ready = threading.Event()
+
+        def lines():
+            for line in process.stdout:
+                ready.set()  # dbus-monitor prints NameAcquired once it is listening
+                yield line
+            ready.set()
+
+        def read():
+            for event in self.events(lines()):
+                callback(*event)
+            if self.closing:
+                return
+            self.logger.log(self.lost_level,
+                            f"dbus-monitor exited with status {process.wait()}; "
+                            f"no more {self.describe} will be seen")
+            if lost is not None:
+                lost()
+
+        self.thread = threading.Thread(target=read, name="dbus-monitor", daemon=True)
+        self.thread.start()
+        ready.wait(self.ready_timeout)
+
+    def close(self):
+        self.closing = True
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+
+class BluezEventSource(DbusMonitorSource):
+    """BlueZ device connection state from the system bus.
+
+    Read with busctl and dbus-monitor, so no Python D-Bus bindings are
+    needed. devices() returns a snapshot {object path: {"address",
+    "connected", "audio"}}; listen(callback, lost) calls callback(path,
+    connected) for every Device1 Connected change.
+    """
+
+    MATCH = ("type='signal',sender='org.bluez',interface='org.freedesktop.DBus.Properties',"
+             "member='PropertiesChanged',arg0='org.bluez.Device1'")
+    describe = "Bluetooth connection changes"
+
+    @classmethod
+    def available(cls):
+        import shutil
+        return super().available() and shutil.which("busctl") is not None
+
+    def devices(self):
+        import subprocess
+        result = subprocess.run(
+            ["busctl", "--system", "--json=short", "call", "org.bluez", "/",
+             "org.freedesktop.DBus.ObjectManager", "GetManagedObjects"],
+            capture_output=True, text=True, timeout=5, check=True)
+        devices = {}
+        for path, interfaces in json.loads(result.stdout)["data"][0].items():
+            device = interfaces.get("org.bluez.Device1")
+            if device is None:
+                continue
+            uuids = [uuid.lower() for uuid in device.get("UUIDs", {}).get("data", [])]
+            devices[path] = {
+                "address": device.get("Address", {}).get("data", ""),
+                "connected": bool(device.get("Connected", {}).get("data", False)),
+                "audio": A2DP_SINK_UUID in uuids,
+            }
+        return devices
+
+    def events(self, lines):
+        return parse_dbus_monitor(lines)
+
+
+class LogindSleepSource(DbusMonitorSource):
+    """logind's PrepareForSleep signal: listen(callback) calls callback(True)
+    before a suspend and callback(False) after the resume"""
+
+    MATCH = ("type='signal',interface='org.freedesktop.login1.Manager',"
+             "member='PrepareForSleep'")
+    describe = "resume notifications"
+    lost_level = logging.WARNING  # resumes are still noticed, only later
+
+    def events(self, lines):
+        return ((sleeping,) for sleeping in parse_prepare_for_sleep(lines))
+
+
+class BluetoothWatcher:
+    """Keeps a session's keepalives to the devices BlueZ reports connected.
+
+    A target whose sink is a BlueZ sink (bluez_output.AA_BB_... or
+    bluez_sink.AA_BB_...) follows that device; the default-output target
+    follows whether any audio (A2DP sink) device is connected; other
+    targets are not tracked. Changes reach the session as
+    record_connect()/record_disconnect() on the scheduler thread, so
+    nothing is scheduled while no device is connected and a keepalive
+    goes out as soon as one connects.
+
+    If the source stops delivering changes, every target falls back to
+    untracked and is kept awake on its interval again.
+
+    source provides devices() and listen(callback, lost) like
+    BluezEventSource; tests inject a fake one.
+    """
+
+    def __init__(self, session, source=None):
+        self.session = session
+        self.source = source or BluezEventSource()
+        self.logger = logging.getLogger(__name__)
+        self.devices = {}
+
+    def start(self, listen=True):
+        """Follow changes, then take a snapshot and mark each target connected or not.
+
+        Listening first means a device that connects while starting up is
+        either in the snapshot or in a change queued on the scheduler
+        behind it.
+        """
+        if listen:
+            self.source.listen(self._on_event, self._on_lost)
+        try:
+            self.devices = self.source.devices()
+        except Exception:
+            if listen:
+                self.stop()
+            raise
+        for target in self.session.targets:
+            self.track(target)
+
+    def stop(self):
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
+
+    def is_connected(self, target):
+        """Whether target's device is connected, or None if it is not a Bluetooth sink"""
+        if target.sink is None:
+            return any(device["connected"] for device in self.devices.values()
+                       if device["audio"])
+        sink = target.sink.upper()
+        matching = [device for device in self.devices.values() if device["address"]
+                    and device["address"].upper().replace(":", "_") in sink]
+        if not matching:
+            return False if sink.startswith(("BLUEZ_OUTPUT.", "BLUEZ_SINK.")) else None
+        return any(device["connected"] for device in matching)
+
+    def track(self, target):
+        """Set a target's connection state from what is known now"""
+        target.connected = self.is_connected(target)
+
+    def _on_event(self, path, connected):
+        # Called on the reader thread; session state belongs to the scheduler thread
+        self.session.scheduler.submit(lambda: self.update(path, connected))
+    
+    def _on_lost(self):
+        self.session.scheduler.submit(self.untrack_all)
+    
+    def untrack_all(self):
+        """Stop following connections: keep every target awake on its interval,
+        including ones whose device was last seen disconnected"""
+        session = self.session
+        for target in session.targets:
+            if target.connected is None:
+                continue
+            target.connected = None
+            if session.running and not session.paused and target.job is None:
+                session.schedule_target(target)
+        self.logger.warning("Bluetooth tracking stopped; keeping all targets awake")
+
+    def update(self, path, connected):
+        """Apply one Connected change and report targets whose state flipped"""
+        if path not in self.devices:
+            try:
+                self.devices = self.source.devices()  # paired since the last snapshot
+            except Exception as e:
+                self.logger.error(f"Failed to list Bluetooth devices: {e}")
+                return
+            if path not in self.devices:
+                return
+        self.devices[path]["connected"] = connected
+        for target in self.session.targets:
+            if target.connected is None:
+                continue
+            now_connected = self.is_connected(target)
+            if now_connected and not target.connected:
+                self.session.record_connect(target)
+            elif not now_connected and target.connected:
+                self.session.record_disconnect(target)
+
+
+class ResumeWatcher:
+    """Wakes the scheduler as soon as logind reports a resume.
+
+    Scheduler waits only count time awake, so on its own the scheduler
+    notices a resume when the wait that was running before the suspend
+    ends, up to an interval later. The wakeup lets it see the suspend gap
+    right away, so resume_listeners run within moments of the resume
+    without waking up in between. source provides listen(callback, lost)
+    like LogindSleepSource; tests inject a fake one.
+    """
+
+    def __init__(self, scheduler, source=None):
+        self.scheduler = scheduler
+        self.source = source or LogindSleepSource()
+
+    def start(self):
+        self.source.listen(self._on_sleep)
+
+    def stop(self):
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
+
+    def _on_sleep(self, sleeping):
+        if not sleeping:
+            self.scheduler.wake()
+
+
+class AudioSession:
+    """Keeps the audio backend open between ticks and reopens it after device loss.
+
+    A failed burst, a timed-out burst or a failed health check marks the
+    device as lost; the backend is then closed and reopened through the
+    scheduler, immediately at first and with exponential backoff after
+    that, without restarting the process.
+    """
+
+    def __init__(self, backend, scheduler, sample_rate, channels,
+                 backoff_initial=1.0, backoff_max=60.0, on_recovered=None,
+                 backend_options=None):
+        self.backend_spec = backend  # backend name or AudioBackend instance
+        self.backend_options = dict(backend_options or {})  # used when creating by name
+        self.scheduler = scheduler
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        # Called after every recovery; sessions sharing this audio add themselves
+        self.recovery_listeners = [on_recovered] if on_recovered else []
+        self.logger = logging.getLogger(__name__)
+        self.backend = None
+        self.lost_at = None  # clock time of the current incident
+        self.recovered_at = None  # clock time of the last recovery
+        self.reinit_count = 0  # reopen attempts after device loss
+        self.recoveries = 0
+        self.last_recovery_latency = None
+        self._attempts = 0
+        self._retry = None  # pending audio-reopen job while the device is lost
+
+    @property
+    def available(self):
+        return self.backend is not None and self.lost_at is None
+
+    def open(self):
+        """Create (if needed) and open the backend; raise on failure"""
+        if self.backend is None:
+            if isinstance(self.backend_spec, str):
+                self.backend = create_audio_backend(self.backend_spec,
+                                                    **self.backend_options)
+            else:
+                self.backend = self.backend_spec
+        self.backend.open(self.sample_rate, self.channels)
+
+    def play(self, duration, sink=None):
+        """Start a burst, marking the device lost if the backend fails"""
+        if self.backend is None:
+            raise RuntimeError("audio backend is not initialized")
+        if self.lost_at is not None:
+            raise RuntimeError("audio device lost; reinitializing")
+        if not self.backend.check():
+            error = RuntimeError("audio device lost or changed")
+            self.mark_lost(error)
+            raise error
+
+        try:
+            return self.backend.play(duration, sink)
+        except Exception as e:
+            self.mark_lost(e)
+            raise
+
+    def mark_lost(self, reason):
+        """Close the backend and start reopening it"""
+        if self.lost_at is not None or self.backend is None:
+            return
+
+        self.lost_at = self.scheduler.clock.now()
+        delay = 0
+        if (self.recovered_at is not None
+                and self.lost_at - self.recovered_at < self.backoff_max):
+            # Lost again right after recovering (e.g. a player that keeps
+            # failing): carry on backing off instead of retrying at once
+            delay = self._backoff()
+        else:
+            self._attempts = 0
+        self.logger.warning(f"Audio device lost ({reason}); reinitializing")
+        self._close_backend()
+        self._retry = self.scheduler.call_later(delay, self._reopen, name="audio-reopen")
+
+    def _backoff(self):
+        return min(self.backoff_initial * 2 ** max(self._attempts - 1, 0), self.backoff_max)
+
+    def _reopen(self):
+        self._retry = None
+        if self.lost_at is None or self.backend is None:
+            return
+
+        self._attempts += 1
+        self.reinit_count += 1
+        try:
+            self.open()
+        except Exception as e:
+            delay = self._backoff()
+            self.logger.error(f"Audio reinitialization attempt {self._attempts} "
+                              f"failed: {e}; retrying in {delay:.0f}s")
+            self._close_backend()
+            self._retry = self.scheduler.call_later(delay, self._reopen,
+                                                    name="audio-reopen")
+            return
+
+        latency = self.scheduler.clock.now() - self.lost_at
+        self.lost_at = None
+        self.recovered_at = self.scheduler.clock.now()
+        self.recoveries += 1
+        self.last_recovery_latency = latency
+        self.logger.info(f"Audio device recovered in {latency:.3f}s "
+                         f"after {self._attempts} attempt(s)")
+        for listener in list(self.recovery_listeners):
+            listener()
+
+    def _close_backend(self):
+        try:
+            self.backend.close()
+        except Exception as e:
+            self.logger.error(f"Failed to close audio backend: {e}")
+
+    def reopen(self):
+        """Reopen with the current backend_spec, format and options.
+
+        A backend that fails to open is handled like a lost device, so it is
+        retried with backoff instead of leaving the session without audio.
+        """
+        if self.backend is None:
+            return
+        if self.lost_at is None:
+            self._close_backend()
+        self._cancel_retry()
+        self.lost_at = None
+        if isinstance(self.backend_spec, str):
+            try:
+                self.backend = create_audio_backend(self.backend_spec,
+                                                    **self.backend_options)
+            except Exception as e:
+                self.logger.error(f"Cannot create audio backend {self.backend_spec}: {e}")
+        try:
+            self.backend.open(self.sample_rate, self.channels)
+        except Exception as e:
+            self.mark_lost(e)
+            return
+        self.logger.info(f"Audio backend '{self.backend.name}' reopened")
+
+    def _cancel_retry(self):
+        if self._retry is not None:
+            self.scheduler.cancel(self._retry)
+            self._retry = None
+
+    def close(self):
+        """Release the backend for good"""
+        if self.backend is not None:
+            if self.lost_at is None:
+                self._close_backend()
+            self.backend = None
+        self._cancel_retry()
+        self.lost_at = None
+
+
+class KeepaliveSession:
+    """Keepalive engine for a set of targets: audio session, schedule and stats.
+
+    Constructing a session has no global side effects: it does not touch
+    logging configuration, signal handlers or startup entries, and opens
+    nothing until start(). Sessions can share one Scheduler and one
+    AudioSession, so a host process can drive many of them from a single
+    scheduler thread and a single mixer. Whatever a session creates itself
+    it also owns: its own scheduler runs on a background thread between
+    start() and stop(), and its own audio session is closed by stop().
+    """
+
+    def __init__(self, targets=None, backend="auto", clock=None, scheduler=None,
+                 audio=None, adaptive=False, activity_probe=None, interval=300):
+        self.logger = logging.getLogger(__name__)
+        self.running = False
+        self.paused = False
+        self.started_at = None
+        self.interval = interval
+        self.targets = list(targets) if targets else [KeepaliveTarget(interval=self.interval)]
+        self.adaptive = adaptive
+        if adaptive:
+            for target in self.targets:
+                target.adaptive = AdaptiveInterval(target.interval)
+        self.adaptive_state_file = None  # learned intervals are not persisted unless set
+        self.metrics = Metrics()
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or Scheduler(clock)
+        self.activity = ActivityMonitor(self.scheduler.clock, activity_probe)
+        self.sample_rate = 22050
+        self.channels = 1
+        self._owns_audio = audio is None
+        if audio is None:
+            audio = AudioSession(backend, self.scheduler, self.sample_rate, self.channels)
+        self.audio = audio
+        self.audio.recovery_listeners.append(self.on_audio_recovered)
+        self.scheduler.resume_listeners.append(self.on_resume)
+        spec = self.audio.backend_spec
+        self.backend_name = spec if isinstance(spec, str) else spec.name
+        self.silence_duration = 0.01  # 10 milliseconds
+        self.playback_timeout = 2.0  # give up on a wedged audio backend
+        self.playback_poll = 0.02  # re-check interval if output lags behind
+        self._thread = None
+    
+    def start(self):
+        """Open the audio backend and schedule keepalives; raise RuntimeError on failure"""
+        if self.running:
+            return self
+        if not self.initialize_audio():
+            raise RuntimeError("audio backend failed to initialize")
+        self.start_keepalives()
+        if self._owns_scheduler:
+            self.scheduler.reset()  # a restarted session reuses its stopped scheduler
+            self._thread = threading.Thread(target=self.scheduler.run,
+                                            name="keepalive", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        """Cancel this session's keepalives and release what it owns"""
         self.running = False
-        self.interval = 300  # 5 minutes in seconds
+        for target in self.targets:
+            if target.job is not None:
+                self.scheduler.cancel(target.job)
+                target.job = None
+        self.save_adaptive_state()
+        if self._thread is not None:
+            self.scheduler.stop()
+            self._thread.join(timeout=self.playback_timeout)
+            self._thread = None
+        if self._owns_audio:
+            self.audio.close()
+        elif self.on_audio_recovered in self.audio.recovery_listeners:
+            self.audio.recovery_listeners.remove(self.on_audio_recovered)
+        if not self._owns_scheduler and self.on_resume in self.scheduler.resume_listeners:
+            self.scheduler.resume_listeners.remove(self.on_resume)
+    
+    def tick(self, target=None):
+        """Run one keepalive now for target (default: every target).
+
+        Returns the playback Futures, with None for suppressed keepalives.
+        While start() has a scheduler thread running, the keepalives run on
+        that thread, which owns the session's state.
+        """
+        targets = [target] if target is not None else self.targets
+        
+        def run():
+            return [self.keepalive(target) for target in targets]
+        
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            return self.scheduler.submit(run).result()
+        return run()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def initialize_audio(self):
+        """Select and open the audio backend silently"""
+        try:
+            if self.audio.backend is None:  # a shared session may already be open
+                self.audio.open()
+            
+            named_sinks = [target.sink for target in self.targets if target.sink]
+            if named_sinks and not self.audio.backend.supports_sinks:
+                if self._owns_audio:
+                    self.audio.close()
+                raise RuntimeError(f"backend '{self.backend_name}' cannot play to "
+                                   f"named sinks: {', '.join(named_sinks)}")
+            
+            self.logger.info(f"Audio backend '{self.audio.backend.name}' initialized successfully")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Failed to initialize audio backend: {e}")
+            if self._owns_audio:
+                self.audio.backend = None
+            return False
+    
+    def start_keepalives(self):
+        """Mark the session running and schedule a keepalive job per target"""
+        self.running = True
+        self.started_at = self.scheduler.clock.now()
+        self.load_adaptive_state()
+        for target in self.targets:
+            self.schedule_target(target)
+    
+    def schedule_target(self, target, first_delay=0):
+        """Start target's periodic keepalive job (not while its device is disconnected)"""
+        if target.connected is False:
+            target.job = None
+            return
+        target.job = self.scheduler.call_every(
+            target.interval, lambda: self.keepalive(target), first_delay=first_delay,
+            name=f"keepalive:{target.name}")
+    
+    def play_silent_audio(self, target=None, tick_started=None):
+        """Start a silent burst to maintain the Bluetooth connection.
+
+        Returns immediately with a concurrent.futures.Future (awaitable via
+        asyncio.wrap_future) that resolves to the playback latency once the
+        burst has finished, or fails with TimeoutError after
+        playback_timeout seconds. Completion is checked by the scheduler at
+        the computed end of the burst, so it only fires while the scheduler
+        runs (see Scheduler.run(until=future)).
+        
+        target is the KeepaliveTarget to play to (default output if None);
+        its counters are updated when the Future completes, with the burst
+        recorded as played at tick_started (default: now).
+        """
+        future = Future()
+        clock = self.scheduler.clock
+        started = clock.now()
+        played_at = started if tick_started is None else tick_started
+        sink = target.sink if target is not None else None
+        future.add_done_callback(self.metrics.record_playback)
+        if target is not None:
+            future.add_done_callback(lambda done: target.record(done, played_at))
+        
+        try:
+            playback = self.audio.play(self.silence_duration, sink)
+        except Exception as e:
+            self.logger.error(f"Failed to play silent audio{self._sink_label(sink)}: {e}")
+            future.set_exception(e)
+            return future
+        
+        deadline = started + self.playback_timeout
+        
+        def check_playback():
+            now = clock.now()
+            
+            if not playback.get_busy():
+                error = playback.error()
+                if error is not None:
+                    self.logger.error(f"Failed to play silent audio{self._sink_label(sink)}: "
+                                      f"{error}")
+                    self.audio.mark_lost(error)
+                    future.set_exception(error)
+                    return
+                self.logger.info(f"Silent audio played successfully{self._sink_label(sink)}")
+                future.set_result(now - started)
+            elif now >= deadline:
+                playback.stop()
+                error = TimeoutError(
+                    f"playback did not finish within {self.playback_timeout}s")
+                self.logger.error(f"Failed to play silent audio{self._sink_label(sink)}: {error}")
+                # A wedged backend is treated like a lost device
+                self.audio.mark_lost(error)
+                future.set_exception(error)
+            else:
+                self.scheduler.call_later(min(self.playback_poll, deadline - now),
+                                          check_playback, name="playback")
+        
+        self.scheduler.call_later(playback.length, check_playback,
+                                  name="playback")
+        return future
+    
+    def keepalive(self, target):
+        """Scheduled tick for one target"""
+        now = self.scheduler.clock.now()
+        if target.job is not None:
+            lag = now - target.job.deadline
+            self.metrics.tick_lag.observe(max(lag, 0.0))
+        
+        adaptive = target.adaptive
+        if adaptive is not None and target.last_played_at is not None:
+            idle_time = now - target.last_played_at
+            if adaptive.record_survived(idle_time):
+                self.logger.info(f"Adaptive interval for {target.name} "
+                                 f"raised to {adaptive.interval:.0f}s")
+                self.set_target_interval(target, adaptive.interval)
+                self.save_adaptive_state()
+        
+        last_active = self.activity.last_activity(target.sink)
+        if last_active is not None and now - last_active < target.interval:
+            # Real audio already reset the device's idle timer
+            self.activity.suppressed += 1
+            target.suppressed += 1
+            target.last_played_at = last_active
+            delay = last_active + target.interval - now
+            self.logger.debug(f"Audio active on {target.name}; next keepalive "
+                              f"in {delay:.0f}s")
+            if target.job is not None:
+                target.job = self.scheduler.reschedule(target.job, delay)
+            return None
+        
+        self.activity.emitted += 1
+        # Idle time is measured tick to tick, so the probe's own time is not counted
+        return self.play_silent_audio(target, tick_started=now)
+    
+    def set_target_interval(self, target, interval):
+        """Change a target's interval from its next reschedule on"""
+        target.interval = interval
+        if target.job is not None:
+            target.job.interval = interval
+    
+    def add_target(self, target):
+        """Start keeping another target awake"""
+        if self.adaptive and target.adaptive is None:
+            target.adaptive = AdaptiveInterval(target.interval)
+        self.targets.append(target)
+        if self.running and not self.paused:
+            self.schedule_target(target)
+        self.logger.info(f"Added target {target.name}")
+    
+    def remove_target(self, target):
+        """Stop keeping target awake"""
+        if target.job is not None:
+            self.scheduler.cancel(target.job)
+            target.job = None
+        self.targets.remove(target)
+        self.logger.info(f"Removed target {target.name}")
+    
+    def change_interval(self, targets, interval):
+        """Set a new interval now; each target's next keepalive is due interval
+        after its last one"""
+        now = self.scheduler.clock.now()
+        for target in targets:
+            if target.adaptive is not None:
+                target.adaptive.interval = interval  # manual override of what was learned
+            self.set_target_interval(target, interval)
+            if target.job is not None and not self.paused:
+                last = target.last_played_at
+                delay = max(0.0, last + interval - now) if last is not None else interval
+                target.job = self.scheduler.reschedule(target.job, delay)
+    
+    def find_target(self, name):
+        """Return the target with the given name or sink, or None"""
+        for target in self.targets:
+            if name in (target.name, target.sink):
+                return target
+        return None
+    
+    def record_disconnect(self, target):
+        """Report that target's device dropped its Bluetooth connection"""
+        now = self.scheduler.clock.now()
+        target.disconnects += 1
+        if target.connected is not None:
+            # Tracked devices get no keepalives until they connect again
+            target.connected = False
+            if target.job is not None:
+                self.scheduler.cancel(target.job)
+                target.job = None
+        if target.last_played_at is None:
+            self.logger.warning(f"{target.name} disconnected")
+            return
+        
+        idle_time = now - target.last_played_at
+        # The link restarts on reconnect, so this gap must not count as survived
+        target.last_played_at = None
+        self.logger.warning(f"{target.name} disconnected after {idle_time:.0f}s idle")
+        
+        if target.adaptive is not None:
+            if not target.adaptive.record_disconnect(idle_time):
+                self.logger.info(f"{target.name} dropped too soon for an idle timeout; "
+                                 "adaptive interval unchanged")
+                return
+            self.logger.info(f"Adaptive interval for {target.name} lowered to "
+                             f"{target.adaptive.interval:.0f}s")
+            self.set_target_interval(target, target.adaptive.interval)
+            self.save_adaptive_state()
+    
+    def record_connect(self, target):
+        """Report that target's device (re)connected; its idle clock starts now"""
+        self.logger.info(f"{target.name} connected")
+        if target.connected is not None:
+            target.connected = True
+        if self.running and not self.paused:
+            if target.job is not None:
+                target.job = self.scheduler.reschedule(target.job, 0)
+            elif target.connected:
+                self.schedule_target(target)
+    
+    def pause(self):
+        """Stop sending keepalives until resume()"""
+        if not self.paused:
+            self.paused = True
+            for target in self.targets:
+                if target.job is not None:
+                    self.scheduler.cancel(target.job)
+            self.logger.info("Keepalives paused")
+        return {"paused": True}
+    
+    def resume(self):
+        """Restart keepalives, sending one to every target right away"""
+        if self.paused:
+            self.paused = False
+            for target in self.targets:
+                if target.job is not None:
+                    target.job = self.scheduler.reschedule(target.job, 0)
+                elif target.connected:
+                    self.schedule_target(target)  # connected while paused
+            self.logger.info("Keepalives resumed")
+        return {"paused": False}
+    
+    def ping_now(self, targets=None):
+        """Send a keepalive immediately; the target's cadence restarts from now"""
+        for target in targets or self.targets:
+            if self.paused or target.job is None:
+                self.play_silent_audio(target)
+            else:
+                target.job = self.scheduler.reschedule(target.job, 0)
+        return {"pinged": [target.name for target in targets or self.targets]}
+    
+    def get_adaptive_state_file(self):
+        return self.adaptive_state_file
+    
+    def load_adaptive_state(self):
+        """Restore learned intervals saved by a previous run"""
+        state_file = self.get_adaptive_state_file()
+        if not self.adaptive or state_file is None:
+            return
+        try:
+            with open(state_file) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to load adaptive intervals: {e}")
+            return
+        
+        for target in self.targets:
+            if target.name in state:
+                target.adaptive.load(state[target.name])
+                target.interval = target.adaptive.interval
+                self.logger.info(f"Restored adaptive interval for {target.name}: "
+                                 f"{target.interval:.0f}s")
+    
+    def save_adaptive_state(self):
+        """Persist learned intervals so they survive restarts"""
+        state_file = self.get_adaptive_state_file()
+        if not self.adaptive or state_file is None:
+            return
+        state = {target.name: target.adaptive.to_dict() for target in self.targets}
+        try:
+            state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = state_file.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_file, state_file)
+        except OSError as e:
+            self.logger.error(f"Failed to save adaptive intervals: {e}")
+    
+    def get_metrics(self):
+        """Return all instrumentation as a JSON-serializable dict"""
+        cpu_seconds, rss = process_resources()
+        return {
+            "tick_lag_seconds": self.metrics.tick_lag.to_dict(),
+            "playback_latency_seconds": self.metrics.playback_latency.to_dict(),
+            "keepalives_emitted": self.activity.emitted,
+            "keepalives_suppressed": self.activity.suppressed,
+            "failures": dict(self.metrics.failures),
+            "mixer_reinits": self.audio.reinit_count,
+            "mixer_recoveries": self.audio.recoveries,
+            "last_recovery_latency": self.audio.last_recovery_latency,
+            "scheduler_wakeups": self.scheduler.wakeups,
+            "ticks_late": self.scheduler.late,
+            "ticks_missed": self.scheduler.missed,
+            "resumes": self.scheduler.resumes,
+            "cpu_seconds": cpu_seconds,
+            "resident_memory_bytes": rss,
+            "devices": self.get_device_stats(),
+        }
+    
+    @staticmethod
+    def _sink_label(sink):
+        return f" to {sink}" if sink else ""
+    
+    def get_device_stats(self):
+        """Return success/failure counters and last-played times per target"""
+        return [target.stats() for target in self.targets]
+    
+    def on_audio_recovered(self):
+        """Send a keepalive right away; the device was lost during a tick.
+
+        Nothing is sent while paused or to a target whose device is disconnected.
+        """
+        if not self.running or self.paused:
+            return
+        for target in self.targets:
+            if target.connected is not False:
+                self.play_silent_audio(target)
+    
+    def on_resume(self, suspended_for):
+        """Keep every target awake right after a suspend; devices drop on resume"""
+        if not self.running or self.paused:
+            return
+        self.logger.info(f"Sending keepalives after {suspended_for:.0f}s suspended")
+        for target in self.targets:
+            if target.job is not None:
+                target.job = self.scheduler.catch_up(target.job)
+
+
+class AlexaSilencer(KeepaliveSession):
+    def __init__(self, clock=None, backend="auto", targets=None, adaptive=False,
+                 activity_probe=None, log_level="INFO", log_file=None):
+        super().__init__(targets, backend, clock, adaptive=adaptive,
+                         activity_probe=activity_probe)
+        self.log_level = log_level
+        self.log_file = log_file  # defaults to the app data dir
+        self.config = None  # Config applied by apply_config()
+        self.config_file = None  # watched for changes while running
+        self.config_overrides = {}  # environment and command line, re-applied on reload
+        self.config_stamp = None
+        self.config_watch = None
+        self.single_instance = False  # enforce one daemon (see claim_instance)
+        self.instance_address = None  # machine-wide socket; None uses a lock file
+        self.instance_server = None
+        self.instance_lock = None
+        self.trusted_daemon_uids = None  # uids a shared daemon may run as (default: root and ours)
+        self.registrations = {}  # client -> lease expiry job
+        self.metrics_address = None  # port, host:port or Unix socket path
+        self.metrics_snapshot_interval = 0  # seconds between metrics.json writes
+        self.metrics_server = None
+        self.control_address = None  # enables the control socket when set
+        self.control_server = None
+        self.notifier = SystemdNotifier()  # no-op unless started by systemd
+        self.watchdog_job = None
+        self.watchdog_grace = 600  # seconds of failing keepalives before heartbeats stop
+        self.failing_since = None  # clock time of the first failure in the current streak
+        self.timer_mode = False  # Linux setup installs a systemd timer running --oneshot
+        self.track_bluetooth = False  # only keep connected BlueZ devices awake
+        self.bluetooth_source = None  # event source for the watcher (default: BlueZ)
+        self.bluetooth_watcher = None
+        self.sleep_source = None  # resume notifications (default: logind)
+        self.resume_watcher = None
+        self.disconnects_reported = False  # True if the host application calls record_disconnect()
+        self.memory_check_interval = 600  # seconds between RSS samples (0 disables)
+        self.memory_ceiling = None  # bytes; restart above this
+        self.memory_trace = False  # log tracemalloc growth at every sample
+        self.memory_watchdog = None
+        self.restart_requested = False  # main() re-executes the daemon after it stops
+        self.exit_status = 0  # main() exits with this once the daemon stops
         self.os_type = platform.system().lower()
         self.setup_logging()
+    
+    @classmethod
+    def from_config(cls, config, clock=None, backend=None, activity_probe=None):
+        """Create a silencer from a Config (backend overrides config.backend)"""
+        silencer = cls(clock, backend=backend or config.backend,
+                       targets=config.keepalive_targets(), adaptive=config.adaptive,
+                       activity_probe=activity_probe, log_level=config.log_level,
+                       log_file=config.log_file)
+        silencer.apply_config(config)
+        return silencer
         
     def setup_logging(self):
-        """Set up logging to file only (no console output)"""
-        log_dir = self.get_app_data_dir()
-        log_file = log_dir / "alexa_silencer.log"
-        
-        # Ensure log directory exists
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, mode='a'),
-            ]
-        )
+        """Set up asynchronous, rotating logging to file only (no console output)"""
+        global _log_pipeline
+        log_file = self.log_file or self.get_app_data_dir() / "alexa_silencer.log"
         
-        # Remove any console handlers
-        for handler in logging.root.handlers[:]:
-            if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-                logging.root.removeHandler(handler)
+        if _log_pipeline is None:
+            _log_pipeline = LogPipeline(log_file, self.log_level).install()
+            
+            # Remove any console handlers
+            for handler in logging.root.handlers[:]:
+                if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
+                    logging.root.removeHandler(handler)
+        else:
+            _log_pipeline.set_level(self.log_level)
         
         self.logger = logging.getLogger(__name__)
         
     def get_app_data_dir(self):
         """Get appropriate application data directory for the OS"""
-        if self.os_type == "windows":
-            app_data = os.getenv('APPDATA', os.path.expanduser('~'))
-            return Path(app_data) / "AlexaSilencer"
-        else:  # Linux and other Unix-like systems
-            return Path.home() / ".alexa_silencer"
+        return default_app_data_dir(self.os_type)
     
     def initialize_pygame(self):
-        """Initialize pygame audio system silently"""
+        """Initialize the audio system (kept for backwards compatibility)"""
+        return self.initialize_audio()
+    
+    def get_adaptive_state_file(self):
+        return self.adaptive_state_file or self.get_app_data_dir() / "adaptive_intervals.json"
+    
+    def write_metrics_snapshot(self):
+        """Write get_metrics() to metrics.json in the app data dir"""
+        snapshot_file = self.get_app_data_dir() / "metrics.json"
         try:
-            # Initialize pygame mixer with minimal settings
-            pygame.mixer.pre_init(frequency=22050, size=-16, channels=1, buffer=512)
-            pygame.mixer.init()
-            
-            # Generate a very short silent audio clip (10ms of silence)
-            silence_duration = 0.01  # 10 milliseconds
-            sample_rate = 22050
-            samples = int(silence_duration * sample_rate)
-            
-            # Create silent audio data (zeros) - using pure Python instead of numpy
-            silent_audio = bytes(samples * 2)  # 2 bytes per sample for 16-bit audio
-            
-            # Create a temporary WAV file with silent audio
-            self.temp_dir = Path(tempfile.gettempdir()) / "alexa_silencer"
-            self.temp_dir.mkdir(exist_ok=True)
-            self.silent_file = self.temp_dir / "silence.wav"
-            
-            # Write silent WAV file
-            import wave
-            with wave.open(str(self.silent_file), 'w') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(sample_rate)
-                wav_file.writeframes(silent_audio)
-            
-            self.logger.info("Pygame audio system initialized successfully")
-            return True
-            
+            temp_file = snapshot_file.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump(self.get_metrics(), f)
+            os.replace(temp_file, snapshot_file)
+        except OSError as e:
+            self.logger.error(f"Failed to write metrics snapshot: {e}")
+    
+    def start_metrics(self):
+        """Start the configured metrics exporters"""
+        if self.metrics_address:
+            try:
+                self.metrics_server = MetricsServer(
+                    parse_listen_address(self.metrics_address), self.get_metrics)
+                self.metrics_server.start()
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Failed to start metrics server: {e}")
+                self.metrics_server = None
+        self.schedule_metrics_snapshots()
+    
+    def schedule_metrics_snapshots(self):
+        if self.metrics_snapshot_interval > 0:
+            self.scheduler.call_every(self.metrics_snapshot_interval,
+                                      self.write_metrics_snapshot,
+                                      first_delay=self.metrics_snapshot_interval,
+                                      name="metrics-snapshot")
+    
+    def start_notify(self, status):
+        """Tell systemd we are up and keep its watchdog fed from the scheduler.
+
+        Heartbeats also follow every successful keepalive; the periodic one
+        proves the loop is alive while keepalives are paused, suppressed or
+        further apart than the watchdog timeout. It stops once keepalives
+        have failed for watchdog_grace seconds, so systemd restarts a daemon
+        whose audio does not come back.
+        """
+        if not self.notifier.enabled:
+            return
+        self.notifier.ready(status)
+        interval = self.notifier.watchdog_interval
+        if interval:
+            self.watchdog_job = self.scheduler.call_every(
+                interval / 2, self.watchdog_heartbeat, first_delay=interval / 2,
+                name="watchdog")
+    
+    def watchdog_heartbeat(self):
+        if (self.failing_since is not None
+                and self.scheduler.clock.now() - self.failing_since > self.watchdog_grace):
+            self.logger.error(f"Keepalives failing for over {self.watchdog_grace:.0f}s; "
+                              "withholding the systemd watchdog heartbeat")
+            return
+        self.notifier.watchdog()
+    
+    def check_adaptive_source(self):
+        """Turn --adaptive off unless something reports disconnects.
+
+        Without disconnect reports the model only ever sees intervals that
+        survived, so it would stretch every interval to the ceiling.
+        """
+        if not self.adaptive or self.bluetooth_watcher is not None or self.disconnects_reported:
+            return
+        self.logger.warning("--adaptive needs --bluetooth to see disconnects; "
+                            "keeping fixed intervals")
+        self.adaptive = False
+        for target in self.targets:
+            target.adaptive = None
+    
+    def start_memory_watchdog(self):
+        """Sample memory every memory_check_interval seconds (0 disables)"""
+        if self.memory_check_interval <= 0:
+            return
+        self.memory_watchdog = MemoryWatchdog(
+            self.scheduler, self.memory_check_interval, self.memory_ceiling,
+            self.memory_trace, on_ceiling=self.on_memory_ceiling)
+        self.memory_watchdog.start()
+    
+    def on_memory_ceiling(self, rss):
+        """Restart before the process grows any further.
+
+        Under systemd the daemon shuts down cleanly and exits with a failure
+        status, so Restart= brings up a fresh process; re-executing in the
+        same PID after STOPPING=1 would be killed as a stopping unit.
+        Otherwise main() re-executes it once it has shut down.
+        """
+        if self.notifier.enabled:
+            self.logger.warning("Exiting to release memory; systemd restarts the service")
+            self.exit_status = 1
+        else:
+            self.logger.warning("Restarting to release memory")
+            self.restart_requested = True
+        self.stop()
+    
+    def get_metrics(self):
+        metrics = super().get_metrics()
+        if self.memory_watchdog is not None:
+            metrics["memory"] = self.memory_watchdog.stats()
+        return metrics
+    
+    def play_silent_audio(self, target=None, tick_started=None):
+        future = super().play_silent_audio(target, tick_started)
+        if self.notifier.enabled:
+            future.add_done_callback(lambda done: self.notify_tick(done, target))
+        return future
+    
+    def notify_tick(self, future, target=None):
+        """Report a finished keepalive to systemd; only successes feed the watchdog"""
+        name = target.name if target is not None else "default output"
+        if future.exception() is not None:
+            if self.failing_since is None:
+                self.failing_since = self.scheduler.clock.now()
+            self.notifier.status(f"Keepalive to {name} failed: {future.exception()}")
+            return
+        self.failing_since = None
+        if self.notifier.watchdog_interval:
+            self.notifier.watchdog()
+        self.notifier.status(f"Keepalive to {name} played in "
+                             f"{future.result() * 1000:.1f} ms; "
+                             f"{self.activity.emitted} sent")
+    
+    def start_bluetooth(self, listen=True):
+        """Start tracking BlueZ connections if enabled; keepalives are then only
+        scheduled for connected devices"""
+        if not self.track_bluetooth:
+            return
+        source = self.bluetooth_source
+        if source is None:
+            if not BluezEventSource.available():
+                self.logger.warning("Bluetooth tracking needs busctl and dbus-monitor; "
+                                    "keeping every target awake")
+                return
+            source = BluezEventSource()
+        watcher = BluetoothWatcher(self, source)
+        try:
+            watcher.start(listen)
         except Exception as e:
-            self.logger.error(f"Failed to initialize pygame: {e}")
-            return False
+            self.logger.error(f"Failed to watch Bluetooth connections: {e}")
+            for target in self.targets:
+                target.connected = None
+            return
+        self.bluetooth_watcher = watcher
+        connected = [target.name for target in self.targets if target.connected]
+        self.logger.info(f"Tracking Bluetooth connections; connected: "
+                         f"{', '.join(connected) or 'none'}")
     
-    def play_silent_audio(self):
-        """Play silent audio to maintain Bluetooth connection"""
+    def start_resume_watch(self):
+        """Wake up as soon as the machine resumes, so devices get their
+        keepalive right away instead of when the current wait runs out"""
+        source = self.sleep_source
+        if source is None:
+            if not LogindSleepSource.available():
+                return
+            source = LogindSleepSource()
+        watcher = ResumeWatcher(self.scheduler, source)
         try:
-            # Load and play the silent audio file
-            sound = pygame.mixer.Sound(str(self.silent_file))
-            sound.set_volume(0.0)  # Ensure volume is at 0
-            sound.play()
-            
-            # Wait for playback to complete
-            while pygame.mixer.get_busy():
-                time.sleep(0.001)
-            
-            self.logger.info("Silent audio played successfully")
-            
+            watcher.start()
+        except Exception as e:
+            self.logger.warning(f"Failed to watch for resumes: {e}")
+            return
+        self.resume_watcher = watcher
+    
+    def add_target(self, target):
+        if self.bluetooth_watcher is not None:
+            self.bluetooth_watcher.track(target)
+        super().add_target(target)
+    
+    def start_control(self):
+        """Start the control socket if an address is configured"""
+        if not self.control_address:
+            return
+        try:
+            self.control_server = ControlServer(self.control_address,
+                                                self.handle_control_request)
+            self.control_server.start()
+        except Exception as e:
+            self.logger.error(f"Failed to start control socket: {e}")
+            self.control_server = None
+    
+    def handle_control_request(self, request):
+        """Run a control request on the scheduler thread (called from the control thread)"""
+        try:
+            return self.scheduler.submit(
+                lambda: self.control_reply(request)).result(timeout=5)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+    
+    def control_reply(self, request):
+        """Execute a control request and wrap the result; runs on the scheduler thread"""
+        try:
+            return dict(self.execute_control_command(request), ok=True)
         except Exception as e:
-            self.logger.error(f"Failed to play silent audio: {e}")
+            return {"ok": False, "error": str(e)}
+    
+    def execute_control_command(self, request):
+        """Dispatch one control request; runs on the scheduler thread"""
+        command = request.get("command")
+        if command not in CONTROL_COMMANDS:
+            raise ValueError(f"unknown command: {command}")
+        
+        targets = self.targets
+        if request.get("target"):
+            target = self.find_target(request["target"])
+            if target is None:
+                raise ValueError(f"unknown target: {request['target']}")
+            targets = [target]
+        
+        if command == "status":
+            return self.control_status()
+        if command == "pause":
+            return self.pause()
+        if command == "resume":
+            return self.resume()
+        if command == "ping-now":
+            return self.ping_now(targets)
+        if command == "set-interval":
+            return self.control_set_interval(targets, request.get("value"))
+        if command == "register":
+            return self.register_client(request.get("client"), request.get("targets") or [])
+        if command == "unregister":
+            return self.unregister_client(request.get("client"))
+        return self.reload_config()
+    
+    def handle_shared_request(self, request, peer_uid=None):
+        """Requests from any local user on the instance socket; only SHARED_COMMANDS.
+
+        Client names are qualified with the caller's uid, so one user cannot
+        renew or withdraw another user's registration.
+        """
+        if request.get("command") not in SHARED_COMMANDS:
+            return {"ok": False, "error": "command not allowed on the shared socket"}
+        if peer_uid is not None and isinstance(request.get("client"), str):
+            request = dict(request, client=f"{request['client']} (uid {peer_uid})")
+        return self.handle_control_request(request)
+    
+    def register_client(self, client, targets):
+        """Keep a client's [sink, interval] targets awake for REGISTRATION_LEASE
+        seconds; registering again renews the lease and replaces its targets"""
+        if not _is_printable_name(client):
+            raise ValueError("register needs a client name")
+        if client not in self.registrations and len(self.registrations) >= MAX_CLIENTS:
+            raise ValueError("too many registered clients")
+        if not isinstance(targets, list) or len(targets) > MAX_CLIENT_TARGETS:
+            raise ValueError(f"at most {MAX_CLIENT_TARGETS} targets per client")
+        backend = self.audio.backend
+        wanted = []
+        for sink, interval in targets:
+            if sink is not None and not _is_printable_name(sink):
+                raise ValueError(f"invalid sink name: {sink!r}")
+            if sink and backend is not None and not backend.supports_sinks:
+                # It would play to the default output instead; refuse like initialize_audio()
+                raise ValueError(f"backend '{backend.name}' cannot play to named sinks: {sink}")
+            try:
+                interval = _number_setting(MIN_CLIENT_INTERVAL)(interval)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"invalid interval {interval!r} for {sink or 'default'}: {e}")
+            wanted.append(KeepaliveTarget(sink or None, interval))
+        wanted = wanted or [KeepaliveTarget(interval=self.interval)]
+        
+        renewing = client in self.registrations
+        if renewing:
+            self.scheduler.cancel(self.registrations.pop(client))
+        names = []
+        for new in wanted:
+            target = self.find_target(new.name)
+            if target is None:
+                target = new
+                target.configured = False
+                self.add_target(target)
+            target.clients[client] = new.interval
+            self.apply_client_intervals(target)
+            names.append(target.name)
+        self._release_client(client, keep=names)
+        
+        expiry = self.scheduler.call_later(REGISTRATION_LEASE,
+                                           lambda: self.unregister_client(client),
+                                           name=f"lease:{client}")
+        self.registrations[client] = expiry
+        if not renewing:
+            self.logger.info(f"Client {client} registered {', '.join(names)}")
+        return {"client": client, "targets": names, "lease": REGISTRATION_LEASE}
+    
+    def unregister_client(self, client):
+        """Drop a client's registration and any target only it was using"""
+        expiry = self.registrations.pop(client, None)
+        if expiry is None:
+            return {"client": client, "targets": []}
+        self.scheduler.cancel(expiry)
+        names = self._release_client(client)
+        self.logger.info(f"Client {client} unregistered")
+        return {"client": client, "targets": names}
+    
+    def _release_client(self, client, keep=()):
+        released = []
+        for target in list(self.targets):
+            if client in target.clients and target.name not in keep:
+                del target.clients[client]
+                released.append(target.name)
+                if not target.clients and not target.configured:
+                    self.remove_target(target)
+                else:
+                    self.apply_client_intervals(target)
+        return released
+    
+    def apply_client_intervals(self, target, own=None):
+        """Run target at the shortest of its own interval and its live clients'.
+
+        The strictest client wins so every device stays awake, but only for
+        as long as it is registered. own replaces the target's own interval
+        (from the config or ctl set-interval). Learned intervals are left
+        alone.
+        """
+        if target.adaptive is not None:
+            if own is not None:
+                self.change_interval([target], own)
+            return
+        if own is not None:
+            target.own_interval = own
+        elif target.own_interval is None:
+            target.own_interval = target.interval
+        wanted = list(target.clients.values())
+        if target.configured or not wanted:
+            wanted.append(target.own_interval)
+        interval = min(wanted)
+        if not target.clients:
+            target.own_interval = None
+        if interval != target.interval:
+            self.change_interval([target], interval)
+    
+    def control_status(self):
+        now = self.scheduler.clock.now()
+        devices = []
+        for target in self.targets:
+            stats = target.stats()
+            job = target.job
+            stats["next_keepalive_in"] = (job.deadline - now
+                                          if job is not None and not job.cancelled
+                                          else None)
+            devices.append(stats)
+        return {
+            "running": self.running,
+            "paused": self.paused,
+            "uptime": now - self.started_at if self.started_at is not None else None,
+            "backend": self.audio.backend.name if self.audio.backend else None,
+            "audio_available": self.audio.available,
+            "keepalives_emitted": self.activity.emitted,
+            "keepalives_suppressed": self.activity.suppressed,
+            "devices": devices,
+        }
+    
+    def control_set_interval(self, targets, value):
+        try:
+            interval = float(value)
+        except (TypeError, ValueError):
+            interval = 0
+        if interval <= 0:
+            raise ValueError(f"invalid interval: {value}")
+        
+        for target in targets:
+            self.apply_client_intervals(target, own=interval)
+        self.logger.info(f"Interval set to {interval:g}s for "
+                         f"{', '.join(target.name for target in targets)}")
+        return {"interval": interval, "targets": [target.name for target in targets]}
+    
+    def reload_config(self):
+        """Re-read the config file and persisted settings without restarting"""
+        changed = self.reload_config_file() if self.config is not None else []
+        self.load_adaptive_state()
+        if self.adaptive:
+            changed.append("adaptive_intervals")
+        return {"reloaded": changed}
+    
+    def apply_config(self, config):
+        """Apply a Config, live where possible; returns the changed setting names.
+
+        Intervals, targets, burst length, log level and the audio format and
+        backend are applied to the running daemon (the backend is reopened
+        if needed); RESTART_FIELDS wait for the next start.
+        """
+        previous = self.config
+        if previous is not None and config.backend != previous.backend:
+            problem = self.backend_problem(config)
+            if problem is not None:
+                self.logger.error(f"Keeping the {previous.backend} audio backend: {problem}")
+                config = Config(**dict(config.to_dict(), backend=previous.backend))
+        self.config = config
+        changed = config.changed_fields(previous)
+        
+        self.interval = config.interval
+        self.silence_duration = config.burst_ms / 1000
+        if "log_level" in changed:
+            self.log_level = config.log_level
+            if _log_pipeline is not None:
+                _log_pipeline.set_level(config.log_level)
+        if isinstance(self.scheduler.clock, Clock):
+            self.scheduler.clock.resume_poll = config.resume_poll or None
+        if "reload_interval" in changed and self.config_watch is not None:
+            self.scheduler.cancel(self.config_watch)
+            self.start_config_watch()
+        
+        if previous is None:
+            self.metrics_address = config.metrics
+            self.metrics_snapshot_interval = config.metrics_snapshot
+            self.track_bluetooth = config.bluetooth
+            self.memory_check_interval = config.memory_check
+            self.memory_ceiling = int(config.memory_ceiling * 2**20) or None
+            self.memory_trace = config.memory_trace
+        else:
+            pending = [name for name in changed if name in Config.RESTART_FIELDS]
+            if pending:
+                self.logger.warning(f"Config changes to {', '.join(pending)} "
+                                    "take effect after a restart")
+            if "interval" in changed or "targets" in changed:
+                self.reconcile_targets(config)
+        
+        if {"backend", "sample_rate", "channels", "buffer", "dither"} & set(changed):
+            if previous is not None and "backend" in changed:
+                self.audio.backend_spec = self.backend_name = config.backend
+            self.audio.sample_rate = self.sample_rate = config.sample_rate
+            self.audio.channels = self.channels = config.channels
+            self.audio.backend_options["buffer"] = config.buffer
+            self.audio.backend_options["dither"] = config.dither
+            if previous is not None and self.audio.backend is not None:
+                self.logger.info("Reopening audio backend with the new settings")
+                self.audio.reopen()
+        return changed
+    
+    @staticmethod
+    def backend_problem(config):
+        """Why config's backend cannot be used here, or None if it can"""
+        try:
+            backend = create_audio_backend(config.backend)
+        except (RuntimeError, ValueError) as e:
+            return str(e)
+        named_sinks = [target.sink for target in config.keepalive_targets() if target.sink]
+        if named_sinks and not backend.supports_sinks:
+            return f"backend '{backend.name}' cannot play to named sinks"
+        return None
+    
+    def reconcile_targets(self, config):
+        """Add, drop and re-time targets to match config, keeping their state.
+
+        Targets that registered clients still use are kept.
+        """
+        current = {target.name: target for target in self.targets}
+        for wanted in config.keepalive_targets():
+            target = current.pop(wanted.name, None)
+            if target is None:
+                self.add_target(wanted)
+                continue
+            target.configured = True
+            if target.adaptive is None:
+                self.apply_client_intervals(target, own=wanted.interval)
+        
+        for target in current.values():
+            if target.clients:
+                target.configured = False
+                self.apply_client_intervals(target)
+            else:
+                self.remove_target(target)
+    
+    def reload_config_file(self):
+        """Load the config file again and apply it; keep the old one if invalid"""
+        try:
+            config = Config.load(self.config_file, self.config_overrides)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Ignoring invalid config {self.config_file}: {e}")
+            return []
+        changed = self.apply_config(config)
+        if changed:
+            self.logger.info(f"Config reloaded; changed: {', '.join(changed)}")
+        return changed
+    
+    def _config_file_stamp(self):
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def check_config_file(self):
+        """Reload the config file if it changed since the last check"""
+        stamp = self._config_file_stamp()
+        if stamp != self.config_stamp:
+            self.config_stamp = stamp
+            self.reload_config_file()
+    
+    def start_config_watch(self):
+        """Poll the config file's mtime every reload_interval seconds (0 disables)"""
+        self.config_watch = None
+        if self.config is None or self.config_file is None:
+            return
+        self.config_stamp = self._config_file_stamp()
+        if self.config.reload_interval > 0:
+            self.config_watch = self.scheduler.call_every(
+                self.config.reload_interval, self.check_config_file,
+                first_delay=self.config.reload_interval, name="config-watch")
+    
+    def daemon_arguments(self):
+        """Command line used by the startup entries to relaunch this configuration.
+
+        With a config file, only command line overrides are repeated so that
+        later edits to the file still take effect.
+        """
+        def pinned(name):
+            return self.config is None or name in self.config_overrides
+        
+        arguments = ["--daemon"] + self._shared_arguments(pinned)
+        if pinned("interval") and self.interval != 300:
+            arguments += ["--interval", f"{self.interval:g}"]
+        if pinned("adaptive") and self.adaptive:
+            arguments.append("--adaptive")
+        if pinned("metrics") and self.metrics_address:
+            arguments += ["--metrics", f'"{self.metrics_address}"']
+        if pinned("metrics_snapshot") and self.metrics_snapshot_interval > 0:
+            arguments += ["--metrics-snapshot", f"{self.metrics_snapshot_interval:g}"]
+        if pinned("resume_poll") and self.config is not None and self.config.resume_poll:
+            arguments += ["--resume-poll", f"{self.config.resume_poll:g}"]
+        if pinned("memory_ceiling") and self.memory_ceiling:
+            arguments += ["--memory-ceiling", f"{self.memory_ceiling / 2**20:g}"]
+        if pinned("memory_trace") and self.memory_trace:
+            arguments.append("--memory-trace")
+        if not self.single_instance:
+            arguments.append("--standalone")
+        if not self.control_address:
+            arguments.append("--no-control")
+        elif self.control_address != default_control_address(self.get_app_data_dir()):
+            arguments += ["--control-socket", f'"{self.control_address}"']
+        return " ".join(arguments)
+    
+    def oneshot_arguments(self):
+        """Command line for the oneshot service started by the systemd timer.
+
+        The timer owns the interval, and nothing that needs a resident
+        process (adaptive learning, metrics, the control socket) applies.
+        """
+        def pinned(name):
+            return self.config is None or name in self.config_overrides
+        
+        return " ".join(["--oneshot"] + self._shared_arguments(pinned))
+    
+    def _shared_arguments(self, pinned):
+        """Relaunch arguments common to the daemon and oneshot command lines"""
+        arguments = []
+        default_config = default_config_path(self.get_app_data_dir())
+        if self.config_file is not None and Path(self.config_file) != default_config:
+            arguments += ["--config", f'"{self.config_file}"']
+        if pinned("backend") and self.backend_name != "auto":
+            arguments += ["--backend", self.backend_name]
+        if pinned("skip_when_active") and self.activity.probe is not None:
+            arguments.append("--skip-when-active")
+        if pinned("bluetooth") and self.track_bluetooth:
+            arguments.append("--bluetooth")
+        if pinned("log_level") and self.log_level != "INFO":
+            arguments += ["--log-level", self.log_level]
+        if pinned("targets"):
+            for target in self.targets:
+                if target.sink:
+                    arguments += ["--target", f'"{target.spec()}"']
+        return arguments
     
     def setup_windows_startup(self):
         """Configure auto-startup on Windows using Task Scheduler"""
         try:
-            import winreg
+            import subprocess
             
-            # Get current script path
-            script_path = os.path.abspath(__file__)
-            python_exe = sys.executable
+            command = program_command()
             
             # Create a batch file to run the script silently
             batch_content = f'''@echo off
-cd /d "{os.path.dirname(script_path)}"
-"{python_exe}" "{script_path}" --daemon > nul 2>&1
+cd /d "{os.path.dirname(command[-1])}"
+{" ".join(f'"{part}"' for part in command)} {self.daemon_arguments()} > nul 2>&1
 '''
             
             app_dir = self.get_app_data_dir()
@@ -157,21 +2469,25 @@ cd /d "{os.path.dirname(script_path)}"
             self.logger.error(f"Failed to setup Windows startup: {e}")
             return False
     
-    def setup_linux_startup(self):
-        """Configure auto-startup on Linux using systemd user service"""
-        try:
-            # Get current script path
-            script_path = os.path.abspath(__file__)
-            python_exe = sys.executable
-            
-            # Create systemd user service
-            service_content = f"""[Unit]
+    def systemd_units(self):
+        """Unit files written by setup_linux_startup(), by file name.
+
+        Normally a resident Type=notify service; with timer_mode, a oneshot
+        service that plays one keepalive and a timer that starts it every
+        interval, so nothing stays in memory between keepalives.
+        """
+        program = " ".join(program_command())
+        
+        if not self.timer_mode:
+            return {"alexa-silencer.service": f"""[Unit]
 Description=Alexa Silencer - Prevent Alexa Bluetooth disconnection
 After=graphical-session.target
 
 [Service]
-Type=simple
-ExecStart={python_exe} {script_path} --daemon
+Type=notify
+NotifyAccess=main
+ExecStart={program} {self.daemon_arguments()}
+WatchdogSec=60
 Restart=always
 RestartSec=10
 StandardOutput=null
@@ -179,22 +2495,59 @@ StandardError=null
 
 [Install]
 WantedBy=default.target
-"""
+"""}
+        
+        interval = min(target.interval for target in self.targets)
+        return {
+            "alexa-silencer.service": f"""[Unit]
+Description=Alexa Silencer - one keepalive burst
+
+[Service]
+Type=oneshot
+ExecStart={program} {self.oneshot_arguments()}
+TimeoutStartSec=30
+StandardOutput=null
+StandardError=null
+""",
+            "alexa-silencer.timer": f"""[Unit]
+Description=Alexa Silencer - Prevent Alexa Bluetooth disconnection
+
+[Timer]
+OnActiveSec=0
+OnUnitActiveSec={interval:g}s
+AccuracySec=1s
+
+[Install]
+WantedBy=timers.target
+""",
+        }
+    
+    def setup_linux_startup(self):
+        """Configure auto-startup on Linux using a systemd user service (or timer)"""
+        try:
+            import subprocess
             
-            # Create systemd user directory
             systemd_dir = Path.home() / ".config" / "systemd" / "user"
             systemd_dir.mkdir(parents=True, exist_ok=True)
             
-            service_file = systemd_dir / "alexa-silencer.service"
+            # Switching modes: stop whichever unit ran before (failures are expected)
+            for unit in ("alexa-silencer.timer", "alexa-silencer.service"):
+                subprocess.run(['systemctl', '--user', 'disable', '--now', unit],
+                               capture_output=True, text=True)
+            stale_timer = systemd_dir / "alexa-silencer.timer"
+            if not self.timer_mode and stale_timer.exists():
+                stale_timer.unlink()
             
-            with open(service_file, 'w') as f:
-                f.write(service_content)
+            for name, content in self.systemd_units().items():
+                with open(systemd_dir / name, 'w') as f:
+                    f.write(content)
             
-            # Enable and start the service
+            # Enable and start the service (or the timer that starts it)
+            unit = "alexa-silencer.timer" if self.timer_mode else "alexa-silencer.service"
             commands = [
                 ['systemctl', '--user', 'daemon-reload'],
-                ['systemctl', '--user', 'enable', 'alexa-silencer.service'],
-                ['systemctl', '--user', 'start', 'alexa-silencer.service']
+                ['systemctl', '--user', 'enable', unit],
+                ['systemctl', '--user', 'start', unit]
             ]
             
             for cmd in commands:
@@ -222,44 +2575,298 @@ WantedBy=default.target
             self.logger.warning(f"Unsupported OS for auto-startup: {self.os_type}")
             return False
     
-    def run_daemon(self):
-        """Run the main daemon loop"""
-        self.logger.info("Starting Alexa Silencer daemon")
+    def run_oneshot(self):
+        """Play one keepalive to every target, wait for it to finish and return.
+
+        Used by the systemd timer (and cron): nothing stays resident between
+        keepalives. Returns True if every burst played.
+        """
+        self.logger.info("Playing a single keepalive")
+        self.start_bluetooth(listen=False)
+        targets = [target for target in self.targets if target.connected is not False]
+        if not targets:
+            self.logger.info("No tracked device is connected; nothing to play")
+            self.cleanup()
+            return True
+        
+        if not self.initialize_audio():
+            self.logger.error("Failed to initialize audio system")
+            return False
+        
+        self.running = True
+        ok = True
+        try:
+            for target in targets:
+                playback = self.keepalive(target)
+                if playback is None:
+                    continue  # suppressed: the sink is already playing audio
+                self.scheduler.run(until=playback)
+                if not playback.done() or playback.exception() is not None:
+                    ok = False
+        finally:
+            self.cleanup()
+        return ok
+    
+    def run_daemon(self):
+        """Run the main daemon loop"""
+        self.logger.info("Starting Alexa Silencer daemon")
+        
+        if self.single_instance and not self.claim_instance():
+            self.logger.info("Another instance is running; registering with it")
+            if not self.run_as_client():
+                return
+        
+        if not self.initialize_audio():
+            self.logger.error("Failed to initialize audio system")
+            self.release_instance()
+            return
+        
+        self.start_bluetooth()
+        self.start_resume_watch()
+        self.check_adaptive_source()
+        self.start_keepalives()
+        self.start_config_watch()
+        self.start_metrics()
+        self.start_control()
+        self.start_memory_watchdog()
+        self.start_notify(f"Keeping {len(self.targets)} target(s) awake "
+                          f"through {self.audio.backend.name}")
+        
+        try:
+            # Sleeps until the next keepalive deadline or until stop() is called
+            self.scheduler.run()
+                    
+        except KeyboardInterrupt:
+            self.logger.info("Received interrupt signal")
+        except Exception as e:
+            self.logger.error(f"Daemon error: {e}")
+        finally:
+            self.cleanup()
+    
+    async def run_async(self):
+        """Run the daemon as a coroutine on the current asyncio event loop.
+
+        Keepalive ticks, playback completion checks, control requests and
+        metrics scrapes all run on the loop, so the silencer can share it
+        with other coroutines. SIGTERM/SIGINT stop it where the loop
+        supports signal handlers; cancelling the task also shuts it down
+        cleanly.
+        """
+        import asyncio
+        self.logger.info("Starting Alexa Silencer daemon (asyncio)")
+        
+        if self.single_instance and not self.claim_instance():
+            self.logger.error("Another instance is already running")
+            return
+        
+        if not self.initialize_audio():
+            self.logger.error("Failed to initialize audio system")
+            self.release_instance()
+            return
+        
+        loop = asyncio.get_running_loop()
+        handled_signals = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+                handled_signals.append(signum)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows loops, or not the main thread
+        
+        try:
+            self.start_bluetooth()
+            self.start_resume_watch()
+            self.check_adaptive_source()
+            self.start_keepalives()
+            self.start_config_watch()
+            await self.start_servers_async()
+            self.start_memory_watchdog()
+            self.start_notify(f"Keeping {len(self.targets)} target(s) awake "
+                              f"through {self.audio.backend.name}")
+            await self.scheduler.run_async()
+        except asyncio.CancelledError:
+            self.logger.info("Daemon task cancelled")
+            raise
+        except Exception as e:
+            self.logger.error(f"Daemon error: {e}")
+        finally:
+            for signum in handled_signals:
+                loop.remove_signal_handler(signum)
+            self.cleanup()
+    
+    async def start_servers_async(self):
+        """Start the metrics and control servers as asyncio servers"""
+        if self.metrics_address:
+            try:
+                self.metrics_server = AsyncMetricsServer(
+                    parse_listen_address(self.metrics_address), self.get_metrics)
+                await self.metrics_server.start()
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Failed to start metrics server: {e}")
+                self.metrics_server = None
+        self.schedule_metrics_snapshots()
+        
+        if self.control_address:
+            if _connection_family(self.control_address) == "AF_PIPE":
+                # asyncio has no public named pipe server; keep the threaded one
+                self.start_control()
+                return
+            try:
+                self.control_server = AsyncControlServer(self.control_address,
+                                                         self.control_reply)
+                await self.control_server.start()
+            except Exception as e:
+                self.logger.error(f"Failed to start control socket: {e}")
+                self.control_server = None
+    
+    def claim_instance(self):
+        """Make this the only daemon; return False if another one is already running.
+
+        With an instance_address, binding that socket is the lock and other
+        invocations register with this daemon through it; otherwise a lock
+        file in the app data dir allows one daemon per user.
+        """
+        if self.instance_address:
+            server = ControlServer(self.instance_address, self.handle_shared_request,
+                                   identify_peer=True)
+            try:
+                server.start()
+            except (OSError, RuntimeError):
+                return False
+            self.instance_server = server
+            return True
+        
+        lock = InstanceLock(self.get_app_data_dir() / "alexa_silencer.lock")
+        if not lock.acquire():
+            return False
+        self.instance_lock = lock
+        return True
+    
+    def release_instance(self):
+        if self.instance_server is not None:
+            self.instance_server.stop()
+            self.instance_server = None
+        if self.instance_lock is not None:
+            self.instance_lock.release()
+            self.instance_lock = None
+    
+    def run_as_client(self):
+        """Register our targets with the running daemon instead of opening a mixer.
+
+        The registration is renewed well inside its lease until stop(), then
+        withdrawn; if the daemon restarts, the next renewal registers again.
+        If the daemon has gone away and the instance can be claimed, or the
+        instance socket belongs to a user other than root or ours, return
+        True: the caller then runs the daemon itself.
+        """
+        address = self.instance_address or self.control_address
+        if not address:
+            self.logger.error("No address to reach the running daemon")
+            return False
+        import getpass
+        client = f"{getpass.getuser()}:{os.getpid()}"
+        targets = [[target.sink, target.interval] for target in self.targets]
+        trusted = self.trusted_daemon_uids
+        if trusted is None and hasattr(os, "getuid"):
+            trusted = {0, os.getuid()}  # no uids on Windows, where peers are not identified
+        own_daemon = []  # set when this process should run the daemon itself
         
-        if not self.initialize_pygame():
-            self.logger.error("Failed to initialize audio system")
-            return
+        def renew():
+            try:
+                response = send_control_command(
+                    {"command": "register", "client": client, "targets": targets},
+                    address, trusted_uids=trusted)
+            except PermissionError as e:
+                self.logger.error(f"Refusing to register: {e}; running standalone")
+                own_daemon.append(False)
+                self.scheduler.stop()
+                return
+            except (OSError, EOFError, TimeoutError) as e:
+                if self.claim_instance():
+                    self.logger.warning(f"The running daemon is gone ({e}); taking over")
+                    own_daemon.append(True)
+                    self.scheduler.stop()
+                    return
+                self.logger.error(f"Cannot reach the running daemon: {e}")
+                failing()
+                return
+            if not response.get("ok"):
+                self.logger.error(f"Registration refused: {response.get('error')}")
+                failing()
+                return
+            self.failing_since = None
+            if not registered:
+                registered.append(client)
+                self.start_notify("Registered with the running daemon")
         
-        self.running = True
+        def failing():
+            # Heartbeats stop after watchdog_grace, so systemd restarts a stuck client
+            if self.failing_since is None:
+                self.failing_since = self.scheduler.clock.now()
         
+        registered = []  # READY=1 waits for the first successful registration
+        self.running = True
+        job = self.scheduler.call_every(REGISTRATION_LEASE / 3, renew, name="register")
         try:
-            while self.running:
-                self.play_silent_audio()
-                
-                # Sleep for the interval (5 minutes)
-                for _ in range(self.interval):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-                    
-        except KeyboardInterrupt:
-            self.logger.info("Received interrupt signal")
-        except Exception as e:
-            self.logger.error(f"Daemon error: {e}")
+            self.scheduler.run()
         finally:
-            self.cleanup()
+            self.running = False
+            self.scheduler.cancel(job)
+            if not own_daemon:
+                try:
+                    send_control_command({"command": "unregister", "client": client},
+                                         address, trusted_uids=trusted)
+                except (OSError, EOFError, TimeoutError):
+                    pass
+                self.logger.info("Client registration withdrawn")
+        if not own_daemon:
+            return False
+        if self.watchdog_job is not None:
+            self.scheduler.cancel(self.watchdog_job)  # run_daemon starts its own
+            self.watchdog_job = None
+        self.failing_since = None
+        self.scheduler.reset()
+        return True
+    
+    def stop(self):
+        """Stop a session started with start(), or ask the daemon loop to return.
+
+        The daemon loop releases its resources itself through cleanup(),
+        so stopping it only sets flags and wakes the scheduler, which other
+        threads and signal handlers can do. Stopping a started session
+        joins its thread, so do that from a thread instead.
+        """
+        if self._thread is not None:
+            super().stop()
+            return
+        self.running = False
+        self.scheduler.stop()
     
     def cleanup(self):
         """Clean up resources"""
         self.running = False
+        self.notifier.stopping()
         
         try:
-            pygame.mixer.quit()
-            
-            # Clean up temporary files
-            if hasattr(self, 'temp_dir') and self.temp_dir.exists():
-                import shutil
-                shutil.rmtree(self.temp_dir, ignore_errors=True)
+            if self.bluetooth_watcher is not None:
+                self.bluetooth_watcher.stop()
+                self.bluetooth_watcher = None
+            if self.resume_watcher is not None:
+                self.resume_watcher.stop()
+                self.resume_watcher = None
+            if self.memory_watchdog is not None:
+                self.memory_watchdog.stop()
+            self.audio.close()
+            self.save_adaptive_state()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+                self.metrics_server = None
+            if self.control_server is not None:
+                self.control_server.stop()
+                self.control_server = None
+            self.release_instance()
+            if self.metrics_snapshot_interval > 0:
+                self.write_metrics_snapshot()
                 
         except Exception as e:
             self.logger.error(f"Cleanup error: {e}")
@@ -270,10 +2877,17 @@ WantedBy=default.target
         """One-time setup and run"""
         self.logger.info("Alexa Silencer setup started")
         
+        if self.timer_mode and self.os_type != "linux":
+            self.logger.warning("Timer mode needs systemd; installing the resident daemon")
+            self.timer_mode = False
+        
         # Setup auto-startup
         if self.setup_startup():
             self.logger.info("Auto-startup configured successfully")
             print("Alexa Silencer has been configured to run automatically on startup.")
+            if self.timer_mode:
+                print("A systemd timer now plays each keepalive; nothing stays running in between.")
+                return
             print("The application is now running in the background.")
         else:
             self.logger.error("Failed to configure auto-startup")
@@ -283,6 +2897,1090 @@ WantedBy=default.target
         self.run_daemon()
 
 
+class RepeatFilter(logging.Filter):
+    """Collapses identical log lines: each distinct message is written at most
+    once per window seconds, followed by a count of what was dropped.
+
+    Attached to the file handler, so it runs on the logging listener thread.
+    """
+
+    MAX_TRACKED = 256
+
+    def __init__(self, handler, window=3600):
+        super().__init__()
+        self.handler = handler
+        self.window = window
+        self._seen = {}  # (level, message) -> [first written at, repeats dropped]
+
+    def filter(self, record):
+        key = (record.levelno, record.getMessage())
+        entry = self._seen.get(key)
+        if entry is not None and record.created - entry[0] < self.window:
+            entry[1] += 1
+            return False
+
+        if entry is not None and entry[1]:
+            self._emit_summary(record, key, entry)
+        if len(self._seen) >= self.MAX_TRACKED:
+            self.flush(record.created)
+        self._seen[key] = [record.created, 0]
+        return True
+
+    def _emit_summary(self, record, key, entry):
+        summary = logging.makeLogRecord({
+            "name": record.name, "levelno": key[0],
+            "levelname": logging.getLevelName(key[0]), "created": record.created,
+            "msg": "Previous message repeated %d more times in %.0fs: %s",
+            "args": (entry[1], record.created - entry[0], key[1]),
+        })
+        self.handler.emit(summary)
+
+    def flush(self, now=None):
+        """Write pending repeat counts and forget old messages"""
+        now = time.time() if now is None else now
+        for key, entry in list(self._seen.items()):
+            if entry[1]:
+                record = logging.makeLogRecord({"created": now})
+                self._emit_summary(record, key, entry)
+            del self._seen[key]
+
+
+def _compress_rotated_log(source, destination):
+    """Rotator for the log handlers: gzip the rotated file"""
+    import gzip
+    import shutil
+    with open(source, "rb") as plain, gzip.open(destination, "wb") as compressed:
+        shutil.copyfileobj(plain, compressed)
+    os.remove(source)
+
+
+class LogPipeline:
+    """Asynchronous file logging.
+
+    Loggers only enqueue records through a QueueHandler; a QueueListener
+    thread drops repeats, writes, rotates (by size, or by time if
+    rotate_when is set) and gzips rotated files, so the keepalive thread
+    never waits on disk I/O.
+    """
+
+    FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+    def __init__(self, log_file, level=logging.INFO, max_bytes=1024 * 1024,
+                 backup_count=5, rotate_when=None, repeat_window=3600):
+        self.log_file = Path(log_file)
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_when = rotate_when
+        self.repeat_window = repeat_window
+        self.logger = None
+        self.queue_handler = None
+        self.file_handler = None
+        self.listener = None
+
+    def install(self, logger=None):
+        """Route logger (default: root) through the pipeline and start the listener"""
+        import queue
+        from logging import handlers
+
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        if self.rotate_when:
+            self.file_handler = handlers.TimedRotatingFileHandler(
+                self.log_file, when=self.rotate_when, backupCount=self.backup_count)
+        else:
+            self.file_handler = handlers.RotatingFileHandler(
+                self.log_file, maxBytes=self.max_bytes, backupCount=self.backup_count)
+        self.file_handler.namer = lambda name: name + ".gz"
+        self.file_handler.rotator = _compress_rotated_log
+        self.file_handler.setFormatter(logging.Formatter(self.FORMAT))
+        self.repeat_filter = RepeatFilter(self.file_handler, self.repeat_window)
+        self.file_handler.addFilter(self.repeat_filter)
+
+        log_queue = queue.Queue()
+        self.queue_handler = handlers.QueueHandler(log_queue)
+        self.listener = handlers.QueueListener(log_queue, self.file_handler)
+
+        self.logger = logger if logger is not None else logging.getLogger()
+        self.logger.addHandler(self.queue_handler)
+        self.set_level(self.level)
+        self.listener.start()
+
+        import atexit
+        atexit.register(self.stop)
+        return self
+
+    def set_level(self, level):
+        self.level = level
+        if self.logger is not None:
+            self.logger.setLevel(level)
+
+    def stop(self):
+        """Drain the queue, flush repeat counts and close the log file"""
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.logger.removeHandler(self.queue_handler)
+        self.repeat_filter.flush()
+        self.file_handler.close()
+        self.listener = None
+
+
+# Process-wide pipeline installed by the first AlexaSilencer
+_log_pipeline = None
+
+# Library use: stay quiet unless the host application configures logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are allocated once so observe() does not allocate"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return (upper bound, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {
+            "buckets": {("+Inf" if bound == float("inf") else f"{bound:g}"): count
+                        for bound, count in self.cumulative()},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Metrics:
+    """Keepalive instrumentation kept by the daemon"""
+
+    # Seconds; covers sub-millisecond scheduling lag up to a wedged backend
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        self.tick_lag = Histogram(self.LATENCY_BUCKETS)
+        self.playback_latency = Histogram(self.LATENCY_BUCKETS)
+        self.failures = {}  # exception class name -> count
+
+    def record_playback(self, future):
+        """Done callback for play_silent_audio() Futures"""
+        error = future.exception()
+        if error is None:
+            self.playback_latency.observe(future.result())
+        else:
+            cause = type(error).__name__
+            self.failures[cause] = self.failures.get(cause, 0) + 1
+
+
+def process_resources():
+    """Return (CPU seconds, resident set size in bytes or None) for this process"""
+    cpu_seconds = time.process_time()
+    try:
+        with open("/proc/self/statm") as f:
+            return cpu_seconds, int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        return cpu_seconds, peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return cpu_seconds, None
+
+
+class MemoryWatchdog:
+    """Samples resident memory at a low rate and acts when it passes a ceiling.
+
+    Each sample also counts the blocks Python has allocated, after a garbage
+    collection, which tells a Python leak apart from growth in native
+    libraries such as SDL. With trace, a tracemalloc snapshot is taken at
+    every sample and the top growth sites since the previous one are logged,
+    so a slow leak shows up in the log long before the ceiling. Above
+    ceiling bytes, on_ceiling(rss) is called once.
+    """
+
+    def __init__(self, scheduler, interval=600, ceiling=None, trace=False, top=5,
+                 on_ceiling=None, rss=None):
+        self.scheduler = scheduler
+        self.interval = interval
+        self.ceiling = ceiling
+        self.trace = trace
+        self.top = top
+        self.on_ceiling = on_ceiling
+        self.rss = rss or (lambda: process_resources()[1])
+        self.logger = logging.getLogger(__name__)
+        self.job = None
+        self.samples = 0
+        self.baseline = self.current = self.peak = None  # RSS in bytes
+        self.blocks_baseline = self.blocks = None  # Python allocated blocks
+        self.traced_baseline = self.traced = None  # bytes held by Python allocations
+        self.tripped = False
+        self._snapshot = None
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._snapshot = self.take_snapshot()
+            self.traced_baseline = self.traced
+        self.blocks_baseline = self.count_blocks()
+        self.baseline = self.current = self.peak = self.rss()
+        self.job = self.scheduler.call_every(self.interval, self.sample,
+                                             first_delay=self.interval,
+                                             name="memory-watchdog")
+
+    def stop(self):
+        if self.job is not None:
+            self.scheduler.cancel(self.job)
+            self.job = None
+        self._snapshot = None
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def count_blocks(self):
+        # Uncollected reference cycles would otherwise show up as growth
+        import gc
+        gc.collect()
+        self.blocks = sys.getallocatedblocks()
+        return self.blocks
+
+    def take_snapshot(self):
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        self.traced = sum(trace.size for trace in snapshot.traces)
+        return snapshot
+
+    def sample(self):
+        self.samples += 1
+        self.count_blocks()
+        if self._snapshot is not None:
+            self.log_growth()
+        rss = self.rss()
+        if rss is None:
+            return
+        self.current = rss
+        self.peak = max(self.peak or 0, rss)
+        if self.ceiling and rss > self.ceiling and not self.tripped:
+            self.tripped = True
+            self.logger.error(f"Resident memory {rss / 2**20:.1f} MiB is above the "
+                              f"{self.ceiling / 2**20:.0f} MiB ceiling")
+            if self.on_ceiling is not None:
+                self.on_ceiling(rss)
+
+    def log_growth(self):
+        """Log the allocation sites that grew most since the previous sample"""
+        snapshot = self.take_snapshot()
+        growth = [stat for stat in snapshot.compare_to(self._snapshot, "lineno")
+                  if stat.size_diff > 0][:self.top]
+        self._snapshot = snapshot
+        if growth:
+            self.logger.info("Top memory growth since the last sample:\n"
+                             + "\n".join(f"  {stat}" for stat in growth))
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "baseline_bytes": self.baseline,
+            "current_bytes": self.current,
+            "peak_bytes": self.peak,
+            "ceiling_bytes": self.ceiling,
+            "allocated_blocks": self.blocks,
+            "allocated_blocks_growth": self.blocks - self.blocks_baseline,
+            "traced_bytes": self.traced,
+            "traced_growth_bytes": (self.traced - self.traced_baseline
+                                    if self.traced is not None else None),
+        }
+
+
+def program_command():
+    """Command that starts this program: the interpreter and this script, or
+    just the executable of a frozen build (which rejects a script argument)"""
+    if getattr(sys, "frozen", False):
+        return [sys.executable]
+    return [sys.executable, os.path.abspath(__file__)]
+
+
+def restart_process():
+    """Replace this process with a fresh daemon started with the same arguments"""
+    if _log_pipeline is not None:
+        _log_pipeline.stop()
+    # A frozen executable is its own interpreter; argv[0] is the executable
+    arguments = sys.argv[1:] if getattr(sys, "frozen", False) else sys.argv[:]
+    if "--daemon" not in arguments:
+        arguments.append("--daemon")  # setup already ran
+    os.execv(sys.executable, [sys.executable] + arguments)
+
+
+def render_prometheus(metrics):
+    """Render a get_metrics() dict in the Prometheus text exposition format"""
+    lines = []
+
+    def number(value):
+        return str(value) if isinstance(value, int) else repr(float(value))
+
+    def header(name, kind, help_text):
+        lines.append(f"# HELP alexa_silencer_{name} {help_text}")
+        lines.append(f"# TYPE alexa_silencer_{name} {kind}")
+
+    def escape(label):
+        return str(label).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def metric(name, kind, help_text, samples):
+        header(name, kind, help_text)
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{escape(label)}"' for key, label in labels)
+            label_text = "{" + label_text + "}" if label_text else ""
+            lines.append(f"alexa_silencer_{name}{label_text} {number(value)}")
+
+    def histogram(name, help_text, data):
+        header(name, "histogram", help_text)
+        for bound, count in data["buckets"].items():
+            lines.append(f'alexa_silencer_{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f"alexa_silencer_{name}_sum {number(data['sum'])}")
+        lines.append(f"alexa_silencer_{name}_count {data['count']}")
+
+    histogram("tick_lag_seconds", "Delay between a keepalive deadline and its tick",
+              metrics["tick_lag_seconds"])
+    histogram("playback_latency_seconds", "Time from play() to burst completion",
+              metrics["playback_latency_seconds"])
+    metric("keepalives_total", "counter", "Keepalive ticks by outcome",
+           [((("result", "emitted"),), metrics["keepalives_emitted"]),
+            ((("result", "suppressed"),), metrics["keepalives_suppressed"])])
+    metric("failures_total", "counter", "Failed bursts by cause",
+           [((("cause", cause),), count) for cause, count in metrics["failures"].items()])
+    metric("mixer_reinits_total", "counter", "Audio backend reopen attempts after device loss",
+           [((), metrics["mixer_reinits"])])
+    metric("mixer_recoveries_total", "counter", "Successful audio device recoveries",
+           [((), metrics["mixer_recoveries"])])
+    metric("scheduler_wakeups_total", "counter", "Scheduler wakeups",
+           [((), metrics["scheduler_wakeups"])])
+    metric("ticks_late_total", "counter", "Scheduled runs that started late",
+           [((), metrics["ticks_late"])])
+    metric("ticks_missed_total", "counter", "Periodic deadlines coalesced into a later run",
+           [((), metrics["ticks_missed"])])
+    metric("resumes_total", "counter", "Resumes from suspend",
+           [((), metrics["resumes"])])
+    metric("cpu_seconds_total", "counter", "CPU time used by the process",
+           [((), metrics["cpu_seconds"])])
+    if metrics["resident_memory_bytes"] is not None:
+        metric("resident_memory_bytes", "gauge", "Resident set size of the process",
+               [((), metrics["resident_memory_bytes"])])
+    memory = metrics.get("memory")
+    if memory and memory["peak_bytes"] is not None:
+        metric("resident_memory_peak_bytes", "gauge",
+               "Highest resident set size seen by the memory watchdog",
+               [((), memory["peak_bytes"])])
+    if memory and memory["traced_bytes"] is not None:
+        metric("traced_memory_bytes", "gauge",
+               "Python allocations at the last tracemalloc sample",
+               [((), memory["traced_bytes"])])
+    metric("device_keepalives_total", "counter", "Bursts per device by outcome",
+           [((("device", device["name"]), ("result", result)), device[result])
+            for device in metrics["devices"] for result in ("successes", "failures")])
+    return "\n".join(lines) + "\n"
+
+
+def parse_listen_address(address):
+    """Parse "PORT", "HOST:PORT" or a Unix socket path into a socket address"""
+    if os.sep in address or address.startswith("@"):
+        return address
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def metrics_document(path, collect):
+    """Return (content type, body) for a metrics URL path, or (None, None)"""
+    if path == "/metrics":
+        return "text/plain; version=0.0.4", render_prometheus(collect()).encode()
+    if path == "/metrics.json":
+        return "application/json", json.dumps(collect()).encode()
+    return None, None
+
+
+def _unix_address(address):
+    """Socket path for a metrics address; a leading @ selects the Linux abstract namespace"""
+    return "\0" + address[1:] if address.startswith("@") else address
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /metrics.json over local HTTP or a Unix socket.
+
+    Requests are handled on a background thread that blocks in accept()
+    between scrapes, so an idle server costs no wakeups.
+    """
+
+    def __init__(self, address, collect):
+        self.address = address
+        self.collect = collect  # returns a get_metrics() dict
+        self.logger = logging.getLogger(__name__)
+        self.server = None
+        self.thread = None
+        self._stopping = False
+
+    def start(self):
+        import socketserver
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+
+        collect = self.collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                content_type, body = metrics_document(self.path, collect)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def address_string(self):
+                return "local"
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the log
+
+        if isinstance(self.address, str):
+            if not self.address.startswith("@") and os.path.exists(self.address):
+                os.unlink(self.address)
+            self.server = socketserver.UnixStreamServer(_unix_address(self.address), Handler)
+        else:
+            self.server = HTTPServer(self.address, Handler)
+            self.address = self.server.server_address  # resolves port 0
+
+        self.thread = threading.Thread(target=self._serve, name="metrics", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Serving metrics on {self.address}")
+
+    def _serve(self):
+        while not self._stopping:
+            try:
+                self.server.handle_request()
+            except Exception as e:
+                if not self._stopping:
+                    self.logger.error(f"Metrics request failed: {e}")
+
+    def stop(self):
+        if self.server is None:
+            return
+        self._stopping = True
+        # Connect once to unblock handle_request()
+        import socket
+        try:
+            family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+            with socket.socket(family, socket.SOCK_STREAM) as wake:
+                wake.settimeout(1)
+                wake.connect(self.server.server_address)
+        except OSError:
+            pass
+        self.thread.join(timeout=2)
+        self.server.server_close()
+        if isinstance(self.address, str) and not self.address.startswith("@"):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        self.server = None
+
+
+CONTROL_COMMANDS = ("status", "pause", "resume", "ping-now", "set-interval",
+                    "reload-config", "register", "unregister")
+# The only commands other users may send over the machine-wide instance socket
+SHARED_COMMANDS = ("status", "register", "unregister")
+REGISTRATION_LEASE = 900  # seconds a client registration lasts unless renewed
+MAX_CLIENTS = 64
+MIN_CLIENT_INTERVAL = 10  # seconds; the shortest keepalive interval a client may ask for
+MAX_CLIENT_TARGETS = 16
+
+
+def default_app_data_dir(os_type=None):
+    """Get appropriate application data directory for the OS"""
+    os_type = os_type or platform.system().lower()
+    if os_type == "windows":
+        app_data = os.getenv('APPDATA', os.path.expanduser('~'))
+        return Path(app_data) / "AlexaSilencer"
+    else:  # Linux and other Unix-like systems
+        return Path.home() / ".alexa_silencer"
+
+
+def _number_setting(minimum, maximum=None, kind=float, allow_minimum=True):
+    """Converter for a numeric setting within [minimum, maximum]"""
+    def convert(value):
+        if isinstance(value, bool):
+            raise ValueError("expected a number")
+        number = kind(value)
+        if not math.isfinite(number):
+            raise ValueError("must be a finite number")
+        if number < minimum or (number == minimum and not allow_minimum):
+            raise ValueError(f"must be {'at least' if allow_minimum else 'above'} {minimum}")
+        if maximum is not None and number > maximum:
+            raise ValueError(f"must be at most {maximum}")
+        return number
+    return convert
+
+
+def _is_printable_name(value, limit=256):
+    """True for a non-empty str without control characters, as sink and client names must be"""
+    return isinstance(value, str) and 0 < len(value) <= limit and value.isprintable()
+
+
+def _choice_setting(choices, normalize=str):
+    def convert(value):
+        value = normalize(value)
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(choices)}")
+        return value
+    return convert
+
+
+def _flag_setting(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError("expected true or false")
+
+
+def _optional_text_setting(value):
+    return str(value) if value not in (None, "") else None
+
+
+def _targets_setting(value):
+    """A list of "SINK[@SECONDS]" strings, or one comma-separated string"""
+    if isinstance(value, str):
+        value = [spec.strip() for spec in value.split(",") if spec.strip()]
+    specs = [str(spec) for spec in value]
+    for spec in specs:
+        KeepaliveTarget.parse(spec, 1)  # validates, raises ValueError
+    return specs
+
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+class Config:
+    """Validated daemon settings.
+
+    Built from defaults, then the config file, then ALEXA_SILENCER_*
+    environment variables, then command line flags; later sources win.
+    An invalid value rejects the whole configuration with ValueError, so a
+    bad edit is never half-applied.
+    """
+
+    # name -> (converter, default)
+    FIELDS = {
+        "interval": (_number_setting(1), 300.0),
+        "targets": (_targets_setting, []),
+        "backend": (_choice_setting(("auto",) + tuple(AUDIO_BACKENDS)), "auto"),
+        "sample_rate": (_number_setting(8000, 192000, int), 22050),
+        "channels": (_number_setting(1, 2, int), 1),
+        "buffer": (_number_setting(64, 65536, int), 512),
+        "burst_ms": (_number_setting(0, 1000, allow_minimum=False), 10.0),
+        "dither": (_number_setting(0, 64, int), 0),
+        "log_file": (_optional_text_setting, None),
+        "log_level": (_choice_setting(LOG_LEVELS, lambda value: str(value).upper()), "INFO"),
+        "adaptive": (_flag_setting, False),
+        "skip_when_active": (_flag_setting, False),
+        "metrics": (_optional_text_setting, None),
+        "metrics_snapshot": (_number_setting(0), 0.0),
+        "reload_interval": (_number_setting(0), 30.0),
+        "bluetooth": (_flag_setting, False),
+        "resume_poll": (_number_setting(0), 0.0),  # seconds; 0 waits until the next deadline
+        "memory_check": (_number_setting(0), 600.0),
+        "memory_ceiling": (_number_setting(0), 0.0),  # MiB; 0 disables
+        "memory_trace": (_flag_setting, False),
+    }
+    # Picked up on the next start rather than applied to a running daemon
+    RESTART_FIELDS = ("log_file", "adaptive", "skip_when_active", "metrics",
+                      "metrics_snapshot", "bluetooth", "memory_check",
+                      "memory_ceiling", "memory_trace")
+    ENV_PREFIX = "ALEXA_SILENCER_"
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"unknown setting: {name}")
+        for name, (convert, default) in self.FIELDS.items():
+            value = values.get(name, default)
+            try:
+                value = convert(value) if value is not None else None
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"invalid {name} {value!r}: {e}")
+            setattr(self, name, value)
+
+    @classmethod
+    def load(cls, path=None, overrides=None, environ=None):
+        """Merge the config file at path (if it exists), the environment and overrides"""
+        values = read_config_file(path) if path is not None and Path(path).exists() else {}
+        values.update(cls.from_environment(os.environ if environ is None else environ))
+        values.update(overrides or {})
+        return cls(**values)
+
+    @classmethod
+    def from_environment(cls, environ):
+        values = {}
+        for name in cls.FIELDS:
+            key = cls.ENV_PREFIX + name.upper()
+            if key in environ:
+                values[name] = environ[key]
+        return values
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def changed_fields(self, other):
+        """Names whose values differ from other (all of them if other is None)"""
+        if other is None:
+            return list(self.FIELDS)
+        return [name for name in self.FIELDS if getattr(self, name) != getattr(other, name)]
+
+    def keepalive_targets(self):
+        """KeepaliveTargets for the configured sinks, or the default output"""
+        if not self.targets:
+            return [KeepaliveTarget(interval=self.interval)]
+        return [KeepaliveTarget.parse(spec, self.interval) for spec in self.targets]
+
+
+def read_config_file(path):
+    """Read a flat TOML (.toml) or JSON config file into a dict"""
+    path = Path(path)
+    if path.suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError(f"reading {path.name} needs Python 3.11 or tomli; "
+                                 "use config.json instead")
+        with open(path, "rb") as f:
+            values = tomllib.load(f)
+    else:
+        with open(path) as f:
+            values = json.load(f)
+    if not isinstance(values, dict):
+        raise ValueError(f"{path.name} must contain a table of settings")
+    return values
+
+
+def default_config_path(app_dir=None):
+    """config.toml in the app data dir, or config.json if only that exists"""
+    app_dir = Path(app_dir or default_app_data_dir())
+    json_path = app_dir / "config.json"
+    toml_path = app_dir / "config.toml"
+    if json_path.exists() and not toml_path.exists():
+        return json_path
+    return toml_path
+
+
+def default_control_address(app_dir=None):
+    """Unix socket in the app data dir, or a per-user named pipe on Windows"""
+    if platform.system().lower() == "windows":
+        user = os.getenv("USERNAME", "user")
+        return f"\\\\.\\pipe\\AlexaSilencer-{user}"
+    return str(Path(app_dir or default_app_data_dir()) / "control.sock")
+
+
+def _connection_family(address):
+    return "AF_PIPE" if address.startswith("\\\\.\\pipe\\") else "AF_UNIX"
+
+
+def send_control_command(request, address=None, timeout=5, trusted_uids=None):
+    """Send one JSON request to a running daemon and return its JSON response.
+
+    With trusted_uids, raise PermissionError before sending anything if the
+    process listening on a Unix socket runs as another uid.
+    """
+    from multiprocessing.connection import Client
+    address = address or default_control_address()
+    with Client(_unix_address(address), _connection_family(address)) as connection:
+        if trusted_uids is not None:
+            uid = _peer_uid(connection)
+            if uid is not None and uid not in trusted_uids:
+                raise PermissionError(f"{address} is held by uid {uid}, not a trusted daemon")
+        connection.send_bytes(json.dumps(request).encode())
+        if not connection.poll(timeout):
+            raise TimeoutError(f"no response from the daemon within {timeout}s")
+        return json.loads(connection.recv_bytes().decode())
+
+
+def default_instance_address():
+    """Machine-wide rendezvous for the shared daemon: a Linux abstract socket.
+
+    Binding it is atomic and the kernel releases it when the daemon exits,
+    so it doubles as the single-instance lock for every user on the
+    machine. Other systems fall back to a per-user lock file (None here).
+    """
+    return "@alexa-silencer" if sys.platform.startswith("linux") else None
+
+
+class InstanceLock:
+    """Exclusive, non-blocking lock on a file, released by the OS if the process dies"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.handle = None
+
+    def acquire(self):
+        """Take the lock and record our PID; return False if another process holds it"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self.handle = handle
+        return True
+
+    def release(self):
+        if self.handle is not None:
+            self.handle.close()  # closing drops the lock
+            self.handle = None
+
+
+class SystemdNotifier:
+    """sd_notify(3) over the datagram socket in $NOTIFY_SOCKET, without libsystemd.
+
+    Does nothing unless systemd started us with Type=notify. The watchdog is
+    enabled when $WATCHDOG_USEC is set (and $WATCHDOG_PID, if present, is
+    our PID).
+    """
+
+    def __init__(self, environ=None):
+        environ = os.environ if environ is None else environ
+        self.logger = logging.getLogger(__name__)
+        self.address = environ.get("NOTIFY_SOCKET") or None
+        self.watchdog_interval = None  # seconds; heartbeat at least twice as often
+        pid = environ.get("WATCHDOG_PID")
+        usec = environ.get("WATCHDOG_USEC")
+        if usec and (not pid or pid == str(os.getpid())):
+            try:
+                self.watchdog_interval = int(usec) / 1e6
+            except ValueError:
+                pass
+
+    @property
+    def enabled(self):
+        return self.address is not None
+
+    def notify(self, *assignments):
+        """Send VARIABLE=value lines in one datagram; return True if delivered"""
+        if self.address is None:
+            return False
+        import socket
+        address = self.address
+        if address.startswith("@"):
+            address = "\0" + address[1:]  # abstract namespace
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.setblocking(False)  # a stuck manager must not stall the daemon
+                sock.connect(address)
+                sock.sendall("\n".join(assignments).encode())
+            return True
+        except (OSError, AttributeError) as e:  # AttributeError: no AF_UNIX
+            self.logger.debug(f"sd_notify failed: {e}")
+            return False
+
+    def ready(self, status=None):
+        return self.notify("READY=1", *([f"STATUS={status}"] if status else []))
+
+    def status(self, status):
+        return self.notify(f"STATUS={status}")
+
+    def watchdog(self):
+        return self.notify("WATCHDOG=1")
+
+    def stopping(self):
+        return self.notify("STOPPING=1")
+
+
+def _claim_control_socket(address):
+    """Remove a stale socket file, or raise RuntimeError if a daemon still answers on it"""
+    if not os.path.exists(address):
+        return
+    try:
+        send_control_command({"command": "status"}, address, timeout=1)
+    except (OSError, EOFError, TimeoutError, ValueError):
+        os.unlink(address)  # left behind by a daemon that died
+    else:
+        raise RuntimeError(f"another daemon is listening on {address}")
+
+
+class ControlServer:
+    """Local control plane: a Unix domain socket, or a named pipe on Windows.
+
+    Each connection carries one JSON request and receives one JSON reply.
+    handle(request) runs on the server thread, which blocks in accept()
+    between requests. With identify_peer, it is called as handle(request,
+    uid) with the connecting process's uid (None where the OS cannot tell).
+    """
+
+    def __init__(self, address, handle, identify_peer=False):
+        self.address = address
+        self.handle = handle
+        self.identify_peer = identify_peer
+        self.logger = logging.getLogger(__name__)
+        self.listener = None
+        self.thread = None
+        self._stopping = False
+
+    def start(self):
+        """Bind the socket; raise RuntimeError if another daemon already owns it"""
+        from multiprocessing.connection import Listener
+        family = _connection_family(self.address)
+        # Abstract (@name) sockets vanish with their owner and have no file mode
+        on_disk = family == "AF_UNIX" and not self.address.startswith("@")
+        if on_disk:
+            _claim_control_socket(self.address)
+
+        self.listener = Listener(_unix_address(self.address), family)
+        if on_disk:
+            os.chmod(self.address, 0o600)
+
+        self.thread = threading.Thread(target=self._serve, name="control", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Control socket listening on {self.address}")
+
+    def _serve(self):
+        while not self._stopping:
+            try:
+                connection = self.listener.accept()
+            except OSError as e:
+                if not self._stopping:
+                    self.logger.error(f"Control socket accept failed: {e}")
+                continue
+
+            with connection:
+                if self._stopping:
+                    break
+                try:
+                    if not connection.poll(5):
+                        continue
+                    request = json.loads(connection.recv_bytes(65536).decode())
+                    if self.identify_peer:
+                        response = self.handle(request, _peer_uid(connection))
+                    else:
+                        response = self.handle(request)
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                try:
+                    connection.send_bytes(json.dumps(response).encode())
+                except OSError:
+                    pass
+
+    def stop(self):
+        if self.listener is None:
+            return
+        self._stopping = True
+        # Connect once to unblock accept()
+        from multiprocessing.connection import Client
+        try:
+            Client(_unix_address(self.address), _connection_family(self.address)).close()
+        except OSError:
+            pass
+        self.thread.join(timeout=2)
+        self.listener.close()
+        self.listener = None
+
+
+def _peer_uid(connection):
+    """uid of the process at the other end of a Unix socket connection, or None"""
+    import socket
+    import struct
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    try:
+        with socket.socket(fileno=os.dup(connection.fileno())) as sock:
+            credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                          struct.calcsize("3i"))
+    except OSError:
+        return None
+    _pid, uid, _gid = struct.unpack("3i", credentials)
+    return uid
+
+
+class AsyncMetricsServer:
+    """MetricsServer for an asyncio event loop: scrapes are handled by coroutines"""
+
+    def __init__(self, address, collect):
+        self.address = address
+        self.collect = collect
+        self.logger = logging.getLogger(__name__)
+        self.server = None
+
+    async def start(self):
+        import asyncio
+        if isinstance(self.address, str):
+            if not self.address.startswith("@") and os.path.exists(self.address):
+                os.unlink(self.address)
+            self.server = await asyncio.start_unix_server(self._handle,
+                                                          _unix_address(self.address))
+        else:
+            host, port = self.address
+            self.server = await asyncio.start_server(self._handle, host, port)
+            self.address = self.server.sockets[0].getsockname()[:2]  # resolves port 0
+        self.logger.info(f"Serving metrics on {self.address}")
+
+    async def _handle(self, reader, writer):
+        import asyncio
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass  # headers are not needed
+            parts = request_line.split()
+            path = parts[1].decode("latin-1") if len(parts) > 1 else ""
+            content_type, body = metrics_document(path, self.collect)
+            if body is None:
+                writer.write(b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            else:
+                writer.write(f"HTTP/1.0 200 OK\r\nContent-Type: {content_type}\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (OSError, asyncio.TimeoutError) as e:
+            self.logger.error(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.close()
+        if isinstance(self.address, str) and not self.address.startswith("@"):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        self.server = None
+
+
+class AsyncControlServer:
+    """ControlServer for an asyncio event loop (Unix sockets only).
+
+    Speaks the same length-prefixed framing as multiprocessing.connection,
+    so send_control_command() and the ctl subcommand work unchanged.
+    handle(request) runs on the loop thread.
+    """
+
+    def __init__(self, address, handle):
+        self.address = address
+        self.handle = handle
+        self.logger = logging.getLogger(__name__)
+        self.server = None
+
+    async def start(self):
+        import asyncio
+        _claim_control_socket(self.address)
+        self.server = await asyncio.start_unix_server(self._handle, self.address)
+        os.chmod(self.address, 0o600)
+        self.logger.info(f"Control socket listening on {self.address}")
+
+    async def _handle(self, reader, writer):
+        import asyncio
+        import struct
+        try:
+            header = await asyncio.wait_for(reader.readexactly(4), 5)
+            size, = struct.unpack("!i", header)
+            if not 0 <= size <= 65536:
+                raise ValueError(f"bad request size {size}")
+            payload = await asyncio.wait_for(reader.readexactly(size), 5)
+            try:
+                response = self.handle(json.loads(payload.decode()))
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            body = json.dumps(response).encode()
+            writer.write(struct.pack("!i", len(body)) + body)
+            await writer.drain()
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            self.logger.debug(f"Control request dropped: {e}")
+        finally:
+            writer.close()
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.close()
+        try:
+            os.unlink(self.address)
+        except OSError:
+            pass
+        self.server = None
+
+
+class StartupProfiler:
+    """Records wall time and newly imported modules for each startup phase"""
+
+    def __init__(self):
+        self.phases = []  # (name, milliseconds, imported module names)
+        self._current = None
+
+    def add(self, name, started, finished, modules=()):
+        """Record a phase that was timed elsewhere"""
+        self.phases.append((name, (finished - started) * 1000, sorted(modules)))
+
+    def phase(self, name):
+        """Time the body of a with-statement as a phase"""
+        self._current = (name, time.perf_counter(), set(sys.modules))
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        name, started, modules_before = self._current
+        self.add(name, started, time.perf_counter(),
+                 set(sys.modules) - modules_before)
+        return False
+
+    def report(self):
+        """Format the phases like -X importtime: time, then what was imported"""
+        lines = [f"{'phase':<22}{'ms':>9}  imports"]
+        for name, elapsed, modules in self.phases:
+            packages = sorted({module.split(".")[0] for module in modules
+                               if not module.startswith("_")})
+            imported = f"{len(modules)} ({', '.join(packages[:8])}" + \
+                       (", ..." if len(packages) > 8 else "") + ")" if modules else "-"
+            lines.append(f"{name:<22}{elapsed:>9.2f}  {imported}")
+        total = sum(elapsed for _, elapsed, _ in self.phases)
+        lines.append(f"{'total':<22}{total:>9.2f}")
+        return "\n".join(lines)
+
+
 def hide_console_window():
     """Hide the console window on Windows"""
     if platform.system().lower() == "windows":
@@ -298,36 +3996,229 @@ def hide_console_window():
 
 
 # Global flag for graceful shutdown
-shutdown_flag = threading.Event()
+shutdown_requested = False
+
+# Silencer instance stopped by the signal handler
+active_silencer = None
 
 def signal_handler(signum, frame):
-    """Handle SIGTERM and SIGINT for graceful shutdown"""
-    print(f"Received signal {signum}, shutting down gracefully...")
-    shutdown_flag.set()
-    sys.exit(0)
+    """Handle SIGTERM and SIGINT for graceful shutdown.
+
+    Runs between bytecodes of the main thread, which may hold any lock, so
+    it takes none: stop() only sets flags and writes to the scheduler's
+    Wakeup socket.
+    """
+    global shutdown_requested
+    shutdown_requested = True
+    if active_silencer is not None:
+        # Wakes the scheduler; run_daemon() then returns and cleans up
+        active_silencer.stop()
+
+def parse_target_argument(spec):
+    """argparse type for --target; keeps the spec so the interval can default from the config"""
+    import argparse
+    try:
+        KeepaliveTarget.parse(spec, 300)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Keep Alexa devices connected over Bluetooth by playing silent audio")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run the keepalive loop without configuring auto-startup")
+    # Settings default to None so that only flags actually given override the config
+    parser.add_argument("--config", metavar="PATH",
+                        help="TOML or JSON settings file (default: config.toml in the "
+                             "app data dir; reloaded when it changes)")
+    parser.add_argument("--interval", type=float, metavar="SECONDS",
+                        help="seconds between keepalives (default: 300)")
+    parser.add_argument("--backend",
+                        choices=["auto"] + list(AUDIO_BACKENDS),
+                        help="audio output backend (default: first available of "
+                             + ", ".join(AUTO_BACKEND_ORDER) + ")")
+    parser.add_argument("--target", action="append", default=[], metavar="SINK[@SECONDS]",
+                        type=parse_target_argument,
+                        help="output sink to keep awake, optionally with its own "
+                             "interval; repeat for several devices (default: the "
+                             "system default output)")
+    parser.add_argument("--adaptive", action="store_true", default=None,
+                        help="learn the longest safe interval per device from "
+                             "observed disconnects")
+    parser.add_argument("--skip-when-active", action="store_true", default=None,
+                        help="skip keepalives while other audio is playing to the "
+                             "sink (needs pactl)")
+    parser.add_argument("--bluetooth", action="store_true", default=None,
+                        help="only keep devices awake while BlueZ reports them "
+                             "connected, with a keepalive right after each connect")
+    parser.add_argument("--metrics", metavar="ADDRESS",
+                        help="serve Prometheus metrics on PORT, HOST:PORT or a "
+                             "Unix socket path")
+    parser.add_argument("--metrics-snapshot", type=float, metavar="SECONDS",
+                        help="write metrics.json to the app data dir this often")
+    parser.add_argument("--resume-poll", type=float, metavar="SECONDS",
+                        help="wake at least this often to notice a resume from "
+                             "suspend in the middle of a long wait (default: off)")
+    parser.add_argument("--memory-ceiling", type=float, metavar="MIB",
+                        help="restart the daemon when its resident memory "
+                             "exceeds this many MiB")
+    parser.add_argument("--memory-trace", action="store_true", default=None,
+                        help="log the top tracemalloc growth sites at every "
+                             "memory sample")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS,
+                        help="minimum level written to alexa_silencer.log (default: INFO)")
+    parser.add_argument("--control-socket", metavar="ADDRESS",
+                        help="control socket path or Windows pipe name (default: "
+                             "control.sock in the app data dir)")
+    parser.add_argument("--no-control", action="store_true",
+                        help="do not open the control socket")
+    parser.add_argument("--standalone", action="store_true",
+                        help="run a separate daemon even if one is already running, "
+                             "instead of registering with it")
+    parser.add_argument("--oneshot", action="store_true",
+                        help="play one keepalive to every target and exit (for "
+                             "systemd timers or cron)")
+    parser.add_argument("--timer", action="store_true",
+                        help="on Linux, set up a systemd timer that runs --oneshot "
+                             "every interval instead of a resident daemon")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="time each daemon startup phase, print the report and exit")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    ctl = subparsers.add_parser("ctl", help="send a command to the running daemon")
+    ctl.add_argument("action", choices=CONTROL_COMMANDS)
+    ctl.add_argument("value", nargs="?",
+                     help="new interval in seconds for set-interval")
+    ctl.add_argument("--target", dest="ctl_target", metavar="NAME",
+                     help="limit ping-now or set-interval to one target")
+    args = parser.parse_args(argv)
+    if args.command == "ctl" and args.action == "set-interval" and args.value is None:
+        ctl.error("set-interval needs a value in seconds")
+    return args
+
+def profile_startup(args):
+    """Run the daemon startup once, timing each phase, and print the report"""
+    profiler = StartupProfiler()
+    profiler.add("imports + arguments", _MODULE_IMPORT_STARTED, time.perf_counter(),
+                 set(sys.modules) - _MODULES_BEFORE_IMPORT)
+    
+    with profiler.phase("configuration"):
+        config_file, config = load_configuration(args)
+    with profiler.phase("logging setup"):
+        silencer = AlexaSilencer.from_config(config)
+    with profiler.phase("audio backend init"):
+        ready = silencer.initialize_audio()
+    if ready:
+        with profiler.phase("first burst"):
+            playback = silencer.play_silent_audio(silencer.targets[0])
+            silencer.scheduler.run(until=playback)
+    with profiler.phase("cleanup"):
+        silencer.cleanup()
+    
+    report = profiler.report()
+    silencer.logger.info(f"Startup profile:\n{report}")
+    print(report)
+    if not ready:
+        print("❌ Audio backend failed to initialize; see the log for details")
+    return ready
+
+def config_overrides(args):
+    """Settings given on the command line, as Config field values"""
+    overrides = {
+        "interval": args.interval,
+        "backend": args.backend,
+        "targets": args.target or None,
+        "adaptive": args.adaptive,
+        "skip_when_active": args.skip_when_active,
+        "bluetooth": args.bluetooth,
+        "metrics": args.metrics,
+        "metrics_snapshot": args.metrics_snapshot,
+        "resume_poll": args.resume_poll,
+        "memory_ceiling": args.memory_ceiling,
+        "memory_trace": args.memory_trace,
+        "log_level": args.log_level,
+    }
+    return {name: value for name, value in overrides.items() if value is not None}
+
+def load_configuration(args):
+    """Return (config file path, Config); exits with a message if the settings are invalid"""
+    config_file = (args.config or os.environ.get("ALEXA_SILENCER_CONFIG")
+                   or default_config_path())
+    try:
+        return config_file, Config.load(config_file, config_overrides(args))
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid configuration: {e}")
+        sys.exit(2)
+
+def run_control_client(args):
+    """Send one ctl command to the running daemon and print its reply"""
+    request = {"command": args.action}
+    if args.value is not None:
+        request["value"] = args.value
+    if args.ctl_target:
+        request["target"] = args.ctl_target
+    
+    try:
+        response = send_control_command(request, args.control_socket)
+    except (OSError, EOFError, TimeoutError) as e:
+        print(f"❌ Could not reach the daemon: {e}")
+        return False
+    
+    print(json.dumps(response, indent=2))
+    return response.get("ok", False)
 
 def main():
     """Main entry point"""
-    # Hide console window immediately
+    args = parse_args()
+    
+    if args.command == "ctl":
+        sys.exit(0 if run_control_client(args) else 1)
+    
+    # Hide console window (ctl keeps it to print the reply)
     hide_console_window()
     
-    silencer = AlexaSilencer()
+    if args.profile_startup:
+        sys.exit(0 if profile_startup(args) else 1)
+    
+    global active_silencer
+    config_file, config = load_configuration(args)
+    activity_probe = None
+    if config.skip_when_active and PulseActivityProbe.available():
+        activity_probe = PulseActivityProbe()
+    silencer = AlexaSilencer.from_config(config, activity_probe=activity_probe)
+    silencer.config_file = config_file
+    silencer.config_overrides = config_overrides(args)
+    if args.oneshot:
+        sys.exit(0 if silencer.run_oneshot() else 1)
+    silencer.timer_mode = args.timer
+    if not args.no_control:
+        silencer.control_address = (args.control_socket
+                                    or default_control_address(silencer.get_app_data_dir()))
+    if not args.standalone:
+        silencer.single_instance = True
+        silencer.instance_address = default_instance_address()
+    active_silencer = silencer
+    if config.skip_when_active and activity_probe is None:
+        silencer.logger.warning("skip_when_active needs pactl; keepalives "
+                                "will not be suppressed")
     
     # Set up signal handlers
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
     # Check command line arguments
-    if len(sys.argv) > 1 and sys.argv[1] == "--daemon":
+    if args.daemon:
         # Running as daemon (from startup)
         silencer.run_daemon()
     else:
         # First-time setup and run
         silencer.setup_and_run()
-    
-    # In your main loop, check for shutdown_flag
-    while not shutdown_flag.is_set():
-        pass  # Replace with actual work if needed
+    if silencer.restart_requested:
+        restart_process()
+    sys.exit(silencer.exit_status)
 
 
 if __name__ == "__main__":
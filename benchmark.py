@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Alexa Silencer
+Measures what the daemon costs on its hot paths: cold import time, audio
+backend initialization, per-tick keepalive latency and allocations, CPU
+and wakeups over a simulated hour of idling, memory, and the cost of timer
+mode (one --oneshot process per keepalive) against a resident daemon. Backends are
+measured in fresh interpreters so imports are cold; pygame runs with the
+dummy SDL audio driver unless --real-audio is given, so the suite works
+headless. With --bursts, also measures the cost of each burst shape
+(duration, rate, channels, dither) against a null or loopback sink.
+Results can be written as JSON (--output) to track regressions across
+releases.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs in a child interpreter: import, open the backend, play one burst
+BACKEND_PROBE = r"""
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import alexa_silencer
+imported = time.perf_counter()
+
+backend = alexa_silencer.create_audio_backend(sys.argv[1])
+backend.open(22050, 1)
+opened = time.perf_counter()
+
+playback = backend.play(0.01)
+while playback.get_busy():
+    time.sleep(0.001)
+played = time.perf_counter()
+backend.close()
+
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+except ImportError:
+    rss_kb = None
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "open_ms": (opened - imported) * 1000,
+    "first_burst_ms": (played - opened) * 1000,
+    "peak_rss_kb": rss_kb,
+}))
+"""
+
+IMPORT_PROBE = r"""
+import time
+start = time.perf_counter()
+import alexa_silencer
+print((time.perf_counter() - start) * 1000)
+"""
+
+class VirtualClock:
+    """Scheduler clock that jumps to each deadline instead of sleeping.
+
+    Waits are capped at resume_poll seconds, like the real Clock's, so
+    wakeup counts match the daemon's.
+    """
+
+    def __init__(self, resume_poll=None):
+        self.time = 0.0
+        self.resume_poll = resume_poll
+
+    def now(self):
+        return self.time
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        if self.resume_poll is not None:
+            timeout = self.resume_poll if timeout is None else min(timeout, self.resume_poll)
+        self.time += timeout
+        return False
+
+def child_environment(real_audio=False):
+    """Environment for child interpreters; headless SDL unless real_audio"""
+    env = dict(os.environ)
+    if not real_audio:
+        env.setdefault("SDL_AUDIODRIVER", "dummy")
+    return env
+
+def measure_cold_import(runs=5):
+    """Median time to import alexa_silencer in a fresh interpreter"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=script_dir,
+                                capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples),
+            "runs": runs}
+
+def measure_ticks(backend="null", ticks=1000):
+    """Per-tick keepalive cost: latency of each tick, including its completion
+    check, and memory left allocated per tick after warming up"""
+    import gc
+    import tracemalloc
+    from alexa_silencer import KeepaliveSession, Scheduler, create_audio_backend
+
+    session = KeepaliveSession(backend=create_audio_backend(backend),
+                               scheduler=Scheduler(VirtualClock()))
+    if not session.initialize_audio():
+        return {"error": f"{backend} backend failed to open"}
+    scheduler = session.scheduler
+    target = session.targets[0]
+
+    def tick():
+        playback = session.keepalive(target)
+        scheduler.run(until=playback)
+
+    for _ in range(20):
+        tick()  # warm caches
+
+    latencies = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        tick()
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    # Collect first: reference cycles left by each tick are freed by the
+    # collector, not retained, and must not be counted as growth
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(ticks):
+        tick()
+    peak = tracemalloc.get_traced_memory()[1]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    session.audio.close()
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "ticks": ticks,
+        "median_us": statistics.median(latencies),
+        "p95_us": latencies[int(len(latencies) * 0.95) - 1],
+        "max_us": latencies[-1],
+        "retained_bytes_per_tick": (retained - before) / ticks,
+        "peak_traced_bytes": peak - before,
+    }
+
+def measure_idle(backend="null", hours=1.0, interval=300, resume_poll=None):
+    """CPU time and wakeups for a simulated stretch of normal operation"""
+    from alexa_silencer import (KeepaliveSession, KeepaliveTarget, Scheduler,
+                                create_audio_backend, process_resources)
+
+    scheduler = Scheduler(VirtualClock(resume_poll))
+    session = KeepaliveSession([KeepaliveTarget(interval=interval)],
+                               backend=create_audio_backend(backend),
+                               scheduler=scheduler)
+    session.start()
+    scheduler.call_later(hours * 3600, scheduler.stop)
+    cpu_start = time.process_time()
+    scheduler.run()
+    cpu = time.process_time() - cpu_start
+    session.stop()
+
+    return {
+        "backend": backend,
+        "simulated_hours": hours,
+        "interval": interval,
+        "resume_poll": resume_poll,
+        "keepalives": session.activity.emitted,
+        "cpu_ms_per_hour": cpu * 1000 / hours,
+        "wakeups_per_hour": scheduler.wakeups / hours,
+        "rss_bytes": process_resources()[1],
+    }
+
+def run_child(command, env):
+    """Run command to completion; return (exit code, wall ms, CPU ms, peak RSS in KiB).
+
+    CPU time and peak RSS come from os.wait4() on this child alone, so earlier
+    children (such as backend probes) do not leak into the figures; both are
+    None where os.wait4() is missing.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    if not hasattr(os, "wait4"):
+        code = process.wait()
+        return code, (time.perf_counter() - start) * 1000, None, None
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = (time.perf_counter() - start) * 1000
+    process.returncode = os.waitstatus_to_exitcode(status)  # reaped above
+    peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return (process.returncode, wall, (usage.ru_utime + usage.ru_stime) * 1000,
+            peak_rss_kb)
+
+def measure_oneshot(backend="null", runs=5, real_audio=False):
+    """Cold-start cost of one keepalive in timer mode: wall time, CPU time and
+    peak RSS of a whole `alexa_silencer.py --oneshot` process"""
+    import tempfile
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alexa_silencer.py")
+
+    walls, cpus, peaks = [], [], []
+    with tempfile.TemporaryDirectory() as home:
+        env = child_environment(real_audio)
+        env.update(HOME=home, APPDATA=home)  # keep logs out of the real app dir
+        for _ in range(runs):
+            code, wall, cpu, peak_rss_kb = run_child(
+                [sys.executable, script, "--oneshot", "--backend", backend], env)
+            if code != 0:
+                return {"error": f"--oneshot exited with {code}"}
+            walls.append(wall)
+            if cpu is not None:
+                cpus.append(cpu)
+                peaks.append(peak_rss_kb)
+    return {
+        "backend": backend,
+        "runs": runs,
+        "wall_ms": statistics.median(walls),
+        "cpu_ms": statistics.median(cpus) if cpus else None,
+        "peak_rss_kb": max(peaks) if peaks else None,
+    }
+
+def measure_resident(backend="null", settle=2.0, real_audio=False):
+    """RSS a resident daemon holds between keepalives (Linux /proc only)"""
+    import tempfile
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alexa_silencer.py")
+    with tempfile.TemporaryDirectory() as home:
+        env = child_environment(real_audio)
+        env.update(HOME=home, APPDATA=home)
+        process = subprocess.Popen([sys.executable, script, "--daemon", "--standalone",
+                                    "--no-control", "--backend", backend],
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            time.sleep(settle)  # past startup and the first keepalive
+            rss_kb = None
+            try:
+                with open(f"/proc/{process.pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            rss_kb = int(line.split()[1])
+            except OSError:
+                pass
+        finally:
+            process.terminate()
+            process.wait()
+    return {"backend": backend, "rss_kb": rss_kb}
+
+def print_timer_comparison(oneshot, resident, idle, interval=300):
+    """Print the daily cost of timer mode against a resident daemon"""
+    if "error" in oneshot:
+        print(f"  ❌ {oneshot['error']}")
+        return
+    fires = 86400 / interval
+    print(f"{'Mode':<10}{'Per fire':>12}{'CPU/day':>12}{'Memory between keepalives':>28}")
+    print("-" * 62)
+    cpu_day = f"{oneshot['cpu_ms'] * fires / 1000:.1f}s" if oneshot["cpu_ms"] is not None else "n/a"
+    print(f"{'timer':<10}{oneshot['wall_ms']:>10.0f}ms{cpu_day:>12}{'0 MB':>28}")
+    rss = f"{resident['rss_kb'] / 1024:.1f} MB" if resident["rss_kb"] else "n/a"
+    print(f"{'resident':<10}{'-':>12}{idle['cpu_ms_per_hour'] * 24 / 1000:>11.2f}s{rss:>28}")
+    if oneshot["peak_rss_kb"]:
+        print(f"(timer mode peaks at {oneshot['peak_rss_kb'] / 1024:.1f} MB for "
+              f"{oneshot['wall_ms']:.0f} ms, {fires:.0f} times a day)")
+
+def measure_backend(name, real_audio=False):
+    """Measure one backend in a fresh interpreter and return its results"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-c", BACKEND_PROBE, name],
+                            cwd=script_dir, capture_output=True, text=True,
+                            env=child_environment(real_audio))
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        return {"error": error[-1] if error else f"exit code {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+# (burst ms, sample rate, channels, dither LSBs); the first row is the daemon default
+BURST_SHAPES = [
+    (10, 22050, 1, 0),
+    (10, 22050, 1, 1),
+    (5, 22050, 1, 0),
+    (2, 8000, 1, 1),
+    (20, 44100, 2, 0),
+    (50, 48000, 2, 1),
+]
+
+def measure_burst_shape(shape, backend="null", bursts=20):
+    """Play bursts of one shape and return wall time, CPU time and wakeups per burst"""
+    from alexa_silencer import KeepaliveSession, create_audio_backend
+
+    burst_ms, sample_rate, channels, dither = shape
+    session = KeepaliveSession(backend=create_audio_backend(backend, dither=dither))
+    session.silence_duration = burst_ms / 1000
+    session.audio.sample_rate = sample_rate
+    session.audio.channels = channels
+    if not session.initialize_audio():
+        return {"error": f"{backend} backend failed to open"}
+
+    scheduler = session.scheduler
+    wakeups = scheduler.wakeups
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(bursts):
+        playback = session.play_silent_audio(session.targets[0])
+        scheduler.run(until=playback)
+        if playback.exception() is not None:
+            session.audio.close()
+            return {"error": str(playback.exception())}
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    session.audio.close()
+
+    return {
+        "burst_ms": burst_ms,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "dither": dither,
+        "bytes": int(burst_ms / 1000 * sample_rate) * channels * 2,
+        "wall_ms": wall / bursts * 1000,
+        "cpu_ms": cpu / bursts * 1000,
+        "wakeups": (scheduler.wakeups - wakeups) / bursts,
+    }
+
+def print_burst_table(results):
+    """Print per-burst costs, one row per shape"""
+    print(f"{'Shape':<24}{'Bytes':>8}{'Wall':>10}{'CPU':>10}{'Wakeups':>9}")
+    print("-" * 61)
+    for result in results:
+        if "error" in result:
+            print(f"  ❌ {result['error']}")
+            continue
+        shape = (f"{result['burst_ms']:g}ms {result['sample_rate']}Hz "
+                 f"{result['channels']}ch d{result['dither']}")
+        print(f"{shape:<24}{result['bytes']:>8}{result['wall_ms']:>8.2f}ms"
+              f"{result['cpu_ms']:>8.3f}ms{result['wakeups']:>9.1f}")
+
+def print_backend_table(results):
+    """Print a comparison table of backend results"""
+    print(f"{'Backend':<10}{'Import':>10}{'Open':>10}{'Burst':>10}{'Peak RSS':>12}")
+    print("-" * 52)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<10}  ❌ {result['error']}")
+            continue
+        rss = f"{result['peak_rss_kb'] / 1024:.1f} MB" if result["peak_rss_kb"] else "n/a"
+        print(f"{name:<10}{result['import_ms']:>8.1f}ms{result['open_ms']:>8.1f}ms"
+              f"{result['first_burst_ms']:>8.1f}ms{rss:>12}")
+
+def main():
+    """Run the benchmark suite"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Alexa Silencer benchmarks")
+    parser.add_argument("--json", action="store_true", help="also print the results as JSON")
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON to FILE")
+    parser.add_argument("--backend", default="null",
+                        help="backend for the tick and idle benchmarks (default: null)")
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks to time")
+    parser.add_argument("--real-audio", action="store_true",
+                        help="let pygame use the real audio device instead of SDL's dummy driver")
+    parser.add_argument("--bursts", action="store_true",
+                        help="also measure the cost of each burst shape")
+    parser.add_argument("--burst-backend", default="null",
+                        help="backend for --bursts: null (no audio) or pipe (real sink)")
+    parser.add_argument("--count", type=int, default=20, help="bursts per shape")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from alexa_silencer import AUDIO_BACKENDS
+
+    print("⏱️  Alexa Silencer Benchmark Suite")
+    print("=" * 52)
+    print()
+
+    print("⏳ Measuring cold import...")
+    cold_import = measure_cold_import()
+    print(f"   import alexa_silencer: {cold_import['median_ms']:.1f} ms (median of "
+          f"{cold_import['runs']})")
+    print()
+
+    backends = {}
+    for name, backend_class in AUDIO_BACKENDS.items():
+        if not backend_class.available():
+            print(f"⚠️  Skipping {name}: not available on this system")
+            continue
+        print(f"⏳ Measuring {name} backend...")
+        backends[name] = measure_backend(name, args.real_audio)
+
+    print()
+    print_backend_table(backends)
+    print()
+
+    print(f"⏳ Timing {args.ticks} keepalive ticks on the {args.backend} backend...")
+    ticks = measure_ticks(args.backend, args.ticks)
+    if "error" in ticks:
+        print(f"   ❌ {ticks['error']}")
+    else:
+        print(f"   median {ticks['median_us']:.0f} µs, p95 {ticks['p95_us']:.0f} µs, "
+              f"max {ticks['max_us']:.0f} µs; "
+              f"{ticks['retained_bytes_per_tick']:.1f} bytes retained per tick")
+
+    print("⏳ Simulating an hour of operation...")
+    idle = measure_idle(args.backend)
+    print(f"   {idle['cpu_ms_per_hour']:.2f} ms CPU and {idle['wakeups_per_hour']:.0f} "
+          f"wakeups per hour; RSS {idle['rss_bytes'] / 1024 / 1024:.1f} MB")
+    polling = measure_idle(args.backend, resume_poll=30)
+    print(f"   with --resume-poll 30: {polling['cpu_ms_per_hour']:.2f} ms CPU and "
+          f"{polling['wakeups_per_hour']:.0f} wakeups per hour")
+
+    print()
+    print(f"⏳ Comparing timer mode with a resident daemon on the {args.backend} backend...")
+    oneshot = measure_oneshot(args.backend, real_audio=args.real_audio)
+    resident = measure_resident(args.backend, real_audio=args.real_audio)
+    print()
+    print_timer_comparison(oneshot, resident, idle)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "cold_import": cold_import,
+        "backends": backends,
+        "ticks": ticks,
+        "idle": idle,
+        "idle_resume_poll": polling,
+        "oneshot": oneshot,
+        "resident": resident,
+    }
+
+    if args.bursts:
+        print()
+        print(f"⏳ Measuring burst shapes on the {args.burst_backend} backend "
+              f"({args.count} bursts each)...")
+        results["bursts"] = [measure_burst_shape(shape, args.burst_backend, args.count)
+                             for shape in BURST_SHAPES]
+        print()
+        print_burst_table(results["bursts"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print()
+        print(f"📄 Results written to {args.output}")
+
+    if args.json:
+        print()
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
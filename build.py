@@ -1,13 +1,39 @@
 #!/usr/bin/env python3
 """
 Build script for creating standalone executables of Alexa Silencer
+
+The default build is a single --onefile executable. --lean builds a
+onedir bundle instead, which starts without unpacking anything to a temp
+dir, and leaves out the pygame submodules the mixer backend never
+touches (or pygame entirely with --backend pipe). --compare builds both
+and reports each artifact's size and cold-start time.
 """
 
+import argparse
+import statistics
 import subprocess
 import sys
 import os
 import shutil
 import platform
+import tempfile
+import time
+
+# Parts of pygame the mixer backend never imports; pygame's __init__ falls
+# back to a placeholder for each of them
+UNUSED_PYGAME_MODULES = [
+    "pygame.camera", "pygame.cursors", "pygame.display", "pygame.docs",
+    "pygame.draw", "pygame.examples", "pygame.fastevent", "pygame.font",
+    "pygame.freetype", "pygame.ftfont", "pygame.gfxdraw", "pygame.image",
+    "pygame.imageext", "pygame.joystick", "pygame.key", "pygame.mask",
+    "pygame.midi", "pygame.mouse", "pygame.movie", "pygame.pixelarray",
+    "pygame.pixelcopy", "pygame.scrap", "pygame.sndarray", "pygame.sprite",
+    "pygame.surfarray", "pygame.sysfont", "pygame.tests", "pygame.threads",
+    "pygame.transform", "pygame._sdl2.controller", "pygame._sdl2.touch",
+]
+
+# Standard library and third-party packages the daemon never imports
+UNUSED_MODULES = ["tkinter", "unittest", "pydoc", "doctest", "numpy", "test"]
 
 def run_command(command, description):
     """Run a command and handle errors"""
@@ -34,25 +60,109 @@ def install_pyinstaller():
         return run_command(f"{sys.executable} -m pip install pyinstaller", 
                           "Installing PyInstaller")
 
-def build_executable():
-    """Build the standalone executable"""
+def dist_path(lean):
+    """PyInstaller output directory for a build"""
+    return os.path.join("dist", "lean") if lean else "dist"
+
+def executable_path(lean):
+    """Path of the built executable inside dist_path()"""
+    os_name = platform.system().lower()
+    exe_name = "alexa-silencer.exe" if os_name == "windows" else "alexa-silencer"
+    if lean:
+        return os.path.join(dist_path(lean), "alexa-silencer", exe_name)
+    return os.path.join(dist_path(lean), exe_name)
+
+def build_executable(lean=False, backend="pygame"):
+    """Build the standalone executable: onefile, or a lean onedir bundle"""
     os_name = platform.system().lower()
     
     # PyInstaller command
     cmd_parts = [
         "pyinstaller",
-        "--onefile",
+        "--noconfirm",
+        "--onedir" if lean else "--onefile",
         "--noconsole" if os_name == "windows" else "--console",
-        "--hidden-import=pygame",
         "--name=alexa-silencer",
-        "alexa_silencer.py"
+        f"--distpath={dist_path(lean)}",
     ]
+    if lean:
+        cmd_parts.append("--workpath=" + os.path.join("build", "lean"))
+        excluded = list(UNUSED_MODULES)
+        if backend == "pygame":
+            cmd_parts.append("--hidden-import=pygame.mixer")
+            excluded += UNUSED_PYGAME_MODULES
+        else:
+            excluded.append("pygame")  # the pipe backend needs no Python audio modules
+        cmd_parts += [f"--exclude-module={module}" for module in excluded]
+    else:
+        cmd_parts.append("--hidden-import=pygame")
+    cmd_parts.append("alexa_silencer.py")
     
     command = " ".join(cmd_parts)
     
-    return run_command(command, f"Building executable for {os_name}")
+    description = f"Building {'lean onedir' if lean else 'onefile'} executable for {os_name}"
+    return run_command(command, description)
+
+def artifact_size(lean):
+    """Bytes on disk of the built executable (the whole bundle for onedir)"""
+    if not lean:
+        return os.path.getsize(executable_path(lean))
+    total = 0
+    for root, _, files in os.walk(os.path.dirname(executable_path(lean))):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def bundled_backend(lean, backend):
+    """Audio backend a build ships with; onefile builds always bundle pygame"""
+    return backend if lean else "pygame"
+
+def measure_cold_start(lean, backend, runs=3):
+    """Median wall time of one --oneshot keepalive through the built executable.
+
+    Returns (seconds, None), or (None, error) if the executable exits
+    non-zero. The keepalive goes through the bundled backend, so a module
+    left out of the bundle that the backend needs fails the check: pygame
+    plays into SDL's dummy driver, so no audio device is needed. The pipe
+    backend needs a running sound server, so pipe builds are probed with
+    the null backend; they exclude no module the pipe backend imports. A
+    throwaway home directory keeps logs out of the real app dir; onefile
+    builds pay their unpacking on every run, as they would on every
+    systemd restart.
+    """
+    probe = "pygame" if bundled_backend(lean, backend) == "pygame" else "null"
+    samples = []
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, APPDATA=home, SDL_AUDIODRIVER="dummy")
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run([executable_path(lean), "--oneshot", "--backend", probe],
+                                    env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                output = (result.stderr or result.stdout).strip().splitlines()
+                return None, (f"--oneshot --backend {probe} exited with "
+                              f"{result.returncode}: {output[-1] if output else 'no output'}")
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples), None
 
-def create_distribution():
+def report_artifacts(builds, backend):
+    """Print size and cold-start time of each built artifact; return False
+    if any of them failed to run"""
+    print(f"{'Build':<10}{'Size':>12}{'Cold start':>14}")
+    print("-" * 36)
+    errors = []
+    for lean in builds:
+        cold_start, error = measure_cold_start(lean, backend)
+        cold_text = f"{cold_start * 1000:.0f} ms" if cold_start is not None else "failed"
+        print(f"{'lean' if lean else 'onefile':<10}"
+              f"{artifact_size(lean) / 1024 / 1024:>10.1f}MB{cold_text:>14}")
+        if error:
+            errors.append(f"{'lean' if lean else 'onefile'}: {error}")
+    for error in errors:
+        print(f"❌ {error}")
+    return not errors
+
+def create_distribution(lean=False):
     """Create distribution folder with all necessary files"""
     os_name = platform.system().lower()
     dist_folder = f"alexa-silencer-{os_name}"
@@ -60,21 +170,18 @@ def create_distribution():
     # Create distribution folder
     if os.path.exists(dist_folder):
         shutil.rmtree(dist_folder)
-    os.makedirs(dist_folder)
-    
-    # Copy executable
-    if os_name == "windows":
-        exe_name = "alexa-silencer.exe"
-    else:
-        exe_name = "alexa-silencer"
     
-    exe_path = os.path.join("dist", exe_name)
-    if os.path.exists(exe_path):
-        shutil.copy2(exe_path, dist_folder)
-        print(f"✅ Copied executable to {dist_folder}")
-    else:
+    # Copy executable (the whole bundle for onedir builds)
+    exe_path = executable_path(lean)
+    if not os.path.exists(exe_path):
         print(f"❌ Executable not found at {exe_path}")
         return False
+    if lean:
+        shutil.copytree(os.path.dirname(exe_path), dist_folder)
+    else:
+        os.makedirs(dist_folder)
+        shutil.copy2(exe_path, dist_folder)
+    print(f"✅ Copied executable to {dist_folder}")
     
     # Copy documentation
     files_to_copy = ["README.md", "LICENSE", "requirements.txt"]
@@ -122,6 +229,18 @@ def create_distribution():
 
 def main():
     """Main build process"""
+    parser = argparse.ArgumentParser(description="Build Alexa Silencer executables")
+    parser.add_argument("--lean", action="store_true",
+                        help="build a onedir bundle without unused pygame modules; "
+                             "starts without unpacking to a temp dir")
+    parser.add_argument("--backend", choices=["pygame", "pipe"], default="pygame",
+                        help="audio backend to bundle in a lean build; pipe leaves "
+                             "pygame out entirely (default: pygame)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also build the other variant and report size and "
+                             "cold-start time of both")
+    args = parser.parse_args()
+    
     print("🔨 Alexa Silencer Build Script")
     print("=" * 50)
     print()
@@ -134,14 +253,24 @@ def main():
     print()
     
     # Build executable
-    if not build_executable():
+    if not build_executable(args.lean, args.backend):
         print("❌ Build failed during executable creation")
         return
+    builds = [args.lean]
+    if args.compare:
+        if not build_executable(not args.lean, args.backend):
+            print("❌ Build failed during comparison build")
+            return
+        builds = [False, True]
     
     print()
+    if not report_artifacts(builds, args.backend):
+        print("❌ Build failed: the executable did not run")
+        return
+    print()
     
     # Create distribution
-    if create_distribution():
+    if create_distribution(args.lean):
         print()
         print("🎉 Build Complete!")
         print()
@@ -6,12 +6,122 @@ This script tests the core functionality without actually setting up auto-startu
 
 import sys
 import os
+import time
 import tempfile
 from pathlib import Path
 
 # Add current directory to path for importing
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+class FakeClock:
+    """Virtual clock for the scheduler: waiting advances time instantly.
+
+    latency is added to every timed wait, like a real wakeup arriving late;
+    suspend() moves time forward the way a laptop sleep does.
+    """
+
+    def __init__(self, start=0.0, latency=0.0):
+        self.time = start
+        self.latency = latency
+        self.asleep = 0.0
+        self.waits = 0
+        self.pending_suspend = None
+
+    def now(self):
+        return self.time
+
+    def suspended(self):
+        return self.asleep
+
+    def suspend(self, seconds):
+        self.time += seconds
+        self.asleep += seconds
+
+    def suspend_during_wait(self, at, seconds, on_resume=None):
+        """Suspend for seconds inside the wait that spans virtual time at.
+
+        Like Event.wait, that wait only counts time awake: it returns after
+        its remaining timeout unless on_resume (a fake logind) sets the event.
+        """
+        self.pending_suspend = (at, seconds, on_resume)
+
+    def wait(self, event, timeout):
+        self.waits += 1
+        if event.is_set():
+            return True
+        if timeout is None:
+            raise RuntimeError("Scheduler would block forever with nothing scheduled")
+        end = self.time + timeout + self.latency
+        if self.pending_suspend is not None and self.pending_suspend[0] < end:
+            at, seconds, on_resume = self.pending_suspend
+            self.pending_suspend = None
+            awake_left = end - max(at, self.time)
+            self.time = max(at, self.time)
+            self.suspend(seconds)
+            if on_resume is not None:
+                on_resume()
+            if event.is_set():
+                return True
+            end = self.time + awake_left
+        self.time = end
+        return False
+
+    async def wait_async(self, event, timeout):
+        import asyncio
+        result = self.wait(event, timeout)
+        await asyncio.sleep(0)  # still give other coroutines a turn
+        return result
+
+class DisconnectSimulator:
+    """Replays a synthetic disconnect trace against a running silencer.
+
+    trace is a list of (start_time, idle_timeout) segments: from start_time
+    on, the device drops if it goes idle_timeout seconds without a burst,
+    then reconnects reconnect_delay seconds later.
+    """
+
+    def __init__(self, silencer, target, trace, reconnect_delay=5):
+        self.silencer = silencer
+        self.target = target
+        self.trace = trace
+        self.reconnect_delay = reconnect_delay
+        self.disconnects = 0
+        self.keepalives = 0
+        self.last_burst = None
+        self._watch = None
+        self._wrap_keepalive()
+        silencer.disconnects_reported = True
+
+    def idle_timeout(self, now):
+        timeout = self.trace[0][1]
+        for start_time, segment_timeout in self.trace:
+            if now >= start_time:
+                timeout = segment_timeout
+        return timeout
+
+    def _wrap_keepalive(self):
+        play = self.silencer.play_silent_audio
+        scheduler = self.silencer.scheduler
+
+        def play_and_watch(target=None, tick_started=None):
+            self.keepalives += 1
+            self.last_burst = scheduler.clock.now()
+            if self._watch is not None:
+                scheduler.cancel(self._watch)
+            self._watch = scheduler.call_later(self.idle_timeout(self.last_burst),
+                                               self._drop, name="device-idle")
+            return play(target, tick_started)
+
+        self.silencer.play_silent_audio = play_and_watch
+
+    def _drop(self):
+        self._watch = None
+        self.disconnects += 1
+        self.silencer.record_disconnect(self.target)
+        self.silencer.scheduler.call_later(
+            self.reconnect_delay, lambda: self.silencer.record_connect(self.target),
+            name="device-reconnect")
+
 def test_imports():
     """Test that all required modules can be imported"""
     try:
@@ -134,8 +244,9 @@ def test_alexa_silencer_class():
             print("✅ AlexaSilencer pygame initialization successful")
             
             # Test silent audio creation and playback
-            silencer.play_silent_audio()
-            print("✅ Silent audio playback test successful")
+            playback = silencer.play_silent_audio()
+            silencer.scheduler.run(until=playback)
+            print(f"✅ Silent audio playback test successful ({playback.result() * 1000:.1f} ms)")
             
             # Cleanup
             silencer.cleanup()
@@ -150,6 +261,2011 @@ def test_alexa_silencer_class():
         print(f"❌ AlexaSilencer test failed: {e}")
         return False
 
+def test_render_silence():
+    """Test that silence is rendered in memory for each mixer format"""
+    try:
+        from alexa_silencer import create_audio_backend, render_silence
+        
+        signed = render_silence(0.01, 22050, -16, 1)
+        if len(signed) != 220 * 2 or any(signed):
+            print("❌ Signed 16-bit silence is wrong")
+            return False
+        print("✅ Signed 16-bit mono silence rendered")
+        
+        stereo = render_silence(0.01, 44100, -16, 2)
+        if len(stereo) != 441 * 2 * 2:
+            print("❌ Stereo silence has the wrong length")
+            return False
+        print("✅ Stereo silence rendered")
+        
+        unsigned = render_silence(0.01, 8000, 8, 1)
+        if unsigned != b"\x80" * 80:
+            print("❌ Unsigned 8-bit silence is not centred")
+            return False
+        print("✅ Unsigned 8-bit silence centred on midpoint")
+        
+        import array
+        dithered = render_silence(0.01, 22050, -16, 1, dither=1)
+        samples = array.array("h", dithered)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        if (len(dithered) != len(signed) or not any(samples)
+                or max(abs(sample) for sample in samples) > 1
+                or dithered != render_silence(0.01, 22050, -16, 1, dither=1)):
+            print("❌ Dither is missing, too loud or not repeatable")
+            return False
+        print("✅ ±1 LSB dither rendered repeatably")
+        
+        backend = create_audio_backend("null", buffer=1024, dither=2)
+        if backend.dither != 2:
+            print("❌ Burst options not passed to the backend")
+            return False
+        print("✅ Backend options applied, unsupported ones ignored")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Silence rendering test failed: {e}")
+        return False
+
+class FakePlayback:
+    """Burst that reports busy until a virtual time"""
+
+    def __init__(self, clock, length, busy_for):
+        self.clock = clock
+        self.length = length
+        self.busy_until = clock.now() + busy_for
+        self.stopped = False
+
+    def get_busy(self):
+        return not self.stopped and self.clock.now() < self.busy_until
+
+    def error(self):
+        return None
+
+    def stop(self):
+        self.stopped = True
+
+class FakeBackend:
+    """Audio backend whose bursts stay busy for busy_for virtual seconds"""
+
+    name = "fake"
+    supports_sinks = False
+
+    def __init__(self, clock, busy_for=0.01):
+        self.clock = clock
+        self.busy_for = busy_for
+        self.playbacks = []
+        self.healthy = True
+        self.fail_opens = 0  # number of upcoming open() calls that fail
+        self.opens = 0
+        self.closes = 0
+
+    def open(self, sample_rate, channels):
+        self.opens += 1
+        if self.fail_opens > 0:
+            self.fail_opens -= 1
+            raise RuntimeError("device unavailable")
+        self.healthy = True
+
+    def check(self):
+        return self.healthy
+
+    def play(self, duration, sink=None):
+        playback = FakePlayback(self.clock, duration, self.busy_for)
+        self.playbacks.append(playback)
+        return playback
+
+    def close(self):
+        self.closes += 1
+
+class DaemonHarness:
+    """Runs the real run_daemon() lifecycle on a FakeClock and FakeBackend.
+
+    Events scheduled with at() fire at virtual times while the daemon runs;
+    run(seconds) stops the daemon after that much virtual time. Each
+    target's tick times are recorded so drift can be checked afterwards.
+    """
+
+    def __init__(self, targets=None, interval=300):
+        from alexa_silencer import AlexaSilencer
+
+        self.clock = FakeClock()
+        self.backend = FakeBackend(self.clock)
+        self.silencer = AlexaSilencer(self.clock, backend=self.backend, targets=targets)
+        self.logind = self.silencer.sleep_source = FakeLogind()
+        for target in self.silencer.targets:
+            self.silencer.set_target_interval(target, interval)
+        self.ticks = {target.name: [] for target in self.silencer.targets}
+        keepalive = self.silencer.keepalive
+
+        def record_tick(target):
+            self.ticks[target.name].append(self.clock.now())
+            return keepalive(target)
+
+        self.silencer.keepalive = record_tick
+
+    def at(self, when, callback):
+        self.silencer.scheduler.call_later(when - self.clock.now(), callback,
+                                           name="harness-event")
+
+    def lose_device(self, failed_reopens=0):
+        """Make the device disappear; it comes back after failed_reopens retries"""
+        self.backend.healthy = False
+        self.backend.fail_opens = failed_reopens
+
+    def run(self, seconds):
+        self.at(self.clock.now() + seconds, self.silencer.stop)
+        cpu_start = time.process_time()
+        self.silencer.run_daemon()
+        return time.process_time() - cpu_start
+
+    def max_drift(self, name, interval):
+        """Largest distance of any tick from its ideal slot on the interval grid"""
+        ticks = self.ticks[name]
+        return max(abs(tick - ticks[0] - i * interval) for i, tick in enumerate(ticks))
+
+class FakeLogind:
+    """Injected sleep source: resumed() delivers PrepareForSleep(false)"""
+
+    def __init__(self):
+        self.callback = None
+        self.closed = False
+
+    def listen(self, callback, lost=None):
+        self.callback = callback
+
+    def resumed(self):
+        if self.callback is not None:
+            self.callback(False)
+
+    def close(self):
+        self.closed = True
+
+class FakeBluez:
+    """Injected BlueZ event source: a device table and connection events"""
+
+    def __init__(self, devices):
+        self.table = devices
+        self.callback = None
+        self.lost = None
+        self.closed = False
+
+    def devices(self):
+        return {path: dict(device) for path, device in self.table.items()}
+
+    def listen(self, callback, lost=None):
+        self.callback = callback
+        self.lost = lost
+
+    def set_connected(self, path, connected):
+        self.table[path]["connected"] = connected
+        self.callback(path, connected)
+
+    def close(self):
+        self.closed = True
+
+def test_playback_completion():
+    """Test that playback completion is signalled through a Future with a timeout"""
+    try:
+        from alexa_silencer import AlexaSilencer
+        
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock)
+        
+        # Output latency keeps the burst busy past the nominal 10 ms
+        silencer.audio.backend = FakeBackend(clock, busy_for=0.03)
+        playback = silencer.play_silent_audio()
+        if playback.done():
+            print("❌ play_silent_audio() blocked until playback finished")
+            return False
+        silencer.scheduler.run(until=playback)
+        latency = playback.result()
+        if not 0.03 <= latency < 0.03 + silencer.playback_poll + 1e-9:
+            print(f"❌ Unexpected playback latency: {latency}")
+            return False
+        print(f"✅ Playback completed after {latency * 1000:.0f} virtual ms "
+              f"with {clock.waits} wakeups")
+        
+        # A wedged backend must not hang the daemon
+        silencer.audio.backend = FakeBackend(clock, busy_for=3600)
+        playback = silencer.play_silent_audio()
+        silencer.scheduler.run(until=playback)
+        if (not isinstance(playback.exception(), TimeoutError)
+                or not silencer.audio.backend.playbacks[0].stopped):
+            print("❌ Wedged playback was not timed out")
+            return False
+        print("✅ Wedged playback timed out and the burst was stopped")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Playback completion test failed: {e}")
+        return False
+
+def test_audio_backends():
+    """Test backend selection and the null/file-sink backend"""
+    try:
+        from alexa_silencer import AlexaSilencer, create_audio_backend
+        
+        try:
+            create_audio_backend("no-such-backend")
+            print("❌ Unknown backend name was accepted")
+            return False
+        except ValueError:
+            print("✅ Unknown backend name rejected")
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sink_path = Path(temp_dir) / "sink.raw"
+            backend = create_audio_backend("null", sink_path=sink_path)
+            backend.open(22050, 1)
+            backend.play(0.01)
+            backend.play(0.01)
+            backend.close()
+            
+            if sink_path.stat().st_size != 2 * 220 * 2 or backend.bursts != 2:
+                print("❌ File sink did not receive both bursts")
+                return False
+            print("✅ Null backend wrote both bursts to the file sink")
+        
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock, backend="null")
+        if not silencer.initialize_audio():
+            print("❌ AlexaSilencer could not open the null backend")
+            return False
+        playback = silencer.play_silent_audio()
+        silencer.scheduler.run(until=playback)
+        silencer.cleanup()
+        if playback.exception() is not None or silencer.audio.backend is not None:
+            print("❌ Null backend playback or cleanup failed")
+            return False
+        print("✅ AlexaSilencer played through the null backend")
+        
+        # A player that exits non-zero (unknown sink, no sound server) is a failure
+        from alexa_silencer import PipeBackend
+        if sys.platform.startswith("linux"):
+            backend = PipeBackend(player="sh")
+            backend.PLAYERS = {"sh": ["sh", "-c", "cat > /dev/null; exit 1"]}
+            silencer = AlexaSilencer(backend=backend)
+            silencer.initialize_audio()
+            silencer.running = True
+            playback = silencer.play_silent_audio(silencer.targets[0])
+            silencer.scheduler.run(until=playback)
+            failures = silencer.get_metrics()["failures"]
+            lost = silencer.audio.lost_at is not None or silencer.audio.reinit_count
+            silencer.running = False
+            silencer.cleanup()
+            if (not isinstance(playback.exception(), RuntimeError)
+                    or silencer.targets[0].failures != 1 or not failures or not lost):
+                print(f"❌ Failing player counted as a success: {silencer.targets[0].stats()}")
+                return False
+            print("✅ A player exiting non-zero fails the burst and marks the device lost")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Audio backend test failed: {e}")
+        return False
+
+def test_lazy_imports():
+    """Test that importing alexa_silencer does not load pygame or setup-only modules"""
+    try:
+        import subprocess
+        
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        probe = ("import sys, alexa_silencer; "
+                 "print(','.join(m for m in ('pygame', 'subprocess', 'argparse', "
+                 "'tempfile', 'wave') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", probe], cwd=script_dir,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"❌ Import failed: {result.stderr.strip()}")
+            return False
+        
+        loaded = result.stdout.strip()
+        if loaded:
+            print(f"❌ Imported eagerly: {loaded}")
+            return False
+        print("✅ pygame and setup-only modules are imported on first use")
+        
+        result = subprocess.run([sys.executable, "alexa_silencer.py",
+                                 "--profile-startup", "--backend", "null"],
+                                cwd=script_dir, capture_output=True, text=True)
+        if result.returncode != 0 or "audio backend init" not in result.stdout:
+            print(f"❌ --profile-startup failed: {result.stdout}{result.stderr}")
+            return False
+        print("✅ --profile-startup reported every phase")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Lazy import test failed: {e}")
+        return False
+
+def test_device_loss_recovery():
+    """Test that a lost device is reopened with backoff and a keepalive follows"""
+    try:
+        from alexa_silencer import AlexaSilencer
+        
+        clock = FakeClock()
+        backend = FakeBackend(clock)
+        silencer = AlexaSilencer(clock, backend=backend)
+        if not silencer.initialize_audio():
+            print("❌ Fake backend failed to open")
+            return False
+        silencer.running = True
+        
+        # The speaker disappears and comes back on the third reopen attempt
+        backend.healthy = False
+        backend.fail_opens = 2
+        playback = silencer.play_silent_audio()
+        if not isinstance(playback.exception(), RuntimeError):
+            print("❌ Burst on a lost device did not fail")
+            return False
+        
+        silencer.scheduler.call_later(60, silencer.scheduler.stop)
+        silencer.scheduler.run()
+        
+        audio = silencer.audio
+        if audio.reinit_count != 3 or audio.recoveries != 1 or not audio.available:
+            print(f"❌ Expected recovery on attempt 3, got {audio.reinit_count} attempts")
+            return False
+        # Attempts at t=0, t=1 and t=3 (backoff of 1s then 2s)
+        if audio.last_recovery_latency != 3.0:
+            print(f"❌ Unexpected recovery latency: {audio.last_recovery_latency}")
+            return False
+        print(f"✅ Device recovered after {audio.reinit_count} attempts "
+              f"in {audio.last_recovery_latency:.0f} virtual seconds")
+        
+        if len(backend.playbacks) != 1:
+            print("❌ No keepalive was sent after recovery")
+            return False
+        print("✅ Keepalive sent immediately after recovery")
+        
+        # Lost again right after recovering: the backoff carries on
+        audio.mark_lost(RuntimeError("player exited with status 1"))
+        retry = audio._retry.deadline - clock.now()
+        if retry != 4.0:
+            print(f"❌ Relapse retried after {retry}s instead of backing off")
+            return False
+        print("✅ A device lost again right after recovering keeps backing off")
+        
+        # No recovery burst while paused, or to a device that is disconnected
+        silencer.cleanup()
+        
+        # No recovery burst while paused, or to a device that is disconnected
+        for paused, connected in ((True, None), (False, False)):
+            backend = FakeBackend(clock)
+            silencer = AlexaSilencer(clock, backend=backend)
+            silencer.initialize_audio()
+            silencer.running = True
+            silencer.paused = paused
+            silencer.targets[0].connected = connected
+            backend.healthy = False
+            silencer.play_silent_audio()
+            silencer.scheduler.call_later(60, silencer.scheduler.stop)
+            silencer.scheduler.run()
+            if silencer.audio.recoveries != 1 or backend.playbacks:
+                print(f"❌ Recovery burst sent (paused={paused}, connected={connected})")
+                return False
+            silencer.cleanup()
+        print("✅ No recovery burst while paused or to a disconnected device")
+        
+        # Reopening during a backoff wait replaces the pending retry
+        backend = FakeBackend(clock)
+        silencer = AlexaSilencer(clock, backend=backend)
+        silencer.initialize_audio()
+        backend.healthy = False
+        backend.fail_opens = 100
+        silencer.play_silent_audio()
+        scheduler = silencer.scheduler
+        for delay in (10, 20, 30):
+            scheduler.call_later(delay, silencer.audio.reopen)
+        scheduler.call_later(40, scheduler.stop)
+        scheduler.run()
+        pending = [entry[2] for entry in scheduler._heap
+                   if entry[2].name == "audio-reopen" and not entry[2].cancelled]
+        if len(pending) != 1:
+            print(f"❌ {len(pending)} reopen chains pending after repeated reopen()")
+            return False
+        silencer.cleanup()
+        print("✅ Repeated reopen() keeps a single retry chain")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Device loss recovery test failed: {e}")
+        return False
+
+def test_multiple_devices():
+    """Test that several sinks share one scheduler and backend with their own intervals"""
+    try:
+        from alexa_silencer import AlexaSilencer, KeepaliveTarget, NullBackend
+        
+        clock = FakeClock()
+        backend = NullBackend()
+        targets = [KeepaliveTarget.parse("echo_kitchen@120", 300),
+                   KeepaliveTarget.parse("echo_bedroom", 300)]
+        silencer = AlexaSilencer(clock, backend=backend, targets=targets)
+        silencer.scheduler.call_later(3600, silencer.stop)
+        silencer.run_daemon()
+        
+        if backend.bursts_by_sink != {"echo_kitchen": 30, "echo_bedroom": 12}:
+            print(f"❌ Unexpected bursts per sink: {backend.bursts_by_sink}")
+            return False
+        print("✅ Each sink kept awake on its own interval by one daemon")
+        
+        stats = {entry["name"]: entry for entry in silencer.get_device_stats()}
+        kitchen = stats["echo_kitchen"]
+        if (kitchen["successes"] != 30 or kitchen["failures"] != 0
+                or kitchen["last_played"] is None):
+            print(f"❌ Unexpected device stats: {kitchen}")
+            return False
+        print("✅ Per-device counters and last-played times recorded")
+        
+        # pygame can only play to the device it opened
+        silencer = AlexaSilencer(clock, backend=FakeBackend(clock), targets=targets)
+        if silencer.initialize_audio():
+            print("❌ Named sinks accepted by a backend without sink support")
+            return False
+        print("✅ Named sinks rejected by a backend without sink support")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Multiple device test failed: {e}")
+        return False
+
+def run_disconnect_trace(trace, duration, adaptive, state_file):
+    """Run a simulated silencer against a trace and return the simulator"""
+    from alexa_silencer import AlexaSilencer, KeepaliveTarget, NullBackend
+    
+    clock = FakeClock()
+    target = KeepaliveTarget("echo", 300)
+    silencer = AlexaSilencer(clock, backend=NullBackend(), targets=[target],
+                             adaptive=adaptive)
+    silencer.adaptive_state_file = state_file
+    simulator = DisconnectSimulator(silencer, target, trace)
+    silencer.scheduler.call_later(duration, silencer.stop)
+    silencer.run_daemon()
+    return simulator
+
+def test_adaptive_interval():
+    """Replay synthetic disconnect traces and compare adaptive with fixed intervals"""
+    try:
+        import json
+        from alexa_silencer import AdaptiveInterval, AlexaSilencer, NullBackend
+        
+        day = 24 * 3600
+        # The device tolerates 15 minutes idle, then a firmware update drops it to 10
+        trace = [(0, 900), (day / 2, 600)]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_file = Path(temp_dir) / "adaptive_intervals.json"
+            fixed = run_disconnect_trace(trace, day, False, state_file)
+            adaptive = run_disconnect_trace(trace, day, True, state_file)
+            
+            if fixed.disconnects != 0:
+                print(f"❌ Fixed 300s interval saw {fixed.disconnects} disconnects")
+                return False
+            if adaptive.disconnects > 2:
+                print(f"❌ Adaptive interval caused {adaptive.disconnects} disconnects")
+                return False
+            saved = fixed.keepalives - adaptive.keepalives
+            if saved <= 0:
+                print("❌ Adaptive interval did not save any keepalives")
+                return False
+            print(f"✅ Simulated day: {adaptive.keepalives} keepalives vs "
+                  f"{fixed.keepalives} fixed ({saved} saved, "
+                  f"{adaptive.disconnects} disconnects while learning)")
+            
+            state = json.loads(state_file.read_text())["echo"]
+            if state["idle_timeout"] != 600 or state["interval"] != 480:
+                print(f"❌ Unexpected persisted state: {state}")
+                return False
+            print("✅ Learned interval persisted to the app data dir")
+            
+            # A restart picks up where the last run left off
+            restarted = run_disconnect_trace([(0, 600)], day, True, state_file)
+            if restarted.disconnects != 0:
+                print(f"❌ Restarted daemon relearned with {restarted.disconnects} disconnects")
+                return False
+            print("✅ Restarted daemon reused the learned interval without disconnects")
+            
+            # With nothing reporting disconnects, the interval would only ever grow
+            silencer = AlexaSilencer(FakeClock(), backend=NullBackend(), adaptive=True)
+            silencer.adaptive_state_file = state_file
+            silencer.scheduler.call_later(3 * 3600, silencer.stop)
+            silencer.run_daemon()
+            if silencer.adaptive or silencer.targets[0].interval != 300:
+                print(f"❌ Adaptive ran without a disconnect source "
+                      f"(interval {silencer.targets[0].interval:.0f}s)")
+                return False
+            print("✅ --adaptive without a disconnect source keeps the fixed interval")
+        
+        bounded = AdaptiveInterval(300, floor=60, ceiling=600)
+        for _ in range(10):
+            bounded.record_survived(bounded.interval)
+        ceiling = bounded.interval
+        floored = AdaptiveInterval(60, floor=60)
+        floored.record_disconnect(70)
+        if ceiling != 600 or floored.interval != 60:
+            print("❌ Interval left the floor/ceiling range")
+            return False
+        print("✅ Interval stays within floor and ceiling")
+        
+        # Switched off 10s after a burst: not an idle timeout, nothing learned
+        if bounded.record_disconnect(10) or bounded.idle_timeout is not None:
+            print(f"❌ Early disconnect learned as an idle timeout: {bounded.to_dict()}")
+            return False
+        print("✅ Disconnects sooner than the last survived interval are not learned")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Adaptive interval test failed: {e}")
+        return False
+
+def test_activity_suppression():
+    """Test that keepalives are skipped while real audio is flowing to the sink"""
+    try:
+        from alexa_silencer import AlexaSilencer, KeepaliveTarget, NullBackend
+        
+        clock = FakeClock()
+        backend = NullBackend()
+        # Music plays to the Echo during the second hour
+        probe = lambda sink: sink == "echo" and 3600 <= clock.now() < 7200
+        silencer = AlexaSilencer(clock, backend=backend,
+                                 targets=[KeepaliveTarget("echo", 300)],
+                                 activity_probe=probe)
+        silencer.scheduler.call_later(3 * 3600, silencer.stop)
+        silencer.run_daemon()
+        
+        activity = silencer.activity
+        if activity.suppressed != 12 or activity.emitted != 24 or backend.bursts != 24:
+            print(f"❌ Expected 12 suppressed and 24 emitted, got "
+                  f"{activity.suppressed} and {activity.emitted}")
+            return False
+        print(f"✅ {activity.suppressed} keepalives suppressed while music played, "
+              f"{activity.emitted} emitted on an idle link")
+        
+        if silencer.get_device_stats()[0]["suppressed"] != 12:
+            print("❌ Per-device suppressed counter not updated")
+            return False
+        print("✅ Per-device suppressed counter updated")
+        
+        # Activity pushed by embedding code defers the next deadline too
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock, backend=NullBackend(),
+                                 targets=[KeepaliveTarget("echo", 300)])
+        silencer.scheduler.call_later(250, lambda: silencer.activity.note_activity("echo"))
+        silencer.scheduler.call_later(600, silencer.stop)
+        silencer.run_daemon()
+        if silencer.activity.suppressed != 1 or silencer.activity.emitted != 2:
+            print("❌ Pushed activity did not defer the keepalive")
+            return False
+        print("✅ Pushed activity deferred the next keepalive")
+        
+        # A probe that takes time must not keep the adaptive interval from growing
+        from alexa_silencer import AdaptiveInterval
+        clock = FakeClock()
+        
+        def slow_probe(sink):
+            clock.time += 0.01  # pactl round trip
+            return False
+        
+        silencer = AlexaSilencer(clock, backend=NullBackend(), adaptive=True,
+                                 activity_probe=slow_probe)
+        silencer.disconnects_reported = True  # the host application reports drops
+        with tempfile.TemporaryDirectory() as temp_dir:
+            silencer.adaptive_state_file = Path(temp_dir) / "adaptive_intervals.json"
+            silencer.scheduler.call_later(6 * 3600, silencer.stop)
+            silencer.run_daemon()
+        if silencer.targets[0].interval <= 300:
+            print(f"❌ Adaptive interval stuck at {silencer.targets[0].interval}s "
+                  "behind a slow activity probe")
+            return False
+        print(f"✅ Adaptive interval grew to {silencer.targets[0].interval:.0f}s "
+              "despite a slow probe")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Activity suppression test failed: {e}")
+        return False
+
+def test_metrics():
+    """Test keepalive instrumentation and the Prometheus/JSON exporters"""
+    try:
+        import json
+        import socket
+        import tracemalloc
+        import urllib.request
+        from alexa_silencer import (AlexaSilencer, Histogram, MetricsServer,
+                                    NullBackend, render_prometheus)
+        
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock, backend=NullBackend())
+        silencer.scheduler.call_later(3600, silencer.stop)
+        silencer.run_daemon()
+        
+        metrics = silencer.get_metrics()
+        if (metrics["tick_lag_seconds"]["count"] != 12
+                or metrics["playback_latency_seconds"]["count"] != 12
+                or metrics["keepalives_emitted"] != 12):
+            print(f"❌ Unexpected metrics after a simulated hour: {metrics}")
+            return False
+        print("✅ Tick lag and playback latency recorded for every keepalive")
+        
+        # Observing must not allocate once the buckets exist
+        histogram = Histogram((0.001, 0.01, 0.1, 1.0))
+        histogram.observe(0.005)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(10000):
+            histogram.observe(0.0001 * (i % 20))
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        if growth > 1024:
+            print(f"❌ Histogram grew by {growth} bytes over 10000 observations")
+            return False
+        print(f"✅ Histogram observations allocate nothing ({growth} bytes over 10000)")
+        
+        text = render_prometheus(metrics)
+        if ('alexa_silencer_tick_lag_seconds_bucket{le="+Inf"} 12' not in text
+                or 'alexa_silencer_keepalives_total{result="emitted"} 12' not in text):
+            print("❌ Prometheus text is missing expected samples")
+            return False
+        print("✅ Prometheus text rendered")
+        
+        device = dict(metrics["devices"][0], name='Echo "Kitchen"\\2\nsink')
+        text = render_prometheus(dict(metrics, devices=[device]))
+        if 'device="Echo \\"Kitchen\\"\\\\2\\nsink"' not in text or "\nsink" in text:
+            print("❌ Label values were not escaped")
+            return False
+        print("✅ Quotes, backslashes and newlines in label values escaped")
+        
+        server = MetricsServer(("127.0.0.1", 0), silencer.get_metrics)
+        server.start()
+        try:
+            host, port = server.address
+            with urllib.request.urlopen(f"http://{host}:{port}/metrics.json", timeout=5) as response:
+                scraped = json.load(response)
+        finally:
+            server.stop()
+        if scraped["keepalives_emitted"] != 12 or server.thread.is_alive():
+            print("❌ HTTP metrics scrape failed or the server did not stop")
+            return False
+        print("✅ Metrics served over local HTTP")
+        
+        if hasattr(socket, "AF_UNIX"):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                socket_path = os.path.join(temp_dir, "metrics.sock")
+                server = MetricsServer(socket_path, silencer.get_metrics)
+                server.start()
+                try:
+                    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                        client.settimeout(5)
+                        client.connect(socket_path)
+                        client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+                        response = b""
+                        while True:
+                            chunk = client.recv(65536)
+                            if not chunk:
+                                break
+                            response += chunk
+                finally:
+                    server.stop()
+                if b"alexa_silencer_scheduler_wakeups_total" not in response:
+                    print("❌ Unix socket scrape failed")
+                    return False
+                print("✅ Metrics served over a Unix socket")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Metrics test failed: {e}")
+        return False
+
+def test_logging_pipeline():
+    """Test queued logging with repeat suppression and compressed rotation"""
+    try:
+        import gzip
+        import logging
+        from alexa_silencer import LogPipeline
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = Path(temp_dir) / "alexa_silencer.log"
+            logger = logging.getLogger("alexa_silencer_test_pipeline")
+            logger.propagate = False
+            pipeline = LogPipeline(log_file, max_bytes=4096, backup_count=3).install(logger)
+            
+            for _ in range(500):
+                logger.error("Failed to play silent audio: device unavailable")
+            for i in range(200):
+                logger.info(f"Silent audio played successfully ({i})")
+            logger.debug("not written at INFO level")
+            pipeline.stop()
+            
+            rotated = sorted(Path(temp_dir).glob("alexa_silencer.log.*.gz"))
+            if not rotated or len(rotated) > 3:
+                print(f"❌ Expected 1-3 compressed backups, found {len(rotated)}")
+                return False
+            print(f"✅ Log rotated into {len(rotated)} gzip backups")
+            
+            text = "".join(gzip.open(path, "rt").read() for path in reversed(rotated))
+            text += log_file.read_text()
+            failures = text.count("ERROR - Failed to play silent audio")
+            if failures != 1 or "repeated 499 more times" not in text:
+                print(f"❌ Repeated failure written {failures} times")
+                return False
+            print("✅ 500 identical failures collapsed into one line and a count")
+            
+            if "(199)" not in text or "not written" in text:
+                print("❌ Distinct messages lost or level not applied")
+                return False
+            print("✅ Distinct messages kept and the level honoured")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Logging pipeline test failed: {e}")
+        return False
+
+def test_control_socket():
+    """Test status, pause, resume, ping-now and set-interval over the control socket"""
+    try:
+        import threading
+        from alexa_silencer import AlexaSilencer, NullBackend, send_control_command
+        
+        if sys.platform == "win32":
+            print("⚠️  Skipping control socket test on Windows")
+            return True
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            address = os.path.join(temp_dir, "control.sock")
+            backend = NullBackend()
+            silencer = AlexaSilencer(backend=backend)
+            silencer.control_address = address
+            daemon = threading.Thread(target=silencer.run_daemon, daemon=True)
+            daemon.start()
+            
+            deadline = time.monotonic() + 5
+            while silencer.control_server is None or not os.path.exists(address):
+                if time.monotonic() > deadline:
+                    print("❌ Control socket never came up")
+                    return False
+                time.sleep(0.01)
+            if os.stat(address).st_mode & 0o077:
+                print("❌ Control socket is accessible to other users")
+                return False
+            
+            status = send_control_command({"command": "status"}, address)
+            if not status["ok"] or not status["running"] or len(status["devices"]) != 1:
+                print(f"❌ Unexpected status: {status}")
+                return False
+            print("✅ Status reported over the control socket")
+            
+            send_control_command({"command": "pause"}, address)
+            if not send_control_command({"command": "status"}, address)["paused"]:
+                print("❌ Daemon did not pause")
+                return False
+            bursts = backend.bursts
+            send_control_command({"command": "resume"}, address)
+            time.sleep(0.2)
+            if backend.bursts != bursts + 1:
+                print("❌ Resume did not send a keepalive right away")
+                return False
+            print("✅ Pause and resume")
+            
+            send_control_command({"command": "ping-now"}, address)
+            time.sleep(0.2)
+            if backend.bursts != bursts + 2:
+                print("❌ ping-now did not send a keepalive")
+                return False
+            
+            response = send_control_command({"command": "set-interval", "value": "120"}, address)
+            next_in = send_control_command({"command": "status"}, address)["devices"][0]["next_keepalive_in"]
+            if not response["ok"] or silencer.targets[0].interval != 120 or not 100 < next_in <= 120:
+                print(f"❌ set-interval not applied: {response}, next in {next_in}")
+                return False
+            print("✅ ping-now and set-interval applied without a restart")
+            
+            bad = send_control_command({"command": "set-interval", "value": "soon"}, address)
+            unknown = send_control_command({"command": "ping-now", "target": "nope"}, address)
+            if bad["ok"] or unknown["ok"]:
+                print("❌ Invalid requests were accepted")
+                return False
+            print("✅ Invalid requests rejected with an error")
+            
+            silencer.stop()
+            daemon.join(timeout=5)
+            if daemon.is_alive() or os.path.exists(address):
+                print("❌ Daemon did not shut down or left its socket behind")
+                return False
+            print("✅ Control socket removed on shutdown")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Control socket test failed: {e}")
+        return False
+
+def test_asyncio_daemon():
+    """Test run_async() sharing an event loop with other coroutines"""
+    try:
+        import asyncio
+        from alexa_silencer import AlexaSilencer, NullBackend, send_control_command
+        
+        clock = FakeClock()
+        backend = NullBackend()
+        silencer = AlexaSilencer(clock, backend=backend)
+        silencer.scheduler.call_later(3600, silencer.stop)
+        neighbour_turns = 0
+        
+        async def neighbour(daemon):
+            nonlocal neighbour_turns
+            while not daemon.done():
+                neighbour_turns += 1
+                await asyncio.sleep(0)
+        
+        async def simulated_hour():
+            daemon = asyncio.ensure_future(silencer.run_async())
+            await asyncio.gather(daemon, neighbour(daemon))
+        
+        asyncio.run(simulated_hour())
+        if backend.bursts != 12 or silencer.running or not neighbour_turns:
+            print(f"❌ Expected 12 keepalives alongside another coroutine, got {backend.bursts}")
+            return False
+        print(f"✅ 12 keepalives over a simulated hour; neighbour coroutine ran {neighbour_turns} times")
+        
+        if sys.platform == "win32":
+            return True
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            control = os.path.join(temp_dir, "control.sock")
+            metrics = os.path.join(temp_dir, "metrics.sock")
+            silencer = AlexaSilencer(backend=NullBackend())
+            silencer.control_address = control
+            silencer.metrics_address = metrics
+            
+            async def embedded():
+                daemon = asyncio.ensure_future(silencer.run_async())
+                while silencer.control_server is None:
+                    await asyncio.sleep(0.01)
+                status = await asyncio.to_thread(send_control_command,
+                                                 {"command": "status"}, control)
+                reader, writer = await asyncio.open_unix_connection(metrics)
+                writer.write(b"GET /metrics.json HTTP/1.0\r\n\r\n")
+                scrape = await reader.read()
+                writer.close()
+                daemon.cancel()
+                try:
+                    await daemon
+                except asyncio.CancelledError:
+                    pass
+                return status, scrape
+            
+            status, scrape = asyncio.run(embedded())
+            if not status["ok"] or not status["running"]:
+                print(f"❌ Control request over the asyncio server failed: {status}")
+                return False
+            if b"200 OK" not in scrape or b"keepalives_emitted" not in scrape:
+                print("❌ Metrics scrape over the asyncio server failed")
+                return False
+            print("✅ Control and metrics served by coroutines on the same loop")
+            
+            if silencer.running or os.path.exists(control) or os.path.exists(metrics):
+                print("❌ Cancelling the task did not clean up")
+                return False
+            print("✅ Cancelling the daemon task shuts it down cleanly")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ asyncio daemon test failed: {e}")
+        return False
+
+def test_keepalive_session():
+    """Test many library sessions sharing one scheduler and one audio device"""
+    try:
+        import logging
+        import threading
+        import alexa_silencer
+        from alexa_silencer import (AudioSession, KeepaliveSession, KeepaliveTarget,
+                                    NullBackend, Scheduler)
+        
+        root_handlers = list(logging.root.handlers)
+        log_pipeline = alexa_silencer._log_pipeline
+        
+        clock = FakeClock()
+        scheduler = Scheduler(clock)
+        backend = FakeBackend(clock)
+        audio = AudioSession(backend, scheduler, 22050, 1)
+        sessions = [KeepaliveSession([KeepaliveTarget(interval=300, name=f"device{i}")],
+                                     scheduler=scheduler, audio=audio)
+                    for i in range(50)]
+        for session in sessions:
+            session.start()
+        scheduler.call_later(3600, scheduler.stop)
+        scheduler.run()
+        
+        if backend.opens != 1:
+            print(f"❌ Shared audio opened {backend.opens} times")
+            return False
+        emitted = {session.activity.emitted for session in sessions}
+        if emitted != {12} or sessions[0].targets[0].successes != 12:
+            print(f"❌ Expected 12 keepalives per session, got {emitted}")
+            return False
+        print("✅ 50 sessions on one scheduler thread and one audio device")
+        
+        if len(sessions[0].tick()) != 1:
+            print("❌ tick() did not run a keepalive")
+            return False
+        for session in sessions:
+            session.stop()
+        if not audio.available or audio.recovery_listeners:
+            print("❌ Stopping a session released the shared audio device")
+            return False
+        print("✅ Stopping sessions leaves shared resources to their owner")
+        
+        if logging.root.handlers != root_handlers or alexa_silencer._log_pipeline is not log_pipeline:
+            print("❌ Sessions changed the logging configuration")
+            return False
+        print("✅ No logging configuration touched")
+        
+        with KeepaliveSession(backend=NullBackend()) as session:
+            deadline = time.monotonic() + 5
+            while session.targets[0].successes < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        if session.targets[0].successes != 1 or session.audio.backend is not None:
+            print("❌ Context-managed session did not play once and release audio")
+            return False
+        print("✅ Context manager starts a background session and releases it on exit")
+        
+        session.start()
+        deadline = time.monotonic() + 5
+        while session.targets[0].successes < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if session.targets[0].successes != 2 or session.activity.emitted != 2:
+            session.stop()
+            print("❌ A stopped session did not play again after start()")
+            return False
+        print("✅ A stopped session can be started again")
+        
+        threads = []
+        keepalive = session.keepalive
+        session.keepalive = (lambda target: threads.append(threading.current_thread())
+                             or keepalive(target))
+        futures = session.tick()
+        futures[0].result(timeout=5)
+        session.stop()
+        if len(threads) != 1 or threads[0].name != "keepalive":
+            print(f"❌ tick() ran on {threads[0].name}, not the scheduler thread")
+            return False
+        print("✅ tick() on a running session runs on its scheduler thread")
+        
+        with alexa_silencer.AlexaSilencer(backend=NullBackend()) as silencer:
+            thread = silencer._thread
+            deadline = time.monotonic() + 5
+            while silencer.targets[0].successes < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        thread.join(timeout=5)
+        if thread.is_alive() or silencer._thread is not None or silencer.audio.backend is not None:
+            print("❌ Context-managed AlexaSilencer left its thread or audio behind")
+            return False
+        print("✅ AlexaSilencer used as a session joins its thread and releases audio")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ KeepaliveSession test failed: {e}")
+        return False
+
+def test_config_reload():
+    """Test config precedence, validation and hot reload into a running daemon"""
+    try:
+        import json
+        from alexa_silencer import AlexaSilencer, Config
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            toml_file = Path(temp_dir) / "config.toml"
+            toml_file.write_text('interval = 200\nburst_ms = 5\nlog_level = "warning"\n')
+            try:
+                import tomllib
+            except ImportError:
+                tomllib = None
+            if tomllib is not None:
+                config = Config.load(toml_file, {"log_level": "DEBUG"},
+                                     environ={"ALEXA_SILENCER_INTERVAL": "250"})
+                if (config.interval, config.burst_ms, config.log_level) != (250, 5, "DEBUG"):
+                    print(f"❌ Wrong precedence: {config.to_dict()}")
+                    return False
+                print("✅ Command line beats environment beats config file")
+            
+            for bad in ({"interval": -1}, {"buffer": "large"}, {"intervall": 60}):
+                try:
+                    Config(**bad)
+                except ValueError:
+                    continue
+                print(f"❌ Invalid setting accepted: {bad}")
+                return False
+            print("✅ Invalid and unknown settings rejected")
+            
+            config_file = Path(temp_dir) / "config.json"
+            
+            def write_config(values, stamp):
+                config_file.write_text(json.dumps(values))
+                os.utime(config_file, (stamp, stamp))
+            
+            write_config({"interval": 300, "buffer": 512}, 1)
+            clock = FakeClock()
+            backend = FakeBackend(clock)
+            silencer = AlexaSilencer.from_config(Config.load(config_file, environ={}),
+                                                 clock, backend=backend)
+            silencer.config_file = config_file
+            scheduler = silencer.scheduler
+            played = []
+            play = silencer.play_silent_audio
+            silencer.play_silent_audio = (lambda target=None, tick_started=None:
+                                          played.append(clock.now())
+                                          or play(target, tick_started))
+            
+            scheduler.call_later(1000, lambda: write_config(
+                {"interval": 120, "buffer": 1024, "burst_ms": 5}, 2))
+            scheduler.call_later(2000, lambda: write_config({"interval": "soon"}, 3))
+            scheduler.call_later(3600, silencer.stop)
+            silencer.run_daemon()
+            
+            gaps = {round(b - a) for a, b in zip(played, played[1:])}
+            if played[:4] != [0, 300, 600, 900] or gaps != {120, 300} or played[4] != 1020:
+                print(f"❌ Interval change not applied on the fly: {played}")
+                return False
+            print("✅ Interval change picked up within one poll, keeping the cadence")
+            
+            if (backend.opens != 2 or silencer.audio.backend_options["buffer"] != 1024
+                    or silencer.silence_duration != 0.005):
+                print("❌ Audio settings not applied on reload")
+                return False
+            print("✅ Buffer change reopened the backend without a restart")
+            
+            if silencer.interval != 120 or silencer.targets[0].interval != 120:
+                print("❌ Invalid config was applied")
+                return False
+            print("✅ Invalid edit ignored; previous settings kept")
+            
+            # A backend that is not available here is refused; one that fails
+            # to open is retried like a lost device
+            from alexa_silencer import PipeBackend
+            write_config({"buffer": 512}, 4)
+            clock = FakeClock()
+            backend = FakeBackend(clock)
+            silencer = AlexaSilencer.from_config(Config.load(config_file, environ={}),
+                                                 clock, backend=backend)
+            silencer.config_file = config_file
+            scheduler = silencer.scheduler
+            pipe_available = PipeBackend.available
+            PipeBackend.available = classmethod(lambda cls: False)
+            try:
+                scheduler.call_later(100, lambda: write_config({"backend": "pipe"}, 5))
+                scheduler.call_later(1000, lambda: setattr(backend, "fail_opens", 2))
+                scheduler.call_later(1000, lambda: write_config({"buffer": 2048}, 6))
+                scheduler.call_later(3600, silencer.stop)
+                silencer.run_daemon()
+            finally:
+                PipeBackend.available = pipe_available
+            
+            audio = silencer.audio
+            if silencer.config.backend != "auto" or audio.recoveries != 1:
+                print(f"❌ Reload left the daemon without audio: backend "
+                      f"{silencer.config.backend}, {audio.recoveries} recoveries")
+                return False
+            # 12 ticks plus the keepalive sent on recovery
+            if silencer.targets[0].failures or silencer.targets[0].successes != 13:
+                print(f"❌ Keepalives failed after the reload: {silencer.targets[0].stats()}")
+                return False
+            print("✅ Unavailable backend refused; failed reopen recovered with backoff")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Config reload test failed: {e}")
+        return False
+
+def test_shared_daemon():
+    """Test single-instance enforcement and client registration with the running daemon"""
+    try:
+        import threading
+        from alexa_silencer import (AlexaSilencer, InstanceLock, KeepaliveTarget,
+                                    NullBackend, REGISTRATION_LEASE, send_control_command)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_file = Path(temp_dir) / "alexa_silencer.lock"
+            first, second = InstanceLock(lock_file), InstanceLock(lock_file)
+            if not first.acquire() or second.acquire():
+                print("❌ Lock file did not exclude a second instance")
+                return False
+            first.release()
+            if not second.acquire():
+                print("❌ Lock not released")
+                return False
+            second.release()
+            print("✅ Lock file allows one instance at a time")
+        
+        # Leases expire if a client stops renewing
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock, backend=NullBackend())
+        silencer.register_client("alice:1", [["bt_sink", 60]])
+        silencer.register_client("bob:2", [["bt_sink", 120], [None, 300]])
+        target = silencer.find_target("bt_sink")
+        if target is None or set(target.clients) != {"alice:1", "bob:2"} or target.interval != 60:
+            print("❌ Registrations not merged onto one target")
+            return False
+        silencer.scheduler.call_later(REGISTRATION_LEASE + 1, silencer.stop)
+        silencer.run_daemon()
+        if silencer.find_target("bt_sink") is not None or silencer.registrations:
+            print("❌ Expired registrations not dropped")
+            return False
+        print("✅ Clients share one target; unrenewed leases expire")
+        
+        # A client only lowers a configured interval while it is registered
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock, backend=NullBackend())
+        default = silencer.targets[0]
+        silencer.register_client("alice:1", [[None, 60]])
+        silencer.register_client("bob:2", [[None, 120]])
+        lowered = default.interval
+        silencer.unregister_client("alice:1")
+        after_alice = default.interval
+        silencer.control_set_interval([default], 600)
+        after_set = default.interval
+        silencer.scheduler.call_later(REGISTRATION_LEASE + 1, silencer.stop)
+        silencer.run_daemon()
+        if (lowered, after_alice, after_set, default.interval) != (60, 120, 120, 600):
+            print(f"❌ Client intervals outlived their registration: {lowered}, "
+                  f"{after_alice}, {after_set}, {default.interval}")
+            return False
+        print("✅ Client intervals are restored on unregister and lease expiry")
+        
+        # Anything another local user sends is validated before it reaches the scheduler
+        silencer = AlexaSilencer(FakeClock(), backend=NullBackend())
+        for targets in ([["evil", 1e-6]], [["n", float("nan")]], [["i", float("inf")]],
+                        [["sink\nfake 1", 60]], [[["sink"], 60]], [["b", True]]):
+            reply = silencer.control_reply({"command": "register", "client": "mallory:1",
+                                            "targets": targets})
+            if reply["ok"] or silencer.registrations:
+                print(f"❌ Accepted an invalid registration: {targets}")
+                return False
+        if silencer.control_reply({"command": "register", "client": "m\x1b[2J",
+                                   "targets": []})["ok"]:
+            print("❌ Accepted a client name with control characters")
+            return False
+        print("✅ Non-finite, too short and non-string registrations refused")
+        
+        # Client names are bound to the caller's uid on the shared socket
+        silencer.handle_control_request = silencer.control_reply  # no scheduler thread here
+        request = {"command": "register", "client": "bob:2", "targets": [["bt_sink", 60]]}
+        registered = silencer.handle_shared_request(request, peer_uid=1000)
+        silencer.handle_shared_request({"command": "unregister", "client": "bob:2"},
+                                       peer_uid=1001)
+        if not registered["ok"] or silencer.find_target("bt_sink") is None:
+            print("❌ Another user withdrew a registration")
+            return False
+        silencer.handle_shared_request({"command": "unregister", "client": "bob:2"},
+                                       peer_uid=1000)
+        if silencer.find_target("bt_sink") is not None:
+            print("❌ The owner could not withdraw its registration")
+            return False
+        print("✅ Only the registering user can withdraw a registration")
+        
+        # A backend that ignores sink names cannot take a named sink
+        backend = FakeBackend(FakeClock())
+        silencer = AlexaSilencer(backend.clock, backend=backend)
+        silencer.initialize_audio()
+        reply = silencer.control_reply({"command": "register", "client": "carol:3",
+                                        "targets": [["bt_sink", 60]]})
+        if reply["ok"] or silencer.find_target("bt_sink") is not None:
+            print("❌ Named sink registered on a backend without sink support")
+            return False
+        if not silencer.control_reply({"command": "register", "client": "carol:3",
+                                       "targets": [[None, 60]]})["ok"]:
+            print("❌ Default output refused on a backend without sink support")
+            return False
+        silencer.cleanup()
+        print("✅ Named sinks refused on a backend that cannot play to them")
+        
+        if not sys.platform.startswith("linux"):
+            return True
+        
+        address = f"@alexa-silencer-test-{os.getpid()}"
+        daemon = AlexaSilencer(backend=NullBackend())
+        daemon.single_instance = True
+        daemon.instance_address = address
+        daemon_thread = threading.Thread(target=daemon.run_daemon, daemon=True)
+        daemon_thread.start()
+        
+        client = AlexaSilencer(backend=NullBackend(), targets=[KeepaliveTarget("bt_sink", 120)])
+        client.single_instance = True
+        client.instance_address = address
+        deadline = time.monotonic() + 5
+        while daemon.instance_server is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client_thread = threading.Thread(target=client.run_daemon, daemon=True)
+        client_thread.start()
+        
+        while daemon.find_target("bt_sink") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        registered = daemon.find_target("bt_sink")
+        if registered is None or client.audio.backend is not None or client.instance_server:
+            print("❌ Second instance did not register as a client")
+            return False
+        print("✅ Second instance registered its sink instead of opening a mixer")
+        
+        refused = send_control_command({"command": "pause"}, address)
+        if refused["ok"]:
+            print("❌ Shared socket accepted a privileged command")
+            return False
+        
+        client.stop()
+        client_thread.join(timeout=5)
+        if daemon.find_target("bt_sink") is not None:
+            print("❌ Client target kept after it exited")
+            return False
+        print("✅ Client registration withdrawn on exit")
+        
+        # A socket held by an untrusted uid is not registered with
+        standalone = AlexaSilencer(backend=NullBackend(), targets=[KeepaliveTarget("bt_sink")])
+        standalone.single_instance = True
+        standalone.instance_address = address
+        standalone.trusted_daemon_uids = {os.getuid() + 1}
+        standalone_thread = threading.Thread(target=standalone.run_daemon, daemon=True)
+        standalone_thread.start()
+        deadline = time.monotonic() + 5
+        while standalone.audio.backend is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if standalone.audio.backend is None or daemon.find_target("bt_sink") is not None:
+            print("❌ Client registered with a daemon run by an untrusted uid")
+            return False
+        standalone.stop()
+        standalone_thread.join(timeout=5)
+        print("✅ A squatter's socket is refused; the client runs standalone")
+        
+        # Without os.getuid (Windows), the owner check is skipped rather than crashing
+        getuid, username = os.getuid, os.environ.get("USERNAME")
+        del os.getuid
+        os.environ["USERNAME"] = "windows-user"  # what getpass reads on Windows
+        try:
+            clock = FakeClock()
+            windows = AlexaSilencer(clock, backend=NullBackend(),
+                                    targets=[KeepaliveTarget("bt_sink", 120)])
+            windows.single_instance = True
+            windows.instance_address = address
+            seen = []
+            windows.scheduler.call_later(
+                100, lambda: seen.append(daemon.find_target("bt_sink") is not None))
+            windows.scheduler.call_later(200, windows.stop)
+            windows.run_daemon()
+        finally:
+            os.getuid = getuid
+            if username is None:
+                del os.environ["USERNAME"]
+            else:
+                os.environ["USERNAME"] = username
+        if seen != [True] or windows.audio.backend is not None:
+            print("❌ Client without os.getuid did not register")
+            return False
+        print("✅ Clients register without uid checks where the OS has no uids")
+        
+        # A client whose daemon dies claims the instance and takes over
+        clock = FakeClock()
+        survivor = AlexaSilencer(clock, backend=NullBackend(),
+                                 targets=[KeepaliveTarget("bt_sink", 120)])
+        survivor.single_instance = True
+        survivor.instance_address = address
+        states = {}
+        
+        def kill_daemon():
+            deadline = time.monotonic() + 5
+            while daemon.find_target("bt_sink") is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            states["registered"] = daemon.find_target("bt_sink") is not None
+            daemon.stop()
+            daemon_thread.join(timeout=5)
+        
+        def check_owner():
+            states["owner"] = survivor.instance_server is not None
+            survivor.stop()
+        
+        survivor.scheduler.call_later(500, kill_daemon)
+        survivor.scheduler.call_later(1000, check_owner)
+        survivor.run_daemon()
+        if daemon_thread.is_alive():
+            print("❌ Daemon did not stop")
+            return False
+        # Renewal at 600 fails and takes over; ticks at 600, 720, 840 and 960
+        if (not states.get("registered") or not states.get("owner")
+                or survivor.targets[0].successes != 4):
+            print(f"❌ Client did not take over from the dead daemon: {states}, "
+                  f"{survivor.targets[0].stats()}")
+            return False
+        print("✅ A client takes over when the running daemon goes away")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Shared daemon test failed: {e}")
+        return False
+
+def test_scheduler_fake_clock():
+    """Test that the scheduler only wakes at keepalive deadlines over a simulated hour"""
+    try:
+        from alexa_silencer import Scheduler
+        
+        clock = FakeClock()
+        scheduler = Scheduler(clock)
+        ticks = []
+        
+        scheduler.call_every(300, lambda: ticks.append(clock.now()), name="keepalive")
+        scheduler.call_later(3600, scheduler.stop, name="shutdown")
+        
+        cpu_start = time.process_time()
+        scheduler.run()
+        cpu_used = time.process_time() - cpu_start
+        
+        expected_ticks = [i * 300.0 for i in range(12)]
+        if ticks != expected_ticks:
+            print(f"❌ Unexpected tick times: {ticks}")
+            return False
+        print(f"✅ {len(ticks)} keepalive ticks at 5 minute deadlines")
+        
+        # One wakeup per deadline, none in between
+        if scheduler.wakeups != 12 or clock.waits != 12:
+            print(f"❌ Expected 12 wakeups, got {scheduler.wakeups}")
+            return False
+        print(f"✅ {scheduler.wakeups} wakeups over a simulated hour")
+        
+        if cpu_used > 0.5:
+            print(f"❌ Scheduler used {cpu_used:.3f}s of CPU")
+            return False
+        print(f"✅ CPU time for a simulated hour: {cpu_used * 1000:.2f} ms")
+        
+        # Signal handlers wake the loop at any point of its wait/clear cycle;
+        # a threading.Event there deadlocks within a few thousand signals
+        import faulthandler
+        import signal
+        if hasattr(signal, "setitimer"):
+            scheduler = Scheduler()
+            signals = []
+            
+            def handler(signum, frame):
+                signals.append(signum)
+                scheduler.wake()
+                if len(signals) >= 50000:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                    scheduler.stop()
+            
+            previous = signal.signal(signal.SIGALRM, handler)
+            faulthandler.dump_traceback_later(60, exit=True)  # fail rather than hang
+            try:
+                scheduler.call_every(0.0001, lambda: None, name="busy")
+                signal.setitimer(signal.ITIMER_REAL, 0.00002, 0.00002)
+                scheduler.run()
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+                faulthandler.cancel_dump_traceback_later()
+            if len(signals) < 50000 or not scheduler.stopped:
+                print(f"❌ Stopped after {len(signals)} signals")
+                return False
+            print(f"✅ {len(signals)} signals woke the scheduler without deadlocking it")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Scheduler test failed: {e}")
+        return False
+
+def test_daemon_lifecycle():
+    """Test the full daemon lifecycle over a simulated week with a device loss"""
+    try:
+        days = 7
+        harness = DaemonHarness(interval=300)
+        silencer = harness.silencer
+        # The speaker vanishes on day 3 and comes back on the third reopen attempt
+        harness.at(2 * 86400 + 100, lambda: harness.lose_device(failed_reopens=2))
+        
+        wall_start = time.perf_counter()
+        cpu_used = harness.run(days * 86400)
+        wall = time.perf_counter() - wall_start
+        
+        ticks = harness.ticks[silencer.targets[0].name]
+        if len(ticks) != days * 86400 // 300:
+            print(f"❌ Expected {days * 86400 // 300} ticks, got {len(ticks)}")
+            return False
+        drift = harness.max_drift(silencer.targets[0].name, 300)
+        if drift > 1e-6:
+            print(f"❌ Ticks drifted by {drift:.6f}s")
+            return False
+        print(f"✅ {len(ticks)} ticks over {days} virtual days with no drift "
+              f"({wall * 1000:.0f} ms wall, {cpu_used * 1000:.0f} ms CPU)")
+        
+        audio = silencer.audio
+        if audio.recoveries != 1 or audio.reinit_count != 3:
+            print(f"❌ Expected one recovery after 3 attempts, got {audio.recoveries} "
+                  f"recoveries and {audio.reinit_count} attempts")
+            return False
+        stats = silencer.get_device_stats()[0]
+        if stats["failures"] != 1 or stats["successes"] != len(ticks):
+            print(f"❌ Unexpected device counters: {stats}")
+            return False
+        print("✅ Device loss recovered on the third attempt; the missed tick was replayed")
+        
+        # Shutdown released everything that was opened
+        backend = harness.backend
+        if backend.closes != backend.opens or audio.backend is not None:
+            print(f"❌ Backend opened {backend.opens} times but closed {backend.closes}")
+            return False
+        if silencer.running or silencer.control_server or silencer.metrics_server:
+            print("❌ cleanup() left the daemon running")
+            return False
+        print(f"✅ cleanup() closed the backend ({backend.opens} opens, "
+              f"{backend.closes} closes)")
+        
+        if wall > 10:
+            print(f"❌ A simulated week took {wall:.1f}s")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Daemon lifecycle test failed: {e}")
+        return False
+
+PREPARE_FOR_SLEEP_SAMPLE = """\
+signal time=1712345600.0 sender=org.freedesktop.DBus -> destination=:1.90 serial=2 path=/org/freedesktop/DBus; interface=org.freedesktop.DBus; member=NameAcquired
+   string ":1.90"
+signal time=1712345678.1 sender=:1.2 -> destination=(null destination) serial=310 path=/org/freedesktop/login1; interface=org.freedesktop.login1.Manager; member=PrepareForSleep
+   boolean true
+signal time=1712349999.5 sender=:1.2 -> destination=(null destination) serial=311 path=/org/freedesktop/login1; interface=org.freedesktop.login1.Manager; member=PrepareForSleep
+   boolean false
+"""
+
+def test_drift_and_resume():
+    """Test that ticks stay on their grid, missed ticks coalesce and resume catches up"""
+    try:
+        from alexa_silencer import Scheduler
+        
+        # Every wakeup arrives 50 ms late; the lateness must not accumulate
+        clock = FakeClock(latency=0.05)
+        scheduler = Scheduler(clock)
+        ticks = []
+        scheduler.call_every(300, lambda: ticks.append(clock.now()), name="keepalive")
+        scheduler.call_later(86400, scheduler.stop, name="shutdown")
+        scheduler.run()
+        drift = max(abs(tick - i * 300) for i, tick in enumerate(ticks))
+        if len(ticks) != 288 or drift > 0.05 + 1e-6 or scheduler.late:
+            print(f"❌ {len(ticks)} ticks drifted by up to {drift:.3f}s")
+            return False
+        print(f"✅ 288 ticks over a day stayed within {drift * 1000:.0f} ms of their grid")
+        
+        # A stall of 1000s coalesces the missed slots into one run on the same grid
+        clock = FakeClock()
+        scheduler = Scheduler(clock)
+        ticks = []
+        scheduler.call_every(300, lambda: ticks.append(clock.now()), name="keepalive")
+        scheduler.call_later(100, lambda: setattr(clock, "time", clock.time + 1000))
+        scheduler.call_later(1600, scheduler.stop, name="shutdown")
+        scheduler.run()
+        if ticks != [0, 1100, 1200, 1500] or scheduler.missed != 2 or scheduler.late != 1:
+            print(f"❌ Unexpected ticks after a stall: {ticks} "
+                  f"(missed {scheduler.missed}, late {scheduler.late})")
+            return False
+        print("✅ Two missed ticks coalesced into one late tick; the grid was kept")
+        
+        # A suspend in the middle of a sleep sends a keepalive right after resume
+        harness = DaemonHarness(interval=300)
+        harness.silencer.memory_check_interval = 0  # count only the keepalive job
+        harness.at(1000, lambda: harness.clock.suspend(2000))
+        harness.run(4000)
+        ticks = harness.ticks[harness.silencer.targets[0].name]
+        metrics = harness.silencer.get_metrics()
+        if ticks != [0, 300, 600, 900, 3000, 3300, 3600, 3900]:
+            print(f"❌ Unexpected ticks around the suspend: {ticks}")
+            return False
+        if (metrics["resumes"], metrics["ticks_late"], metrics["ticks_missed"]) != (1, 1, 6):
+            print(f"❌ Unexpected resume counters: {metrics}")
+            return False
+        print("✅ Keepalive sent on resume; 6 missed ticks counted and coalesced")
+        
+        # A suspend during the wait for the tick at 1200: logind's resume
+        # signal wakes the daemon at once; without it the daemon sleeps out
+        # the 200s left of that wait first
+        for notify, expected in ((True, [0, 300, 600, 900, 3000, 3300]),
+                                 (False, [0, 300, 600, 900, 3200])):
+            harness = DaemonHarness(interval=300)
+            harness.silencer.memory_check_interval = 0
+            harness.clock.suspend_during_wait(
+                1000, 2000, harness.logind.resumed if notify else None)
+            harness.run(3500)
+            ticks = harness.ticks[harness.silencer.targets[0].name]
+            if ticks != expected:
+                print(f"❌ Unexpected ticks around a suspend during a wait "
+                      f"(logind {notify}): {ticks}")
+                return False
+            if not harness.logind.closed:
+                print("❌ Resume watcher not stopped")
+                return False
+        print("✅ Resume during a wait sends the keepalive at once via logind")
+        
+        from alexa_silencer import parse_prepare_for_sleep
+        events = list(parse_prepare_for_sleep(PREPARE_FOR_SLEEP_SAMPLE.splitlines()))
+        if events != [True, False]:
+            print(f"❌ Unexpected PrepareForSleep events: {events}")
+            return False
+        print("✅ PrepareForSleep parsed from dbus-monitor output")
+        
+        from alexa_silencer import Clock
+        if Clock()._timeout(300) != 300 or Clock(resume_poll=30)._timeout(300) != 30:
+            print("❌ Waits capped without resume_poll, or not capped with it")
+            return False
+        print("✅ Waits last until the next deadline unless resume_poll is set")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Drift and resume test failed: {e}")
+        return False
+
+def test_systemd_notify():
+    """Test READY/WATCHDOG/STATUS/STOPPING against a fake NOTIFY_SOCKET"""
+    if not hasattr(__import__("socket"), "AF_UNIX"):
+        print("⚠️  Skipping: no Unix sockets on this platform")
+        return True
+    try:
+        import socket
+        from alexa_silencer import SystemdNotifier
+        
+        disabled = SystemdNotifier(environ={})
+        if disabled.enabled or disabled.ready("up"):
+            print("❌ Notifier sent without NOTIFY_SOCKET")
+            return False
+        other_pid = SystemdNotifier(environ={"NOTIFY_SOCKET": "@x", "WATCHDOG_USEC": "1000000",
+                                             "WATCHDOG_PID": "1"})
+        if other_pid.watchdog_interval is not None:
+            print("❌ Watchdog enabled for another process's WATCHDOG_PID")
+            return False
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "notify")
+            systemd = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            systemd.bind(path)
+            systemd.setblocking(False)
+            
+            harness = DaemonHarness(interval=300)
+            silencer = harness.silencer
+            silencer.notifier = SystemdNotifier(
+                environ={"NOTIFY_SOCKET": path, "WATCHDOG_USEC": "60000000"})
+            messages = []
+            
+            def receive():
+                while True:
+                    try:
+                        messages.append(systemd.recv(4096).decode())
+                    except BlockingIOError:
+                        return
+            
+            # Read as systemd would, before the datagram queue fills up
+            silencer.scheduler.call_every(10, receive, first_delay=1, name="systemd")
+            # The speaker vanishes for the tick at 600s and returns at once
+            harness.at(599, lambda: harness.lose_device())
+            harness.run(1000)
+            receive()
+            systemd.close()
+        
+        if not messages[0].startswith("READY=1\nSTATUS=Keeping 1 target(s) awake"):
+            print(f"❌ First message was not READY: {messages[:1]}")
+            return False
+        print("✅ READY=1 sent after the backend initialized")
+        
+        heartbeats = messages.count("WATCHDOG=1")
+        statuses = [message for message in messages if message.startswith("STATUS=Keepalive")]
+        # Ticks at 0, 300, 600 (failed), the recovery at 600 and 900, plus one every 30s
+        if heartbeats != 4 + 33 or len(statuses) != 5:
+            print(f"❌ Expected 37 heartbeats and 5 tick statuses, got {heartbeats} "
+                  f"and {len(statuses)}")
+            return False
+        if not any("failed" in status for status in statuses):
+            print("❌ Failed keepalive was not reported in STATUS")
+            return False
+        print(f"✅ {heartbeats} watchdog heartbeats; STATUS carried tick latency: "
+              f"{statuses[0][7:]}")
+        
+        if messages[-1] != "STOPPING=1":
+            print(f"❌ Last message was not STOPPING: {messages[-1]}")
+            return False
+        print("✅ STOPPING=1 sent on shutdown")
+        
+        # A device that never comes back stops the heartbeats after the grace period
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "notify")
+            systemd = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            systemd.bind(path)
+            systemd.setblocking(False)
+            harness = DaemonHarness(interval=300)
+            silencer = harness.silencer
+            silencer.notifier = SystemdNotifier(
+                environ={"NOTIFY_SOCKET": path, "WATCHDOG_USEC": "60000000"})
+            heartbeats = []
+            
+            def count():
+                while True:
+                    try:
+                        if systemd.recv(4096) == b"WATCHDOG=1":
+                            heartbeats.append(harness.clock.now())
+                    except BlockingIOError:
+                        return
+            
+            silencer.scheduler.call_every(10, count, first_delay=1, name="systemd")
+            harness.at(299, lambda: harness.lose_device(failed_reopens=10**6))
+            harness.run(2000)
+            count()
+            systemd.close()
+        # The tick at 300 fails; heartbeats continue for watchdog_grace seconds
+        if not heartbeats or not 900 <= heartbeats[-1] <= 930:
+            print(f"❌ Heartbeats did not stop after the grace period: last at "
+                  f"{heartbeats[-1:]}")
+            return False
+        print(f"✅ Heartbeats withheld after {silencer.watchdog_grace}s of failing keepalives")
+        
+        if not sys.platform.startswith("linux"):
+            return True
+        
+        # A client is READY once registered, and its heartbeats stop while renewals fail
+        from alexa_silencer import AlexaSilencer, ControlServer, NullBackend
+        for accept_until in (0, 1000):
+            clock = FakeClock()
+            address = f"@alexa-silencer-notify-test-{os.getpid()}"
+            daemon = ControlServer(address, lambda request, uid: {
+                "ok": request["command"] == "unregister" or clock.now() < accept_until,
+                "error": "busy"}, identify_peer=True)
+            daemon.start()
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, "notify")
+                systemd = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                systemd.bind(path)
+                systemd.setblocking(False)
+                client = AlexaSilencer(clock, backend=NullBackend())
+                client.single_instance = True
+                client.instance_address = address
+                client.notifier = SystemdNotifier(
+                    environ={"NOTIFY_SOCKET": path, "WATCHDOG_USEC": "60000000"})
+                messages = []
+                
+                def receive():
+                    while True:
+                        try:
+                            messages.append((clock.now(), systemd.recv(4096).decode()))
+                        except BlockingIOError:
+                            return
+                
+                client.scheduler.call_every(10, receive, first_delay=1, name="systemd")
+                client.scheduler.call_later(3000, client.stop)
+                client.run_daemon()
+                receive()
+                systemd.close()
+            daemon.stop()
+            ready = [message for _, message in messages if message.startswith("READY=1")]
+            heartbeats = [at for at, message in messages if message == "WATCHDOG=1"]
+            if not accept_until:
+                if ready or heartbeats:
+                    print(f"❌ Client sent {messages[:2]} without ever registering")
+                    return False
+                continue
+            # Renewals from 1200 fail; heartbeats stop watchdog_grace later
+            if len(ready) != 1 or not heartbeats or not 1800 <= heartbeats[-1] <= 1830:
+                print(f"❌ Client READY {ready} or heartbeats until {heartbeats[-1:]}")
+                return False
+        print("✅ Client READY only after registering; heartbeats withheld while renewals fail")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ systemd notify test failed: {e}")
+        return False
+
+def test_oneshot_mode():
+    """Test --oneshot playback and the systemd timer units"""
+    try:
+        from alexa_silencer import AlexaSilencer, KeepaliveTarget
+        
+        clock = FakeClock()
+        backend = FakeBackend(clock)
+        targets = [KeepaliveTarget(interval=120, name="den"),
+                   KeepaliveTarget(interval=300, name="kitchen")]
+        silencer = AlexaSilencer(clock, backend=backend, targets=targets)
+        if not silencer.run_oneshot():
+            print("❌ Oneshot keepalive failed")
+            return False
+        if len(backend.playbacks) != 2 or backend.closes != backend.opens:
+            print(f"❌ Expected 2 bursts and a closed backend, got {len(backend.playbacks)} "
+                  f"bursts, {backend.opens} opens, {backend.closes} closes")
+            return False
+        print("✅ One burst per target played, then the backend was closed")
+        
+        backend = FakeBackend(clock)
+        backend.fail_opens = 1
+        silencer = AlexaSilencer(clock, backend=backend)
+        if silencer.run_oneshot():
+            print("❌ Oneshot without an audio device reported success")
+            return False
+        print("✅ Missing audio device gives a failing exit status")
+        
+        silencer = AlexaSilencer(clock, backend="null", targets=targets)
+        units = silencer.systemd_units()
+        if "Type=notify" not in units["alexa-silencer.service"] or len(units) != 1:
+            print("❌ Resident unit is not a Type=notify service")
+            return False
+        silencer.timer_mode = True
+        units = silencer.systemd_units()
+        service, timer = units["alexa-silencer.service"], units["alexa-silencer.timer"]
+        if ("Type=oneshot" not in service or "--oneshot --backend null" not in service
+                or "OnUnitActiveSec=120s" not in timer):
+            print(f"❌ Unexpected timer units: {units}")
+            return False
+        print("✅ Timer mode writes a oneshot service and a timer at the shortest interval")
+        
+        # A frozen build is its own interpreter: no script path after the executable
+        import shlex
+        from alexa_silencer import parse_args
+        sys.frozen = True
+        try:
+            for timer_mode in (False, True):
+                silencer.timer_mode = timer_mode
+                service = silencer.systemd_units()["alexa-silencer.service"]
+                exec_start = next(line for line in service.splitlines()
+                                  if line.startswith("ExecStart="))
+                command = shlex.split(exec_start[len("ExecStart="):])
+                if command[0] != sys.executable or any(part.endswith(".py")
+                                                       for part in command):
+                    print(f"❌ Frozen unit runs a script: {exec_start}")
+                    return False
+                parse_args(command[1:])
+        finally:
+            del sys.frozen
+        print("✅ Units written by a frozen build run the executable alone")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Oneshot mode test failed: {e}")
+        return False
+
+DBUS_MONITOR_SAMPLE = """\
+signal time=1712345678.1 sender=:1.4 -> destination=(null destination) serial=88 path=/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF; interface=org.freedesktop.DBus.Properties; member=PropertiesChanged
+   string "org.bluez.Device1"
+   array [
+      dict entry(
+         string "ServicesResolved"
+         variant             boolean true
+      )
+      dict entry(
+         string "Connected"
+         variant             boolean true
+      )
+   ]
+   array [
+   ]
+signal time=1712345699.2 sender=:1.4 -> destination=(null destination) serial=91 path=/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF; interface=org.freedesktop.DBus.Properties; member=PropertiesChanged
+   string "org.bluez.Device1"
+   array [
+      dict entry(
+         string "Connected"
+         variant             boolean false
+      )
+   ]
+   array [
+   ]
+"""
+
+def test_bluetooth_tracking():
+    """Test that keepalives only run while a BlueZ audio device is connected"""
+    try:
+        from alexa_silencer import (AdaptiveInterval, BluetoothWatcher, KeepaliveTarget,
+                                    parse_dbus_monitor)
+        
+        echo = "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"
+        events = list(parse_dbus_monitor(DBUS_MONITOR_SAMPLE.splitlines()))
+        if events != [(echo, True), (echo, False)]:
+            print(f"❌ Unexpected dbus-monitor events: {events}")
+            return False
+        print("✅ Connected changes parsed from dbus-monitor output")
+        
+        bluez = FakeBluez({
+            echo: {"address": "AA:BB:CC:DD:EE:FF", "connected": False, "audio": True},
+            "/org/bluez/hci0/dev_11_22_33_44_55_66": {"address": "11:22:33:44:55:66",
+                                                     "connected": True, "audio": False},
+        })
+        harness = DaemonHarness(interval=300)
+        silencer = harness.silencer
+        silencer.track_bluetooth = True
+        silencer.bluetooth_source = bluez
+        harness.at(1000, lambda: bluez.set_connected(echo, True))
+        harness.at(1700, lambda: bluez.set_connected(echo, False))
+        harness.at(3000, lambda: bluez.set_connected(echo, True))
+        harness.run(3500)
+        
+        # A connected keyboard (no A2DP sink) does not count as an audio device
+        ticks = harness.ticks[silencer.targets[0].name]
+        if ticks != [1000, 1300, 1600, 3000, 3300]:
+            print(f"❌ Unexpected keepalive times: {ticks}")
+            return False
+        print("✅ Keepalives only while connected, one right after each connect")
+        
+        # Startup, the events, the three scheduled ticks and shutdown: no idle polling
+        if silencer.scheduler.wakeups > 20:
+            print(f"❌ {silencer.scheduler.wakeups} wakeups while mostly disconnected")
+            return False
+        if not bluez.closed or silencer.targets[0].stats()["connected"] is not True:
+            print("❌ Event source not closed or connection state not reported")
+            return False
+        print(f"✅ {silencer.scheduler.wakeups} scheduler wakeups in 3500 virtual seconds")
+        
+        # Switching the Echo off 10s after a burst is not an idle timeout
+        bluez.set_connected(echo, True)
+        harness = DaemonHarness(interval=300)
+        silencer = harness.silencer
+        silencer.track_bluetooth = True
+        silencer.bluetooth_source = bluez
+        silencer.adaptive = True
+        silencer.targets[0].adaptive = AdaptiveInterval(300)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            silencer.adaptive_state_file = Path(temp_dir) / "adaptive_intervals.json"
+            harness.at(10, lambda: bluez.set_connected(echo, False))
+            harness.at(100, lambda: bluez.set_connected(echo, True))
+            harness.run(500)
+        target = silencer.targets[0]
+        if target.disconnects != 1 or target.adaptive.idle_timeout is not None:
+            print(f"❌ Manual disconnect learned as an idle timeout: {target.stats()}")
+            return False
+        # The tick at 400 survived a full interval, so learning carries on as usual
+        if target.interval != 375 or harness.ticks[target.name] != [0, 100, 400]:
+            print(f"❌ Interval or ticks changed: {target.interval}, {harness.ticks}")
+            return False
+        print("✅ A manual disconnect is counted but not learned from")
+        
+        # The Echo reconnecting while dbus-monitor starts up is not missed
+        booting = FakeBluez({echo: {"address": "AA:BB:CC:DD:EE:FF", "connected": False,
+                                    "audio": True}})
+        subscribe = booting.listen
+        
+        def listen_during_reconnect(callback, lost=None):
+            booting.table[echo]["connected"] = True  # before the monitor is subscribed
+            subscribe(callback, lost)
+        
+        booting.listen = listen_during_reconnect
+        harness = DaemonHarness(interval=300)
+        silencer = harness.silencer
+        silencer.track_bluetooth = True
+        silencer.bluetooth_source = booting
+        harness.run(700)
+        if harness.ticks[silencer.targets[0].name] != [0, 300, 600]:
+            print(f"❌ Device connected during startup not kept awake: {harness.ticks}")
+            return False
+        print("✅ A device connecting while the monitor starts is in the snapshot")
+        
+        # dbus-monitor dying must not leave a disconnected target unscheduled
+        monitor = FakeBluez({echo: {"address": "AA:BB:CC:DD:EE:FF", "connected": False,
+                                    "audio": True}})
+        harness = DaemonHarness(interval=300)
+        silencer = harness.silencer
+        silencer.track_bluetooth = True
+        silencer.bluetooth_source = monitor
+        harness.at(1000, lambda: monitor.lost())
+        harness.run(1700)
+        if harness.ticks[silencer.targets[0].name] != [1000, 1300, 1600]:
+            print(f"❌ Target not kept awake after tracking stopped: {harness.ticks}")
+            return False
+        if silencer.targets[0].connected is not None:
+            print("❌ Target still tracked after the event source was lost")
+            return False
+        print("✅ Losing dbus-monitor falls back to keeping every target awake")
+        
+        watcher = BluetoothWatcher(silencer, bluez)
+        watcher.devices = bluez.devices()
+        states = [watcher.is_connected(KeepaliveTarget(sink))
+                  for sink in ("bluez_output.AA_BB_CC_DD_EE_FF.1",
+                               "bluez_sink.99_99_99_99_99_99.a2dp_sink",
+                               "alsa_output.pci-0000_00_1f.3.analog-stereo")]
+        if states != [True, False, None]:
+            print(f"❌ Unexpected sink matches: {states}")
+            return False
+        print("✅ BlueZ sinks follow their device; other sinks are not tracked")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Bluetooth tracking test failed: {e}")
+        return False
+
+def test_memory_watchdog():
+    """Test flat memory over 100k ticks and the restart above the RSS ceiling"""
+    try:
+        import tracemalloc
+        from alexa_silencer import AlexaSilencer, NullBackend
+        
+        ticks, interval, every = 100_000, 300, 10_000
+        clock = FakeClock()
+        silencer = AlexaSilencer(clock, backend=NullBackend())
+        silencer.set_target_interval(silencer.targets[0], interval)
+        silencer.memory_check_interval = every * interval
+        blocks = []
+        # Runs just after each watchdog sample; the first one follows 10k warm-up ticks
+        silencer.scheduler.call_every(every * interval,
+                                      lambda: blocks.append(silencer.memory_watchdog.blocks),
+                                      first_delay=every * interval + 1, name="soak")
+        silencer.scheduler.call_later(ticks * interval - 1, silencer.stop, name="shutdown")
+        
+        wall_start = time.perf_counter()
+        silencer.run_daemon()
+        wall = time.perf_counter() - wall_start
+        
+        emitted = silencer.activity.emitted
+        if emitted != ticks or silencer.audio.backend is not None:
+            print(f"❌ Expected {ticks} keepalives, got {emitted}")
+            return False
+        # Well under one allocation per 100 ticks survives
+        growth = blocks[-1] - blocks[0]
+        if len(blocks) != 9 or growth > 800:
+            print(f"❌ Python allocations grew by {growth} blocks over "
+                  f"{every * (len(blocks) - 1)} ticks: {blocks}")
+            return False
+        print(f"✅ {ticks} virtual ticks on the null backend; allocated blocks changed "
+              f"by {growth:+d} after warm-up ({wall:.1f}s wall)")
+        
+        # Above the ceiling the daemon stops cleanly and asks main() to restart it
+        harness = DaemonHarness(interval=300)
+        silencer = harness.silencer
+        silencer.memory_ceiling = 1
+        silencer.memory_trace = True
+        harness.run(3000)
+        if not silencer.restart_requested or harness.clock.now() != 600:
+            print(f"❌ No restart requested at the first sample (stopped at "
+                  f"{harness.clock.now()}s)")
+            return False
+        memory = silencer.get_metrics()["memory"]
+        if memory["peak_bytes"] <= 1 or harness.backend.closes != 1:
+            print("❌ Restart skipped cleanup or lost the memory stats")
+            return False
+        if memory["traced_bytes"] is None or tracemalloc.is_tracing():
+            print("❌ tracemalloc was not sampled, or left running")
+            return False
+        if silencer.exit_status != 0:
+            print("❌ Re-executing daemon reported a failure")
+            return False
+        print("✅ RSS above the ceiling stopped the daemon cleanly for a restart")
+        
+        # Under systemd (with or without its watchdog), Restart= does the restart
+        for watchdog_interval in (60, None):
+            harness = DaemonHarness(interval=300)
+            silencer = harness.silencer
+            silencer.memory_ceiling = 1
+            silencer.notifier.address = "@test"
+            silencer.notifier.watchdog_interval = watchdog_interval
+            silencer.notifier.notify = lambda *assignments: True
+            harness.run(3000)
+            if (silencer.restart_requested or silencer.exit_status != 1
+                    or harness.clock.now() != 600 or harness.backend.closes != 1):
+                print(f"❌ Expected a clean failing exit at 600s under systemd "
+                      f"(watchdog {watchdog_interval}), stopped at {harness.clock.now()}s")
+                return False
+        print("✅ Under systemd the ceiling exits with a failure for Restart= to handle")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Memory watchdog test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 Alexa Silencer Test Suite")
@@ -161,6 +2277,28 @@ def main():
         ("pygame Test", test_pygame_initialization),
         ("OS Detection Test", test_os_detection),
         ("AlexaSilencer Class Test", test_alexa_silencer_class),
+        ("Silence Buffer Test", test_render_silence),
+        ("Scheduler Test", test_scheduler_fake_clock),
+        ("Drift and Resume Test", test_drift_and_resume),
+        ("Playback Completion Test", test_playback_completion),
+        ("Audio Backend Test", test_audio_backends),
+        ("Lazy Import Test", test_lazy_imports),
+        ("Device Loss Recovery Test", test_device_loss_recovery),
+        ("Multiple Device Test", test_multiple_devices),
+        ("Adaptive Interval Test", test_adaptive_interval),
+        ("Activity Suppression Test", test_activity_suppression),
+        ("Metrics Test", test_metrics),
+        ("Logging Pipeline Test", test_logging_pipeline),
+        ("Control Socket Test", test_control_socket),
+        ("asyncio Daemon Test", test_asyncio_daemon),
+        ("KeepaliveSession Test", test_keepalive_session),
+        ("Config Reload Test", test_config_reload),
+        ("Shared Daemon Test", test_shared_daemon),
+        ("Daemon Lifecycle Test", test_daemon_lifecycle),
+        ("systemd Notify Test", test_systemd_notify),
+        ("Oneshot Mode Test", test_oneshot_mode),
+        ("Bluetooth Tracking Test", test_bluetooth_tracking),
+        ("Memory Watchdog Test", test_memory_watchdog),
     ]
     
     passed = 0